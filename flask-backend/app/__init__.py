@@ -3,7 +3,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from graphql_server.flask import GraphQLView
 from config import config
-from app.utils.cache import cache
+from app.utils.cache import (
+    cache, invalidation_listener, health_prober, stats_flusher, warmup_flusher, cache_warmer,
+    snapshot_writer
+)
 
 db = SQLAlchemy()
 
@@ -13,11 +16,23 @@ def create_app(config_name='development'):
     
     # CORS is configured in app.py to avoid double-init
     db.init_app(app)
+    cache.init_app(app)
+    cache_warmer.configure(app.config)
     
     if cache.is_connected():
         app.logger.info(" Redis connection successful")
     else:
         app.logger.warning("  Redis connection failed - caching disabled")
+
+    if not app.config.get('TESTING'):
+        health_prober.start()
+        invalidation_listener.start()
+        stats_flusher.start()
+        warmup_flusher.start()
+        # The snapshot itself is mapped lazily, on the first cache miss or write.
+        if cache.snapshot.enabled:
+            snapshot_writer.interval = app.config.get('CACHE_SNAPSHOT_INTERVAL', snapshot_writer.interval)
+            snapshot_writer.start()
     
     from app.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
@@ -28,7 +43,11 @@ def create_app(config_name='development'):
     from app.routes.auth import auth_bp
     app.register_blueprint(auth_bp)
 
+    from app.routes.webhooks import webhooks_bp
+    app.register_blueprint(webhooks_bp)
+
     from app.graphql.schema import schema
+    from app.utils.response_cache import serve_cached_response, store_response
 
     @app.before_request
     def check_graphql_auth():
@@ -39,6 +58,17 @@ def create_app(config_name='development'):
             if not auth_header:
                 return jsonify({'error': 'Authentication required'}), 401
 
+    @app.before_request
+    def serve_cached_graphql_response():
+        if request.path == '/graphql' and request.method in ('GET', 'POST'):
+            return serve_cached_response()
+
+    @app.after_request
+    def cache_graphql_response(response):
+        if request.path == '/graphql':
+            return store_response(response)
+        return response
+
     app.add_url_rule(
         '/graphql',
         view_func=GraphQLView.as_view(
@@ -81,5 +111,15 @@ def create_app(config_name='development'):
         except Exception as e:
             app.logger.warning(f"Could not create database tables: {e}")
             app.logger.info("App will start without database - check DATABASE_URL")
+
+    from app.wordpress_sync import wordpress_mirror
+    wordpress_mirror.configure(app.config)
+    if not app.config.get('TESTING') and app.config.get('WORDPRESS_MIRROR_SYNC'):
+        wordpress_mirror.start(app)
+
+    # A new replica (or a fresh deploy) replays the hottest resolver calls in
+    # the background so it reaches a warm hit rate without waiting for traffic.
+    if not app.config.get('TESTING') and app.config.get('CACHE_WARMUP_ON_STARTUP') and cache.is_available():
+        cache_warmer.start(app, trigger='startup')
     
     return app
\ No newline at end of file
@@ -0,0 +1,125 @@
+from typing import Any, Iterable, Optional
+
+from flask import current_app
+from graphql.utilities import value_from_ast_untyped
+
+from app.utils.cache import cache, entity_cache
+from app.wordpress_client import wordpress_client
+from app.wordpress_sync import mirror_posts_by_id
+
+
+WP_POSTS_BY_ID_QUERY = """
+query GetPostsById($ids: [ID], $first: Int) {
+  posts(where: {in: $ids}, first: $first) {
+    nodes {
+      id
+      databaseId
+      title
+      content
+      excerpt
+      date
+      author {
+        node {
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+LOADER_CONTEXT_KEY = 'wp_post_loader'
+
+
+class WordPressPostLoader:
+    # Per-request batch loader for wordpressPost. GraphQL execution here is
+    # synchronous, so rather than waiting for every resolver to enqueue an id,
+    # the first lookup reads all wordpressPost(postId: ...) fields of the
+    # operation up front. Sibling entities already cached are skipped (their
+    # fields resolve from the cache), the rest come from a single
+    # posts(where: {in: [...]}) query along with the requested post.
+    #
+    # The requested post itself is never read from the entity cache: its
+    # entity key is the resolver's own cache key, which has just missed or is
+    # being refreshed, so a cached copy would only be stored back as if new.
+
+    def __init__(self, graphql_url: str):
+        self.graphql_url = graphql_url
+        self._posts = {}
+
+    def load(self, post_id: Any, info: Any = None) -> Optional[dict]:
+        key = str(post_id)
+        if key not in self._posts:
+            siblings = [
+                other for other in requested_post_ids(info)
+                if other != key and other not in self._posts
+            ]
+            cached = entity_cache.get_many('wp_post', siblings) if siblings and cache.is_available() else {}
+            self._posts.update(self.fetch([key] + [other for other in siblings if other not in cached]))
+        return self._posts.get(key)
+
+    def load_many(self, ids: list) -> dict:
+        # Maps every id to its post, or None when WordPress has no such post.
+        found = entity_cache.get_many('wp_post', ids) if cache.is_available() else {}
+        missing = [post_id for post_id in ids if post_id not in found]
+        if missing:
+            found.update(self.fetch(missing))
+        return {post_id: found.get(post_id) for post_id in ids}
+
+    def fetch(self, ids: list) -> dict:
+        # Upstream (or the mirror) only; every id maps to its post or None.
+        if current_app.config.get('WORDPRESS_READ_FROM_MIRROR'):
+            posts = mirror_posts_by_id(ids)
+        else:
+            data = wordpress_client(self.graphql_url).request(
+                WP_POSTS_BY_ID_QUERY, {'ids': ids, 'first': len(ids)}
+            )
+            posts = (data.get('data') or {}).get('posts', {}).get('nodes', [])
+        fetched = {str(post.get('databaseId')): post for post in posts if post}
+        if fetched and cache.is_available():
+            entity_cache.put_many('wp_post', list(fetched.values()), 'databaseId')
+        return {post_id: fetched.get(post_id) for post_id in ids}
+
+
+def post_loader(info: Any) -> WordPressPostLoader:
+    context = getattr(info, 'context', None)
+    graphql_url = context.get('WORDPRESS_GRAPHQL_URL') if isinstance(context, dict) else None
+    # Warmup shares one context across a whole run; give it a fresh loader.
+    if not isinstance(context, dict) or getattr(info, 'warmup', False):
+        return WordPressPostLoader(graphql_url)
+    loader = context.get(LOADER_CONTEXT_KEY)
+    if loader is None:
+        loader = context[LOADER_CONTEXT_KEY] = WordPressPostLoader(graphql_url)
+    return loader
+
+
+def requested_post_ids(info: Any, field_name: str = 'wordpressPost') -> list:
+    # postId arguments of every root field_name selection in the operation.
+    operation = getattr(info, 'operation', None)
+    if operation is None:
+        return []
+    fragments = getattr(info, 'fragments', None) or {}
+    variables = getattr(info, 'variable_values', None) or {}
+    ids = []
+    for selection in _root_fields(operation.selection_set, fragments):
+        if selection.name.value != field_name:
+            continue
+        for argument in selection.arguments or ():
+            if argument.name.value == 'postId':
+                value = value_from_ast_untyped(argument.value, variables)
+                if value is not None and str(value) not in ids:
+                    ids.append(str(value))
+    return ids
+
+
+def _root_fields(selection_set: Any, fragments: dict) -> Iterable:
+    for selection in selection_set.selections:
+        kind = selection.kind
+        if kind == 'field':
+            yield selection
+        elif kind == 'inline_fragment':
+            yield from _root_fields(selection.selection_set, fragments)
+        elif kind == 'fragment_spread':
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from _root_fields(fragment.selection_set, fragments)
@@ -1,113 +1,88 @@
-import requests
 from typing import List, Optional
+from flask import current_app
 from app.models import Article, Product, TeamMember
 from app import db
-from app.utils.cache import cache_graphql_query, cache
+from app.wordpress_client import wordpress_client
+from app.wordpress_sync import mirror_posts
+from app.graphql.loaders import post_loader
+from app.graphql.wordpress_fields import (
+    wp_post_fields, wp_posts_query, WP_POST_KEY_FIELD, WP_POST_FULL_SELECTION
+)
+from app.utils.cache import cache_graphql_query, cache, entity_cache, ContentNotFound, UpstreamError
 
 
 
 class Query:
   
     @staticmethod
-    @cache_graphql_query(ttl=300, key_prefix="wp_posts") 
     def resolve_wordpress_posts(root, info, limit: int = 10) -> List[dict]:
+        # Listing widgets rarely render the post body, so WordPress is only
+        # asked for the fields the query selects. Partial posts are cached
+        # under their own key and never as entities.
+        fields = wp_post_fields(info)
+        if fields is None:
+            return Query.fetch_wordpress_posts(root, info, limit=limit)
+        return Query.fetch_wordpress_post_summaries(root, info, limit=limit, fields=fields)
+
+    @staticmethod
+    @cache_graphql_query(key_prefix="wp_post_summaries", tags=("wp_posts", "wp_posts:content"))
+    def fetch_wordpress_post_summaries(root, info, limit: int = 10, fields: str = WP_POST_KEY_FIELD) -> List[dict]:
+        if current_app.config.get('WORDPRESS_READ_FROM_MIRROR'):
+            return mirror_posts(limit, fields.split(','))
         wp_url = info.context.get('WORDPRESS_GRAPHQL_URL')
-        
-        query = """
-        query GetPosts($first: Int) {
-          posts(first: $first) {
-            nodes {
-              id
-              databaseId
-              title
-              content
-              excerpt
-              date
-              author {
-                node {
-                  name
-                }
-              }
-            }
-          }
-        }
-        """
-        
         try:
-            response = requests.post(
-                wp_url,
-                json={'query': query, 'variables': {'first': limit}},
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            posts = data.get('data', {}).get('posts', {}).get('nodes', [])
-            return posts
+            return list(wordpress_client(wp_url).paginate(wp_posts_query(fields), 'posts', limit=limit))
         except Exception as e:
             print(f"Error fetching WordPress posts: {e}")
-            return []
+            raise UpstreamError(str(e), fallback=[])
 
-    
     @staticmethod
-    @cache_graphql_query(ttl=300, key_prefix="wp_post") 
-    def resolve_wordpress_post(root, info, post_id: str) -> Optional[dict]:
+    @cache_graphql_query(key_prefix="wp_posts", tags=("wp_posts",), entity="wp_post", entity_id_field="databaseId")
+    def fetch_wordpress_posts(root, info, limit: int = 10) -> List[dict]:
+        if current_app.config.get('WORDPRESS_READ_FROM_MIRROR'):
+            return mirror_posts(limit)
         wp_url = info.context.get('WORDPRESS_GRAPHQL_URL')
-        
-        query = """
-        query GetPost($id: ID!) {
-          post(id: $id, idType: DATABASE_ID) {
-            id
-            databaseId
-            title
-            content
-            excerpt
-            date
-            author {
-              node {
-                name
-              }
-            }
-          }
-        }
-        """
         try:
-            response = requests.post(
-                wp_url,
-                json={'query': query, 'variables': {'id': post_id}},
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return data.get('data', {}).get('post')
+            return list(wordpress_client(wp_url).paginate(wp_posts_query(WP_POST_FULL_SELECTION), 'posts', limit=limit))
+        except Exception as e:
+            print(f"Error fetching WordPress posts: {e}")
+            raise UpstreamError(str(e), fallback=[])
+
+    @staticmethod
+    @cache_graphql_query(key_prefix="wp_post", tags=("wp_post:{post_id}",), entity="wp_post", entity_id="post_id")
+    def resolve_wordpress_post(root, info, post_id: str) -> Optional[dict]:
+        # Sibling wordpressPost fields in the same document are fetched in
+        # the same upstream request; see WordPressPostLoader.
+        try:
+            return post_loader(info).load(post_id, info)
         except Exception as e:
             print(f"Error fetching WordPress post: {e}")
-            return None   
+            raise UpstreamError(str(e))   
     
     
     @staticmethod
-    @cache_graphql_query(ttl=300, key_prefix="articles")
+    @cache_graphql_query(key_prefix="articles", tags=("articles",), model=Article, entity="article")
     def resolve_articles(root, info, limit: int = 10, offset: int = 0) -> List:
         try:
             articles = Article.query.limit(limit).offset(offset).all()
             return articles
         except Exception as e:
             print(f"Error fetching articles: {e}")
-            return []
+            raise UpstreamError(str(e), fallback=[])
     
     @staticmethod
-    @cache_graphql_query(ttl=300, key_prefix="article")
-    def resolve_article(root, info, articleId: int) -> Optional[Article]:
+    @cache_graphql_query(key_prefix="article", tags=("article:{article_id}",), model=Article,
+                         entity="article", entity_id="article_id")
+    def resolve_article(root, info, article_id: int) -> Optional[Article]:
         try:
-            article = Article.query.filter_by(id=articleId).first()
+            article = Article.query.filter_by(id=article_id).first()
             return article
         except Exception as e:
             print(f"Error fetching article: {e}")
-            return None
+            raise UpstreamError(str(e))
     
     @staticmethod
-    @cache_graphql_query(ttl=300, key_prefix="products")
+    @cache_graphql_query(key_prefix="products", tags=("products",), model=Product, entity="product")
     def resolve_products(root, info, category: Optional[str] = None) -> List:
         try:
             query = Product.query
@@ -119,33 +94,30 @@ class Query:
             return products
         except Exception as e:
             print(f"Error fetching products: {e}")
-            return []
+            raise UpstreamError(str(e), fallback=[])
 
     @staticmethod
+    @cache_graphql_query(key_prefix="product", tags=("product:{product_id}",), model=Product,
+                         entity="product", entity_id="product_id")
     def resolve_product(root, info, product_id: int) -> Optional[Product]:
         try:
-            
             product = Product.query.filter_by(id=product_id).first()
-            if not product:
-                
-                raise Exception("Product not found")
-            return product
         except Exception as e:
-           
-            if str(e) == "Product not found":
-                raise e
             print(f"Error fetching product: {e}")
-            return None        
+            raise UpstreamError(str(e))
+        if not product:
+            raise ContentNotFound("Product not found")
+        return product
     
     @staticmethod
-    @cache_graphql_query(ttl=300, key_prefix="team")
+    @cache_graphql_query(key_prefix="team", tags=("team",), model=TeamMember)
     def resolve_team_members(root, info) -> List:
         try:
             members = TeamMember.query.all()
             return members
         except Exception as e:
             print(f"Error fetching team members: {e}")
-            return []
+            raise UpstreamError(str(e), fallback=[])
 
 
 class Mutation:
@@ -157,7 +129,7 @@ class Mutation:
             db.session.add(article)
             db.session.commit()
             
-            cache.delete_pattern("graphql:*articles*")
+            cache.invalidate_tags("articles", f"article:{article.id}")
             
             return {
                 'success': True,
@@ -173,10 +145,10 @@ class Mutation:
             }
     
     @staticmethod
-    def resolve_update_article(root, info, articleId: int, title: Optional[str] = None, 
+    def resolve_update_article(root, info, article_id: int, title: Optional[str] = None, 
                               content: Optional[str] = None, author: Optional[str] = None) -> dict:
         try:
-            article = Article.query.filter_by(id=articleId).first()
+            article = Article.query.filter_by(id=article_id).first()
             
             if not article:
                 return {
@@ -194,8 +166,10 @@ class Mutation:
             
             db.session.commit()
             
-            cache.delete_pattern(f"graphql:*article*{articleId}*")
-            cache.delete_pattern("graphql:*articles*")
+            # Membership is unchanged, so cached id lists stay valid; only the
+            # entity is rewritten and responses embedding its content dropped.
+            cache.invalidate_tags(f"article:{article_id}", "articles:content")
+            entity_cache.put("article", article.to_dict())
             
             return {
                 'success': True,
@@ -211,9 +185,9 @@ class Mutation:
             }
     
     @staticmethod
-    def resolve_delete_article(root, info, articleId: int) -> dict:
+    def resolve_delete_article(root, info, article_id: int) -> dict:
         try:
-            article = Article.query.filter_by(id=articleId).first()
+            article = Article.query.filter_by(id=article_id).first()
             
             if not article:
                 return {
@@ -224,8 +198,7 @@ class Mutation:
             db.session.delete(article)
             db.session.commit()
             
-            cache.delete_pattern(f"graphql:*article*{articleId}*")
-            cache.delete_pattern("graphql:*articles*")
+            cache.invalidate_tags("articles", f"article:{article_id}")
             
             return {
                 'success': True,
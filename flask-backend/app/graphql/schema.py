@@ -2,21 +2,39 @@ import graphene
 from graphene_sqlalchemy import SQLAlchemyObjectType
 from app.models import Article, Product, TeamMember
 from app.graphql.resolvers import Query, Mutation
+from app.utils.cache_hydration import CachedRecord, is_cached_instance, primary_key_of
 
 
-class ArticleType(SQLAlchemyObjectType):
+class CachedSQLAlchemyObjectType(SQLAlchemyObjectType):
+    # Cache hits resolve to read-only records rather than model instances.
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def is_type_of(cls, root, info):
+        if is_cached_instance(root, cls._meta.model):
+            return True
+        return super().is_type_of(root, info)
+
+    def resolve_id(self, info):
+        if isinstance(self, CachedRecord):
+            return primary_key_of(self)
+        return SQLAlchemyObjectType.resolve_id(self, info)
+
+
+class ArticleType(CachedSQLAlchemyObjectType):
     class Meta:
         model = Article
         exclude_fields = []
 
 
-class ProductType(SQLAlchemyObjectType):
+class ProductType(CachedSQLAlchemyObjectType):
     class Meta:
         model = Product
         exclude_fields = []
 
 
-class TeamMemberType(SQLAlchemyObjectType):
+class TeamMemberType(CachedSQLAlchemyObjectType):
     class Meta:
         model = TeamMember
         exclude_fields = []
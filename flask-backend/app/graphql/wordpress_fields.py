@@ -0,0 +1,58 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.utils.cache import _collect_selection
+
+
+# WordPressPostType field -> the WPGraphQL selection that backs it. A field
+# missing from this table makes the resolver fall back to the full query.
+WP_POST_FIELDS = {
+    'id': 'id',
+    'databaseId': 'databaseId',
+    'title': 'title',
+    'content': 'content',
+    'excerpt': 'excerpt',
+    'date': 'date',
+    'authorName': 'author { node { name } }',
+    '__typename': None,
+}
+
+# Always fetched: entries are identified by it.
+WP_POST_KEY_FIELD = 'databaseId'
+
+WP_POST_ALL_FIELDS = frozenset(name for name, selection in WP_POST_FIELDS.items() if selection)
+WP_POST_FULL_SELECTION = ','.join(sorted(WP_POST_ALL_FIELDS))
+
+
+def wp_post_fields(info: Any) -> Optional[str]:
+    # Comma-separated WordPressPostType fields the query selects, or None when
+    # it needs them all (or asks for something the table cannot map).
+    field_nodes = getattr(info, 'field_nodes', None)
+    if not field_nodes:
+        return None
+    fragments = getattr(info, 'fragments', None) or {}
+    selected = {}
+    for node in field_nodes:
+        _collect_selection(node.selection_set, fragments, selected)
+    if any(name not in WP_POST_FIELDS for name in selected):
+        return None
+
+    fields = {name for name in selected if WP_POST_FIELDS[name]} | {WP_POST_KEY_FIELD}
+    if fields >= WP_POST_ALL_FIELDS:
+        return None
+    return ','.join(sorted(fields))
+
+
+@lru_cache(maxsize=128)
+def wp_posts_query(fields: str) -> str:
+    selection = '\n      '.join(WP_POST_FIELDS[name] for name in fields.split(','))
+    return (
+        "query GetPosts($first: Int, $after: String) {\n"
+        "  posts(first: $first, after: $after) {\n"
+        "    pageInfo { hasNextPage endCursor }\n"
+        "    nodes {\n"
+        f"      {selection}\n"
+        "    }\n"
+        "  }\n"
+        "}\n"
+    )
@@ -144,4 +144,66 @@ class TeamMember(db.Model):
             'bio': self.bio,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class WordPressPost(db.Model):
+    # Local mirror of WordPress posts, kept current by app/wordpress_sync.py.
+    # The primary key is the WordPress databaseId.
+    __tablename__ = 'wordpress_posts'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    global_id = db.Column(db.String(100), unique=True)
+    slug = db.Column(db.String(200), index=True)
+    title = db.Column(db.Text)
+    content = db.Column(db.Text)
+    excerpt = db.Column(db.Text)
+    author_name = db.Column(db.String(200))
+    date = db.Column(db.DateTime, index=True)
+    modified = db.Column(db.DateTime, index=True)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self, fields=None):
+        # Shaped like a WPGraphQL post node; `fields` limits it to those
+        # WordPressPostType fields.
+        data = {
+            'id': self.global_id,
+            'databaseId': self.id,
+            'slug': self.slug,
+            'title': self.title,
+            'content': self.content,
+            'excerpt': self.excerpt,
+            'date': self.date.isoformat() if self.date else None,
+            'modified': self.modified.isoformat() if self.modified else None,
+            'author': {'node': {'name': self.author_name}} if self.author_name else None
+        }
+        if fields is not None:
+            keys = {'author' if name == 'authorName' else name for name in fields}
+            data = {key: value for key, value in data.items() if key in keys}
+        return data
+
+
+class WordPressPage(db.Model):
+    __tablename__ = 'wordpress_pages'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    global_id = db.Column(db.String(100), unique=True)
+    slug = db.Column(db.String(200), index=True)
+    title = db.Column(db.Text)
+    content = db.Column(db.Text)
+    date = db.Column(db.DateTime, index=True)
+    modified = db.Column(db.DateTime, index=True)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self, fields=None):
+        data = {
+            'id': self.global_id,
+            'databaseId': self.id,
+            'slug': self.slug,
+            'title': self.title,
+            'content': self.content,
+            'date': self.date.isoformat() if self.date else None,
+            'modified': self.modified.isoformat() if self.modified else None
+        }
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
+        return data
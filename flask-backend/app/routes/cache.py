@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request, current_app
-from app.utils.cache import cache
+from app.utils.cache import cache, cache_policies, cache_warmer, INSTANCE_ID
+from app.utils.cache_stats import cache_stats
+from app.wordpress_sync import wordpress_mirror
 from functools import wraps
 
 
@@ -35,7 +37,10 @@ def cache_status():
                     info.get('keyspace_hits', 0) / 
                     max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0), 1) * 100, 
                     2
-                )
+                ),
+                'local_cache': cache.local_cache.stats(),
+                'snapshot': cache.snapshot.status(),
+                'circuit_breaker': cache.breaker.state
             }), 200
         except Exception as e:
             return jsonify({
@@ -46,18 +51,66 @@ def cache_status():
     else:
         return jsonify({
             'status': 'disconnected',
-            'message': 'Redis is not available'
+            'message': 'Redis is not available',
+            'circuit_breaker': cache.breaker.state
         }), 503
 
 
+@cache_bp.route('/analytics', methods=['GET'])
+@require_admin
+def cache_analytics():
+    
+    response = {
+        'instance': INSTANCE_ID,
+        'local': cache_stats.snapshot(),
+        'local_cache': cache.local_cache.stats(),
+        'cluster': None
+    }
+    
+    if cache.is_available():
+        cache_stats.flush(cache.redis_client)
+        response['cluster'] = cache_stats.cluster_snapshot(cache.redis_client)
+    
+    return jsonify(response), 200
+
+
+@cache_bp.route('/policies', methods=['GET'])
+@require_admin
+def cache_policy_list():
+    return jsonify({
+        'default_ttl': cache_policies.default_ttl,
+        'adaptive': cache_policies.adaptive,
+        'policies': cache_policies.describe()
+    }), 200
+
+
+@cache_bp.route('/analytics/reset', methods=['POST'])
+@require_admin
+def reset_cache_analytics():
+    try:
+        cache_stats.reset()
+        cache_stats.reset_cluster(cache.redis_client)
+        return jsonify({
+            'success': True,
+            'message': 'Cache analytics reset'
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @cache_bp.route('/clear', methods=['POST'])
 @require_admin
 def clear_cache():
     try:
         cache.clear_all()
+        warming = cache_warmer.start(current_app._get_current_object(), trigger='clear')
         return jsonify({
             'success': True,
-            'message': 'Cache cleared successfully'
+            'message': 'Cache cleared successfully',
+            'warmup_started': warming
         }), 200
     except Exception as e:
         return jsonify({
@@ -70,20 +123,28 @@ def clear_cache():
 @require_admin
 def invalidate_pattern():
     
-    data = request.get_json()
+    data = request.get_json() or {}
+    tags = data.get('tags')
     pattern = data.get('pattern')
     
-    if not pattern:
+    if not tags and not pattern:
         return jsonify({
             'success': False,
-            'error': 'Pattern is required'
+            'error': 'Tags or pattern is required'
         }), 400
     
     try:
-        deleted_count = cache.delete_pattern(pattern)
+        if tags:
+            if isinstance(tags, str):
+                tags = [tags]
+            deleted_count = cache.invalidate_tags(*tags)
+            message = f'Invalidated {deleted_count} keys tagged {", ".join(tags)}'
+        else:
+            deleted_count = cache.delete_pattern(pattern)
+            message = f'Invalidated {deleted_count} keys matching pattern'
         return jsonify({
             'success': True,
-            'message': f'Invalidated {deleted_count} keys matching pattern',
+            'message': message,
             'deleted_count': deleted_count
         }), 200
     except Exception as e:
@@ -98,23 +159,23 @@ def invalidate_pattern():
 def list_keys():
    
     try:
-        pattern = request.args.get('pattern', 'graphql:*')
-        keys = cache.redis_client.keys(pattern)
+        pattern = request.args.get('pattern')
+        cursor = request.args.get('cursor', 0, type=int)
+        count = min(max(request.args.get('count', 100, type=int), 1), 1000)
+
+        next_cursor, keys = cache.scan_keys(pattern, cursor=cursor, count=count)
         
-      
         keys_with_ttl = []
-        for key in keys[:100]: 
-            ttl = cache.redis_client.ttl(key)
-            keys_with_ttl.append({
-                'key': key,
-                'ttl': ttl,
-                'expires_in': f"{ttl}s" if ttl > 0 else 'No expiration'
-            })
+        for entry in cache.describe_keys(keys):
+            ttl = entry['ttl']
+            entry['expires_in'] = f"{ttl}s" if ttl and ttl > 0 else 'No expiration'
+            keys_with_ttl.append(entry)
         
         return jsonify({
-            'total_keys': len(keys),
             'keys': keys_with_ttl,
-            'showing': min(100, len(keys))
+            'showing': len(keys_with_ttl),
+            'cursor': next_cursor,
+            'complete': next_cursor == 0
         }), 200
     except Exception as e:
         return jsonify({
@@ -123,31 +184,79 @@ def list_keys():
         }), 500
 
 
-@cache_bp.route('/warmup', methods=['POST'])
+@cache_bp.route('/memory', methods=['GET'])
 @require_admin
-def warmup_cache():
-   
+def memory_report():
+    
     try:
-        from app.graphql.resolvers import Query
-        
-      
-        class MockInfo:
-            context = {'wp_graphql_url': request.app.config.get('WORDPRESS_GRAPHQL_URL')}
-        
-        info = MockInfo()
-        
-   
-        Query.resolve_wordpress_posts(None, info, limit=10)
-        Query.resolve_articles(None, info, limit=10)
-        Query.resolve_products(None, info)
-        Query.resolve_team_members(None, info)
+        pattern = request.args.get('pattern')
+        sample = min(max(request.args.get('sample', 1000, type=int), 1), 50000)
+        top = min(max(request.args.get('top', 10, type=int), 1), 100)
         
-        return jsonify({
-            'success': True,
-            'message': 'Cache warmed up successfully'
-        }), 200
+        return jsonify(cache.memory_report(pattern, sample=sample, top=top)), 200
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@cache_bp.route('/warmup', methods=['POST'])
+@require_admin
+def warmup_cache():
+    
+    data = request.get_json(silent=True) or {}
+    limit = data.get('limit')
+    started = cache_warmer.start(
+        current_app._get_current_object(), trigger='manual',
+        limit=int(limit) if limit else None
+    )
+    
+    if not started:
+        return jsonify({
+            'success': False,
+            'message': 'Warmup already running',
+            'status': cache_warmer.status()
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'message': 'Cache warmup started',
+        'status': cache_warmer.status()
+    }), 202
+
+
+@cache_bp.route('/warmup/status', methods=['GET'])
+@require_admin
+def warmup_status():
+    return jsonify(cache_warmer.status()), 200
+
+
+@cache_bp.route('/mirror', methods=['GET'])
+@require_admin
+def mirror_status():
+    return jsonify({
+        'read_from_mirror': bool(current_app.config.get('WORDPRESS_READ_FROM_MIRROR')),
+        'status': wordpress_mirror.status()
+    }), 200
+
+
+@cache_bp.route('/mirror/sync', methods=['POST'])
+@require_admin
+def sync_mirror():
+    
+    data = request.get_json(silent=True) or {}
+    started = wordpress_mirror.trigger(current_app._get_current_object(), reconcile=bool(data.get('reconcile')))
+    
+    if not started:
+        return jsonify({
+            'success': False,
+            'message': 'WordPress sync already running',
+            'status': wordpress_mirror.status()
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'message': 'WordPress sync started',
+        'status': wordpress_mirror.status()
+    }), 202
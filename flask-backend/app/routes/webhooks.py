@@ -0,0 +1,127 @@
+from flask import Blueprint, jsonify, request, current_app
+from app import db
+from app.utils.cache import cache, cache_warmer
+from app.wordpress_client import wordpress_client
+from app.wordpress_sync import MIRRORS, wordpress_mirror
+from functools import wraps
+import hashlib
+import hmac
+import time
+
+
+webhooks_bp = Blueprint('webhooks', __name__, url_prefix='/api/webhooks')
+
+WORDPRESS_ACTIONS = ('publish', 'update', 'delete', 'trash', 'unpublish')
+REMOVAL_ACTIONS = ('delete', 'trash', 'unpublish')
+
+# Warmup entries for these key prefixes are replayed after a post changes.
+POST_LIST_PREFIXES = ('wp_posts', 'wp_post_summaries')
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), timestamp.encode() + b'.' + body, hashlib.sha256).hexdigest()
+
+
+def require_signature(f):
+    # WordPress signs "<timestamp>.<raw body>" with the shared secret
+    # (HMAC-SHA256, hex) and sends X-Webhook-Timestamp and X-Webhook-Signature.
+    # Stale timestamps are refused so a captured request cannot be replayed.
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        secret = current_app.config.get('WORDPRESS_WEBHOOK_SECRET')
+        if not secret:
+            return jsonify({'error': 'Webhook is not configured'}), 503
+
+        timestamp = request.headers.get('X-Webhook-Timestamp', '')
+        signature = request.headers.get('X-Webhook-Signature', '')
+        if signature.startswith('sha256='):
+            signature = signature[len('sha256='):]
+        try:
+            skew = abs(time.time() - int(timestamp))
+        except ValueError:
+            return jsonify({'error': 'Invalid signature'}), 401
+        expected = sign_payload(secret, timestamp, request.get_data())
+        if skew > current_app.config.get('WORDPRESS_WEBHOOK_TOLERANCE', 300) or \
+                not hmac.compare_digest(expected, signature):
+            return jsonify({'error': 'Invalid signature'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def affected_tags(post_type: str, post_id: int, action: str) -> list:
+    # The single entry plus whatever lists show it. An edit leaves list
+    # membership alone, so the cached id lists (tag wp_posts) survive and
+    # only rendered lists (wp_posts:content) go.
+    if post_type == 'page':
+        return [f"wp_page:{post_id}"]
+    tags = [f"wp_post:{post_id}", 'wp_posts:content']
+    if action != 'update':
+        tags.append('wp_posts')
+    return tags
+
+
+def _update_mirror(app, post_type: str, post_id: int, action: str) -> dict:
+    client = wordpress_client(app.config.get('WORDPRESS_GRAPHQL_URL'))
+    return wordpress_mirror.mirror_one(
+        MIRRORS[f"{post_type}s"], client, post_id, removed=action in REMOVAL_ACTIONS
+    )
+
+
+def _refresh_entries(post_type: str, post_id: int, action: str) -> list:
+    if post_type != 'post':
+        return []
+    entries = [
+        entry for entry in cache_warmer.snapshot()
+        if entry.get('p') in POST_LIST_PREFIXES
+    ]
+    if action not in REMOVAL_ACTIONS:
+        entries.insert(0, {'p': 'wp_post', 't': 'Query', 'f': 'wordpressPost', 'a': {'post_id': str(post_id)}})
+    return entries
+
+
+@webhooks_bp.route('/wordpress', methods=['POST'])
+@require_signature
+def wordpress_webhook():
+
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    post_type = data.get('post_type', 'post')
+    try:
+        post_id = int(data.get('post_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'post_id is required'}), 400
+
+    if action not in WORDPRESS_ACTIONS or post_type not in ('post', 'page'):
+        return jsonify({'error': 'Unsupported event'}), 400
+
+    app = current_app._get_current_object()
+    tags = affected_tags(post_type, post_id, action)
+
+    try:
+        # The mirror goes first so a refresh that reads from it sees the change.
+        mirrored = None
+        if app.config.get('WORDPRESS_MIRROR_SYNC') or app.config.get('WORDPRESS_READ_FROM_MIRROR'):
+            mirrored = _update_mirror(app, post_type, post_id, action)
+        invalidated = cache.invalidate_tags(*tags)
+
+        refreshing = False
+        refresh = data.get('refresh', app.config.get('WORDPRESS_WEBHOOK_REFRESH'))
+        if refresh and cache.is_available():
+            entries = _refresh_entries(post_type, post_id, action)
+            # Queued behind a warmup that is already running rather than dropped.
+            refreshing = bool(entries) and cache_warmer.enqueue(app, entries, trigger='webhook')
+
+        return jsonify({
+            'success': True,
+            'tags': tags,
+            'invalidated': invalidated,
+            'mirror': mirrored,
+            'refresh_started': refreshing
+        }), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
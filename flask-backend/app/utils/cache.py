@@ -1,156 +1,1303 @@
 import redis
 import json
 import hashlib
-import os
+import time
+import uuid
+import random
+import fnmatch
+import inspect
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from typing import Any, Optional, Callable
-from datetime import datetime, date
+from typing import Any, Optional, Callable, Iterable
+from flask import current_app, has_app_context
+from config import Config
+from app.utils import cache_codec
+from app.utils.cache_codec import CacheDecodeError, AbsentMarker
+from app.utils.cache_stats import cache_stats, key_prefix as stats_prefix, StatsFlusher
+from app.utils.cache_hydration import hydrator_for
+from app.utils.cache_policy import CachePolicyRegistry
+from app.utils.cache_warmup import CacheWarmer, WarmupRecorder
+from app.utils.cache_snapshot import CacheSnapshot
+from app.utils.entity_cache import EntityCache, entity_key, load_rows
+
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+# Key namespaces holding cached content. cache:* (analytics, warmup and
+# snapshot history) and lock:* live in the same DB and are left alone.
+CACHE_NAMESPACES = ('graphql:*', 'entity:*', 'response:*', 'tag:*')
+CACHE_KEY_PREFIXES = tuple(pattern[:-1] for pattern in CACHE_NAMESPACES)
+INSTANCE_ID = uuid.uuid4().hex
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+INVALIDATE_TAGS_SCRIPT = """
+local members = {}
+for _, tag_key in ipairs(KEYS) do
+    for _, key in ipairs(redis.call('smembers', tag_key)) do
+        redis.call('unlink', key)
+        table.insert(members, key)
+    end
+    redis.call('unlink', tag_key)
+end
+return members
+"""
+
+
+class LocalCache:
+    # In-process L1 tier: LRU bounded by entry count and approximate byte size.
+    # Entries are kept for at most `ttl` seconds so a missed invalidation
+    # message can only serve stale data for a short, bounded window.
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entries: int = 1024, ttl: int = 30):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_item_bytes = max_bytes // 8
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl: int = None) -> bool:
+        if not self.enabled or size > self.max_item_bytes:
+            self.delete(key)
+            return False
+
+        ttl = min(ttl or self.ttl, self.ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.current_bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._remove(key))
+
+    def delete_pattern(self, pattern: str) -> int:
+        with self._lock:
+            matching = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in matching:
+                self._remove(key)
+            return len(matching)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def hot_keys(self, limit: int) -> list:
+        # Most recently used first.
+        with self._lock:
+            keys = []
+            for key in reversed(self._entries):
+                if len(keys) >= limit:
+                    break
+                keys.append(key)
+            return keys
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.current_bytes -= entry[1]
+        return True
+
+
+cache_policies = CachePolicyRegistry(Config)
+local_cache = LocalCache(
+    max_bytes=Config.CACHE_L1_MAX_BYTES,
+    max_entries=Config.CACHE_L1_MAX_ENTRIES,
+    ttl=Config.CACHE_L1_TTL
+)
+
+
+class SingleFlight:
+    # Coalesces concurrent calls for the same key within this process: the first
+    # caller runs the function, everyone else blocks and receives its result.
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _InFlightCall()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class _InFlightCall:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+single_flight = SingleFlight()
+
+
+class CircuitBreaker:
+    # Closed: requests flow. Open: Redis is skipped until reset_timeout passes.
+    # Half-open: a single trial request decides whether to close or re-open.
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        if self.state == self.CLOSED and self.failures == 0:
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def _setting(settings: Any, name: str) -> Any:
+    if isinstance(settings, dict):
+        return settings.get(name, getattr(Config, name))
+    return getattr(settings, name, getattr(Config, name))
+
+
+def _decode_key(key: Any) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def create_connection_pool(settings: Any = Config) -> redis.ConnectionPool:
+    return redis.BlockingConnectionPool(
+        host=_setting(settings, 'REDIS_HOST'),
+        port=_setting(settings, 'REDIS_PORT'),
+        password=_setting(settings, 'REDIS_PASSWORD'),
+        db=_setting(settings, 'REDIS_DB'),
+        decode_responses=False,
+        max_connections=_setting(settings, 'REDIS_MAX_CONNECTIONS'),
+        timeout=_setting(settings, 'REDIS_POOL_TIMEOUT'),
+        socket_connect_timeout=_setting(settings, 'REDIS_SOCKET_CONNECT_TIMEOUT'),
+        socket_timeout=_setting(settings, 'REDIS_SOCKET_TIMEOUT'),
+        socket_keepalive=True,
+        health_check_interval=30
+    )
 
 
 class RedisCache:
     
-    def __init__(self):
-        self.redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'localhost'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            password=os.getenv('REDIS_PASSWORD', None),
-            db=0,
-            decode_responses=True,
-            socket_connect_timeout=5,
-            socket_timeout=5
+    def __init__(self, connection_pool: Optional[redis.ConnectionPool] = None, settings: Any = Config):
+        self.connection_pool = connection_pool or create_connection_pool(settings)
+        self.redis_client = redis.Redis(connection_pool=self.connection_pool)
+        self.breaker = CircuitBreaker(
+            failure_threshold=_setting(settings, 'REDIS_CIRCUIT_FAILURE_THRESHOLD'),
+            reset_timeout=_setting(settings, 'REDIS_CIRCUIT_RESET_TIMEOUT')
+        )
+        self.health_check_interval = _setting(settings, 'REDIS_HEALTH_CHECK_INTERVAL')
+        self.codec = cache_codec.available_codec(_setting(settings, 'CACHE_CODEC'))
+        self.compression = cache_codec.available_compression(_setting(settings, 'CACHE_COMPRESSION'))
+        self.compress_threshold = _setting(settings, 'CACHE_COMPRESS_THRESHOLD')
+        self.max_value_bytes = _setting(settings, 'CACHE_MAX_VALUE_BYTES')
+        self.default_ttl = _setting(settings, 'CACHE_DEFAULT_TTL')
+        self.tag_ttl = 86400
+        self.scan_batch_size = 500
+        self.local_cache = local_cache
+        self.policies = cache_policies
+        self.snapshot = CacheSnapshot(
+            self.local_cache.hot_keys,
+            path=_setting(settings, 'CACHE_SNAPSHOT_PATH'),
+            max_entries=_setting(settings, 'CACHE_SNAPSHOT_MAX_ENTRIES'),
+            max_bytes=_setting(settings, 'CACHE_SNAPSHOT_MAX_BYTES')
         )
-        self.default_ttl = 300  
         
+    def _local_allowed(self, key: str) -> bool:
+        return self.policies.get(stats_prefix(key)).local
+
+    def _compression_for(self, key: str) -> int:
+        compression = self.policies.get(stats_prefix(key)).compression
+        if compression is None:
+            return self.compression
+        return cache_codec.available_compression(compression)
+
     def _generate_cache_key(self, prefix: str, *args, **kwargs) -> str:
-        key_data = f"{prefix}:{str(args)}:{str(sorted(kwargs.items()))}"
-        return f"graphql:{hashlib.md5(key_data.encode()).hexdigest()}"
+        return _generate_cache_key(prefix, *args, **kwargs)
     
-    def _serialize_value(self, value: Any) -> str:
-        def default_serializer(obj):
-            if hasattr(obj, 'to_dict'):
-                return obj.to_dict()
-            if isinstance(obj, (datetime, date)):
-                return obj.isoformat()
-            if hasattr(obj, '__dict__') and not isinstance(obj, type):
-               
-                return {
-                    k: v for k, v in obj.__dict__.items() 
-                    if not k.startswith('_')
-                }
-            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
-        
-        return json.dumps(value, default=default_serializer)
+    def _serialize_value(self, value: Any) -> bytes:
+        return cache_codec.encode_value(value, self.codec, self.compression, self.compress_threshold)
     
     def get(self, key: str) -> Optional[Any]:
        
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value
+
         try:
-            cached_value = self.redis_client.get(key)
+            cached_value = self.redis_client.get(key) or self._restore(key)[0]
+            self.breaker.record_success()
             if cached_value:
-                return json.loads(cached_value)
+                cache_stats.incr(stats_prefix(key), 'bytes_read', len(cached_value))
+                value = cache_codec.decode_value(cached_value)
+                if self._local_allowed(key):
+                    self.local_cache.set(key, value, len(cached_value))
+                return value
             return None
-        except (redis.RedisError, json.JSONDecodeError) as e:
+        except (redis.RedisError, CacheDecodeError) as e:
+            self._record_error(e, key)
             print(f"Cache get error: {e}")
             return None
     
-    def set(self, key: str, value: Any, ttl: int = None) -> bool:
+    def get_with_ttl(self, key: str, stale_ttl: int = 0) -> tuple:
+        # Returns (value, seconds until the Redis entry expires). L1 hits are
+        # always fresh, so they report no remaining TTL.
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value, None
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            cached_value, pttl = pipe.execute()
+            self.breaker.record_success()
+            if not cached_value:
+                cached_value, remaining = self._restore(key)
+                pttl = remaining * 1000 if remaining else None
+            if not cached_value:
+                return None, None
+            cache_stats.incr(stats_prefix(key), 'bytes_read', len(cached_value))
+
+            value = cache_codec.decode_value(cached_value)
+            remaining = pttl / 1000 if pttl and pttl > 0 else None
+            if remaining is not None and int(remaining - stale_ttl) > 0 and self._local_allowed(key):
+                self.local_cache.set(key, value, len(cached_value), int(remaining - stale_ttl))
+            return value, remaining
+        except (redis.RedisError, CacheDecodeError) as e:
+            self._record_error(e, key)
+            print(f"Cache get error: {e}")
+            return None, None
     
+    def get_raw(self, key: str) -> Optional[bytes]:
+        # Stored bytes exactly as written by set_raw, with no envelope to decode.
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value
+
+        try:
+            cached_value = self.redis_client.get(key) or self._restore(key)[0]
+            self.breaker.record_success()
+            if cached_value:
+                cache_stats.incr(stats_prefix(key), 'bytes_read', len(cached_value))
+                if self._local_allowed(key):
+                    self.local_cache.set(key, cached_value, len(cached_value))
+                return cached_value
+            return None
+        except redis.RedisError as e:
+            self._record_error(e, key)
+            print(f"Cache get error: {e}")
+            return None
+
+    def get_many(self, keys: Iterable[str]) -> dict:
+        # Partial-hit lookup: returns only the keys found, so callers recompute
+        # just the missing ones. L1 first, then one MGET for the rest.
+        found = {}
+        remote = []
+        for key in dict.fromkeys(keys):
+            local_value = self.local_cache.get(key)
+            if local_value is not None:
+                found[key] = local_value
+            else:
+                remote.append(key)
+        # With the breaker open the rest are misses; callers may reach here
+        # from an L1 hit (an id list being reassembled) without checking.
+        if not remote or not self.is_available():
+            return found
+
+        try:
+            values = self.redis_client.mget(remote)
+            self.breaker.record_success()
+        except redis.RedisError as e:
+            self._record_error(e)
+            print(f"Cache get_many error: {e}")
+            return found
+
+        for key, cached_value in zip(remote, values):
+            cached_value = cached_value or self._restore(key)[0]
+            if not cached_value:
+                continue
+            try:
+                value = cache_codec.decode_value(cached_value)
+            except CacheDecodeError as e:
+                self._record_error(e, key)
+                print(f"Cache get error: {e}")
+                continue
+            cache_stats.incr(stats_prefix(key), 'bytes_read', len(cached_value))
+            if self._local_allowed(key):
+                self.local_cache.set(key, value, len(cached_value))
+            found[key] = value
+        return found
+
+    def _restore(self, key: str) -> tuple:
+        # Redis missed: fall back to the on-disk snapshot and write the entry
+        # back with its remaining TTL and tags, unless it was invalidated since
+        # the snapshot was taken. Returns (bytes, remaining).
+        try:
+            entry = self.snapshot.take_current(key, self.redis_client)
+        except redis.RedisError as e:
+            self._record_error(e, key)
+            return None, None
+        if entry is None:
+            return None, None
+        serialized_value, remaining, tags = entry
+        try:
+            self._write(key, serialized_value, remaining, tags)
+        except redis.RedisError as e:
+            self._record_error(e, key)
+        cache_stats.incr(stats_prefix(key), 'snapshot_hits')
+        return serialized_value, remaining
+
+    def set(self, key: str, value: Any, ttl: int = None, local_ttl: int = None,
+            tags: Optional[Iterable[str]] = None) -> bool:
+    
+        try:
+            ttl = ttl or self.default_ttl
+            encoded = self._encode(key, value)
+            if encoded is None:
+                return False
+            serialized_value, local_value, local_size = encoded
+            result = self._write(key, serialized_value, ttl, tags)
+            if result and self._local_allowed(key):
+                self.local_cache.set(key, local_value, local_size, local_ttl or ttl)
+            return result
+        except (redis.RedisError, TypeError, ValueError) as e:
+            self._record_error(e, key)
+            print(f"Cache set error: {e}")
+            return False
+
+    def set_many(self, mapping: dict, ttl: int = None, local_ttl: int = None,
+                 tags: Optional[Any] = None) -> int:
+        # One pipeline of SETEX (plus tag bookkeeping) for every entry. tags is
+        # either shared by all entries or a dict of per-key tags. Returns how
+        # many entries were stored.
+        ttl = ttl or self.default_ttl
+        encoded = {}
+        for key, value in mapping.items():
+            try:
+                entry = self._encode(key, value)
+            except (TypeError, ValueError) as e:
+                self._record_error(e, key)
+                print(f"Cache set error: {e}")
+                continue
+            if entry is not None:
+                encoded[key] = entry
+        if not encoded or not self.is_available():
+            return 0
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, (serialized_value, _, _) in encoded.items():
+                key_tags = tags.get(key) if isinstance(tags, dict) else tags
+                self._queue_write(pipe, key, serialized_value, ttl, key_tags)
+            pipe.execute()
+            self.breaker.record_success()
+        except redis.RedisError as e:
+            self._record_error(e)
+            print(f"Cache set_many error: {e}")
+            return 0
+
+        for key, (serialized_value, local_value, local_size) in encoded.items():
+            cache_stats.incr(stats_prefix(key), 'bytes_written', len(serialized_value))
+            if self._local_allowed(key):
+                self.local_cache.set(key, local_value, local_size, local_ttl or ttl)
+        return len(encoded)
+
+    def _encode(self, key: str, value: Any) -> Optional[tuple]:
+        # (bytes for Redis, value for L1, L1 size), or None when over budget.
+        if isinstance(value, AbsentMarker):
+            serialized_value = cache_codec.encode_absent(value)
+            return serialized_value, value, len(serialized_value)
+
+        payload = cache_codec.dumps(value, self.codec)
+        serialized_value = cache_codec.pack(
+            payload, self.codec, self._compression_for(key), self.compress_threshold
+        )
+        if self._oversized(serialized_value):
+            # Last resort before giving up: compress regardless of policy.
+            serialized_value = cache_codec.pack(payload, self.codec, cache_codec.COMPRESSION_ZLIB, 0)
+            if self._oversized(serialized_value):
+                self._skip_oversized(key, serialized_value)
+                return None
+        return serialized_value, cache_codec.loads(payload, self.codec), len(payload)
+
+    def set_raw(self, key: str, payload: bytes, ttl: int = None, local_ttl: int = None,
+                tags: Optional[Iterable[str]] = None) -> bool:
+        if self._oversized(payload):
+            return self._skip_oversized(key, payload)
         try:
             ttl = ttl or self.default_ttl
-            serialized_value = self._serialize_value(value)
-            return self.redis_client.setex(key, ttl, serialized_value)
-        except (redis.RedisError, TypeError, json.JSONDecodeError) as e:
+            result = self._write(key, payload, ttl, tags)
+            if result and self._local_allowed(key):
+                self.local_cache.set(key, payload, len(payload), local_ttl or ttl)
+            return result
+        except redis.RedisError as e:
+            self._record_error(e, key)
             print(f"Cache set error: {e}")
             return False
+
+    def _oversized(self, serialized_value: bytes) -> bool:
+        return bool(self.max_value_bytes) and len(serialized_value) > self.max_value_bytes
+
+    def _skip_oversized(self, key: str, serialized_value: bytes) -> bool:
+        cache_stats.incr(stats_prefix(key), 'oversized')
+        print(f"Cache set skipped for {key}: {len(serialized_value)} bytes exceeds {self.max_value_bytes}")
+        return False
+
+    def _write(self, key: str, serialized_value: bytes, ttl: int,
+               tags: Optional[Iterable[str]] = None) -> bool:
+        self.snapshot.note_write(key, tags)
+        if tags:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_write(pipe, key, serialized_value, ttl, tags)
+            result = pipe.execute()[0]
+        else:
+            result = self.redis_client.setex(key, ttl, serialized_value)
+        self.breaker.record_success()
+        cache_stats.incr(stats_prefix(key), 'bytes_written', len(serialized_value))
+        return result
+
+    def _queue_write(self, pipe: Any, key: str, serialized_value: bytes, ttl: int,
+                     tags: Optional[Iterable[str]] = None):
+        self.snapshot.note_write(key, tags)
+        pipe.setex(key, ttl, serialized_value)
+        for tag in tags or ():
+            pipe.sadd(self._tag_key(tag), key)
+            pipe.expire(self._tag_key(tag), max(ttl, self.tag_ttl))
     
     def delete(self, key: str) -> bool:
       
+        self.local_cache.delete(key)
+        self.snapshot.discard([key])
+        self.policies.record_invalidation([stats_prefix(key)])
         try:
-            return bool(self.redis_client.delete(key))
+            deleted = bool(self._invalidate('delete', key, keys=[key]))
+            self._publish_invalidation({'op': 'delete', 'keys': [key]})
+            return deleted
         except redis.RedisError as e:
+            self._record_error(e)
             print(f"Cache delete error: {e}")
             return False
     
-    def delete_pattern(self, pattern: str) -> int:
-        
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        self.local_cache.delete(*keys)
+        self.snapshot.discard(keys)
+        self.policies.record_invalidation(stats_prefix(key) for key in keys)
         try:
-            keys = self.redis_client.keys(pattern)
+            deleted = self._invalidate('unlink', *keys, keys=keys)
+            self._publish_invalidation({'op': 'delete', 'keys': keys})
+            return deleted
+        except redis.RedisError as e:
+            self._record_error(e)
+            print(f"Cache delete_many error: {e}")
+            return 0
+
+    def invalidate_tags(self, *tags: str) -> int:
+        if not tags:
+            return 0
+        self.snapshot.discard_tags(tags)
+        try:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            keys = {
+                _decode_key(key)
+                for key in self._invalidate('eval', INVALIDATE_TAGS_SCRIPT, len(tag_keys), *tag_keys, tags=tags)
+            }
             if keys:
-                return self.redis_client.delete(*keys)
+                self.local_cache.delete(*keys)
+                self.snapshot.discard(keys)
+                self.policies.record_invalidation(stats_prefix(key) for key in keys)
+                self._publish_invalidation({'op': 'delete', 'keys': sorted(keys)})
+            return len(keys)
+        except redis.RedisError as e:
+            self._record_error(e)
+            print(f"Cache invalidate tags error: {e}")
             return 0
+
+    def _invalidate(self, command: str, *args: Any, keys: Iterable[str] = (), tags: Iterable[str] = (),
+                    floor: Any = None) -> Any:
+        # Runs a deleting command; with a snapshot configured, the shared
+        # invalidation history is updated in the same MULTI so no replica can
+        # restore in between.
+        if not self.snapshot.enabled:
+            return getattr(self.redis_client, command)(*args)
+        pipe = self.redis_client.pipeline()
+        getattr(pipe, command)(*args)
+        self.snapshot.record_invalidation(pipe, keys, tags, floor)
+        return pipe.execute()[0]
+
+    def _tag_key(self, tag: str) -> str:
+        return f"tag:{tag}"
+
+    def _record_error(self, error: Exception, key: str = None):
+        # Only connectivity problems count against the breaker; a bad payload
+        # or a command error says nothing about Redis' health.
+        cache_stats.incr(stats_prefix(key), 'errors')
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            self.breaker.record_failure()
+    
+    def delete_pattern(self, pattern: str) -> int:
+        
+        self.local_cache.delete_pattern(pattern)
+        self.snapshot.discard_pattern(pattern)
+        deleted = 0
+        try:
+            # Snapshots from before (and during) the scan are not trusted.
+            self.snapshot.record_invalidation(self.redis_client, floor='now')
+            deleted = self._unlink_matching(pattern)
+            self.snapshot.record_invalidation(self.redis_client, floor='now')
+            self._publish_invalidation({'op': 'pattern', 'pattern': pattern})
+            return deleted
         except redis.RedisError as e:
             print(f"Cache delete pattern error: {e}")
-            return 0
+            return deleted
+
+    def _unlink_matching(self, pattern: str) -> int:
+        deleted = 0
+        batch = []
+        for key in self.redis_client.scan_iter(match=pattern, count=self.scan_batch_size):
+            batch.append(key)
+            if len(batch) >= self.scan_batch_size:
+                deleted += self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += self.redis_client.unlink(*batch)
+        return deleted
+
+    def scan_keys(self, pattern: Optional[str] = None, cursor: int = 0, count: int = 100,
+                  max_calls: int = 10) -> tuple:
+        # One page of a SCAN walk. SCAN may return short or empty batches, so
+        # keep going (bounded) until the page is full or the walk wraps around.
+        # Without a pattern, keys in any cache namespace are listed.
+        keys = []
+        for _ in range(max_calls):
+            cursor, batch = self.redis_client.scan(cursor=cursor, match=pattern or '*', count=count)
+            keys.extend(key for key in map(_decode_key, batch) if pattern or key.startswith(CACHE_KEY_PREFIXES))
+            if cursor == 0 or len(keys) >= count:
+                break
+        return int(cursor), keys
+
+    def describe_keys(self, keys: list) -> list:
+        if not keys:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.ttl(key)
+            pipe.type(key)
+            pipe.memory_usage(key)
+        results = pipe.execute(raise_on_error=False)
+
+        described = []
+        for index, key in enumerate(keys):
+            ttl, key_type, memory = results[index * 3:index * 3 + 3]
+            described.append({
+                'key': key,
+                'ttl': ttl if isinstance(ttl, int) else None,
+                'type': _decode_key(key_type) if isinstance(key_type, (str, bytes)) else None,
+                'memory_bytes': memory if isinstance(memory, int) else None
+            })
+        return described
     
+    def memory_report(self, pattern: Optional[str] = None, sample: int = 1000, top: int = 10) -> dict:
+        # Samples up to `sample` keys with SCAN and sizes them with MEMORY USAGE,
+        # by default across every cache namespace (graphql:, entity:, ...).
+        # OBJECT FREQ only answers under an LFU maxmemory-policy; otherwise the
+        # hottest lists stay empty and lfu_enabled is False.
+        keys = []
+        for key in self.redis_client.scan_iter(match=pattern or '*', count=self.scan_batch_size):
+            if not pattern and not _decode_key(key).startswith(CACHE_KEY_PREFIXES):
+                continue
+            keys.append(key)
+            if len(keys) >= sample:
+                break
+
+        prefixes = {}
+        lfu_enabled = False
+        for start in range(0, len(keys), self.scan_batch_size):
+            batch = keys[start:start + self.scan_batch_size]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in batch:
+                pipe.memory_usage(key)
+                pipe.object('freq', key)
+            results = pipe.execute(raise_on_error=False)
+
+            for index, key in enumerate(batch):
+                memory, freq = results[index * 2:index * 2 + 2]
+                if not isinstance(memory, int):
+                    continue
+                freq = freq if isinstance(freq, int) else None
+                lfu_enabled = lfu_enabled or freq is not None
+                name = _decode_key(key)
+                entry = prefixes.setdefault(stats_prefix(name), {
+                    'keys': 0, 'bytes': 0, 'max_bytes': 0, 'biggest': [], 'hottest': []
+                })
+                entry['keys'] += 1
+                entry['bytes'] += memory
+                entry['max_bytes'] = max(entry['max_bytes'], memory)
+                entry['biggest'].append({'key': name, 'bytes': memory})
+                if freq is not None:
+                    entry['hottest'].append({'key': name, 'freq': freq, 'bytes': memory})
+
+        for entry in prefixes.values():
+            entry['avg_bytes'] = round(entry['bytes'] / entry['keys'], 1)
+            entry['biggest'] = sorted(entry['biggest'], key=lambda item: item['bytes'], reverse=True)[:top]
+            entry['hottest'] = sorted(entry['hottest'], key=lambda item: item['freq'], reverse=True)[:top]
+
+        return {
+            'pattern': pattern or list(CACHE_NAMESPACES),
+            'sampled': len(keys),
+            'complete': len(keys) < sample,
+            'dbsize': self.redis_client.dbsize(),
+            'lfu_enabled': lfu_enabled,
+            'max_value_bytes': self.max_value_bytes,
+            'prefixes': dict(sorted(prefixes.items(), key=lambda item: item[1]['bytes'], reverse=True))
+        }
+
     def clear_all(self) -> bool:
-      
+        # Removes the cache namespaces only (SCAN + UNLINK, not FLUSHDB), so
+        # analytics and the warmup history survive a clear. The snapshot
+        # deliberately survives too: save the hot set first and serve it back
+        # while the cache refills. Only a snapshot written just now is trusted
+        # afterwards; other replicas' older files are refused.
+        written_at = self.snapshot.written_at
+        flushed = self.snapshot.flush(self.redis_client)
+        fresh = flushed and self.snapshot.written_at != written_at
+        self.local_cache.clear()
         try:
-            return self.redis_client.flushdb()
+            self.snapshot.record_invalidation(self.redis_client, floor=self.snapshot.written_at if fresh else 'now')
+            for pattern in CACHE_NAMESPACES:
+                self._unlink_matching(pattern)
+            self.snapshot.reload()
+            self._publish_invalidation({'op': 'clear'})
+            return True
         except redis.RedisError as e:
             print(f"Cache clear error: {e}")
             return False
+
+    def _publish_invalidation(self, message: dict):
+        if not self.local_cache.enabled:
+            return
+        try:
+            message['origin'] = INSTANCE_ID
+            self.redis_client.publish(INVALIDATION_CHANNEL, json.dumps(message))
+        except redis.RedisError as e:
+            print(f"Cache invalidation publish error: {e}")
+
+    def apply_invalidation(self, message: dict):
+        if message.get('origin') == INSTANCE_ID:
+            return
+
+        op = message.get('op')
+        if op == 'delete':
+            self.local_cache.delete(*message.get('keys', []))
+            self.snapshot.discard(message.get('keys', []))
+            self.policies.record_invalidation(stats_prefix(key) for key in message.get('keys', []))
+        elif op == 'pattern':
+            self.local_cache.delete_pattern(message.get('pattern', '*'))
+            self.snapshot.discard_pattern(message.get('pattern', '*'))
+        else:
+            self.local_cache.clear()
+            self.snapshot.reload()
     
+    def acquire_lock(self, key: str, timeout: int) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            if self.redis_client.set(f"lock:{key}", token, nx=True, px=int(timeout * 1000)):
+                return token
+            return None
+        except redis.RedisError as e:
+            print(f"Cache lock error: {e}")
+            return token
+
+    def release_lock(self, key: str, token: str) -> bool:
+        try:
+            return bool(self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token))
+        except redis.RedisError as e:
+            print(f"Cache unlock error: {e}")
+            return False
+
+    def wait_for(self, key: str, timeout: float) -> Optional[Any]:
+        deadline = time.monotonic() + timeout
+        interval = 0.05
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            value = self.get(key)
+            if value is not None:
+                return value
+            try:
+                if not self.redis_client.exists(f"lock:{key}"):
+                    return self.get(key)
+            except redis.RedisError:
+                return None
+            interval = min(interval * 2, 0.5)
+        return None
+
+    def init_app(self, app):
+        # Rebuild the shared pool from the app's config (e.g. the testing DB).
+        old_pool = self.connection_pool
+        self.connection_pool = create_connection_pool(app.config)
+        self.redis_client = redis.Redis(connection_pool=self.connection_pool)
+        self.breaker.failure_threshold = app.config.get('REDIS_CIRCUIT_FAILURE_THRESHOLD', self.breaker.failure_threshold)
+        self.breaker.reset_timeout = app.config.get('REDIS_CIRCUIT_RESET_TIMEOUT', self.breaker.reset_timeout)
+        self.health_check_interval = app.config.get('REDIS_HEALTH_CHECK_INTERVAL', self.health_check_interval)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', self.default_ttl)
+        self.max_value_bytes = app.config.get('CACHE_MAX_VALUE_BYTES', self.max_value_bytes)
+        self.policies.configure(app.config)
+        self.snapshot.configure(app.config)
+        self.breaker.record_success()
+        if old_pool is not self.connection_pool:
+            old_pool.disconnect()
+
+    def is_available(self) -> bool:
+        # Hot-path health check: no network, just the breaker's cached state.
+        return self.breaker.allow_request()
+
     def is_connected(self) -> bool:
        
         try:
-            return self.redis_client.ping()
+            connected = bool(self.redis_client.ping())
         except Exception:
-            return False
+            connected = False
 
+        if connected:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return connected
 
-def cache_graphql_query(ttl: int = 300, key_prefix: str = "query"):
+
+def cache_graphql_query(ttl: Optional[int] = None, key_prefix: str = "query", stale_ttl: Optional[int] = None,
+                        ttl_jitter: float = 0.1, lock_timeout: int = 15, lock_wait: float = 10,
+                        tags: Iterable[str] = (), include_selection: bool = False,
+                        model: Optional[type] = None, entity: Optional[str] = None,
+                        entity_id: Optional[str] = None, entity_id_field: str = 'id'):
+    # ttl and stale_ttl default to the key prefix's entry in CACHE_POLICIES.
+    # With a model, cached payloads come back as read-only records shaped like
+    # that model instead of the plain dicts written by to_dict().
+    # A None result or a ContentNotFound is cached as a short-lived negative
+    # entry, as is an UpstreamError, whose fallback is served meanwhile.
+    # With an entity type, a list resolver caches only its ordered ids and the
+    # items go to the entity cache; entity_id names the argument that makes a
+    # single-item resolver read and write the entity entry directly.
+    list_entities = entity is not None and entity_id is None
 
     def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        loader = (lambda ids: load_rows(model, ids)) if model is not None and hasattr(model, '__mapper__') else None
+
+        def from_cache(value: Any) -> Any:
+            if isinstance(value, AbsentMarker):
+                cache_stats.incr(key_prefix, 'negative_hits')
+                return _resolve_absent(value)
+            if list_entities:
+                value = entity_cache.assemble(entity, value, entity_id_field, loader)
+                if value is None:
+                    return _UNRESOLVED
+            return hydrator_for(model)(value) if model is not None else value
+
+        def store(cache_key: str, result: Any, entry_ttl: int, entry_stale_ttl: int, entry_tags: list):
+            if list_entities:
+                ids = entity_cache.put_many(entity, _to_payload(result), entity_id_field)
+                if ids is None:
+                    return
+                result = ids
+            _store_result(cache, cache_key, result, entry_ttl, entry_stale_ttl, ttl_jitter, entry_tags)
+
+        def record_call(info: Any, arguments: dict):
+            # Warmup replays what real requests ask for; it never records itself.
+            if info is None or getattr(info, 'warmup', False) or include_selection:
+                return
+            parent_type = getattr(getattr(info, 'parent_type', None), 'name', None)
+            field_name = getattr(info, 'field_name', None) or func.__name__
+            warmup_recorder.record(key_prefix, parent_type, field_name, arguments)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            cache = RedisCache()
-            
-         
-            if not cache.is_connected():
-                print(f"Redis not available, executing {func.__name__} without cache")
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
                 return func(*args, **kwargs)
-            
-            
-            cache_key = cache._generate_cache_key(
-                f"{key_prefix}:{func.__name__}",
-                *args[1:],  
-                **kwargs
-            )
-            
+            bound.apply_defaults()
+            arguments = dict(list(bound.arguments.items())[2:])
+            info = args[1] if len(args) > 1 else kwargs.get('info')
+            if entity_id is not None:
+                cache_key = entity_key(entity, arguments[entity_id])
+            else:
+                cache_key = build_query_key(key_prefix, info, arguments, include_selection,
+                                            default_field=func.__name__)
+            record_call(info, arguments)
+
+            policy = cache_policies.get(key_prefix)
+            entry_ttl = ttl if ttl is not None else cache_policies.ttl_for(key_prefix)
+            entry_stale_ttl = stale_ttl if stale_ttl is not None else policy.stale_ttl
+
+            local_result = local_cache.get(cache_key) if policy.local else None
+            if local_result is not None:
+                result = from_cache(local_result)
+                if result is not _UNRESOLVED:
+                    cache_stats.incr(key_prefix, 'hits')
+                    cache_stats.incr(key_prefix, 'l1_hits')
+                    return result
          
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                print(f" Cache HIT for {func.__name__}")
-                return cached_result
-            
-            print(f" Cache MISS for {func.__name__}")
-            result = func(*args, **kwargs)
-            
-           
-            if result is not None:
+            if not cache.is_available():
+                cache_stats.incr(key_prefix, 'bypassed')
                 try:
-                  
-                    if isinstance(result, list) and len(result) > 0:
-                        if hasattr(result[0], 'to_dict'):
-                            cache_data = [item.to_dict() for item in result]
-                            cache.set(cache_key, cache_data, ttl)
-                  
-                    elif hasattr(result, 'to_dict'):
-                        cache_data = result.to_dict()
-                        cache.set(cache_key, cache_data, ttl)
-                   
-                    else:
-                        cache.set(cache_key, result, ttl)
-                except Exception as e:
-                    print(f"Cache serialization warning: {e}")
-            
+                    return func(*args, **kwargs)
+                except UpstreamError as e:
+                    return e.fallback
+
+            def compute(refreshing: bool = False):
+                started = time.perf_counter()
+                entry_tags = _resolve_tags(tags, arguments)
+                try:
+                    result = func(*args, **kwargs)
+                except ContentNotFound as e:
+                    cache.set(cache_key, AbsentMarker('missing', str(e)), policy.negative_ttl, tags=entry_tags)
+                    raise
+                except UpstreamError as e:
+                    # A failed refresh keeps serving the stale value instead.
+                    if not refreshing:
+                        cache.set(cache_key, AbsentMarker('error', str(e), e.fallback), policy.error_ttl,
+                                  tags=entry_tags)
+                    raise
+                finally:
+                    cache_stats.observe_recompute(key_prefix, time.perf_counter() - started)
+                if result is None:
+                    cache.set(cache_key, AbsentMarker('missing'), policy.negative_ttl, tags=entry_tags)
+                else:
+                    store(cache_key, result, entry_ttl, entry_stale_ttl, entry_tags)
+                return result
+
+            if entry_stale_ttl:
+                cached_result, remaining = cache.get_with_ttl(cache_key, entry_stale_ttl)
+                result = from_cache(cached_result) if cached_result is not None else _UNRESOLVED
+                if result is not _UNRESOLVED:
+                    cache_stats.incr(key_prefix, 'hits')
+                    stale = remaining is not None and remaining <= entry_stale_ttl
+                    if stale and not isinstance(cached_result, AbsentMarker):
+                        cache_stats.incr(key_prefix, 'stale')
+                        background_refresher.schedule(
+                            cache, cache_key, lambda: compute(refreshing=True), lock_timeout
+                        )
+                    return result
+            else:
+                cached_result = cache.get(cache_key)
+                result = from_cache(cached_result) if cached_result is not None else _UNRESOLVED
+                if result is not _UNRESOLVED:
+                    cache_stats.incr(key_prefix, 'hits')
+                    return result
             
-            return result
+            cache_stats.incr(key_prefix, 'misses')
+
+            def recompute():
+                # A previous leader in this process may have just filled the key.
+                local_result = local_cache.get(cache_key)
+                result = from_cache(local_result) if local_result is not None else _UNRESOLVED
+                if result is not _UNRESOLVED:
+                    return result
+
+                lock_token = cache.acquire_lock(cache_key, lock_timeout)
+                if lock_token is None:
+                    cached_result = cache.wait_for(cache_key, lock_wait)
+                    result = from_cache(cached_result) if cached_result is not None else _UNRESOLVED
+                    if result is not _UNRESOLVED:
+                        return result
+                    print(f"Timed out waiting for {func.__name__} on another replica, recomputing")
+
+                try:
+                    return compute()
+                finally:
+                    if lock_token is not None:
+                        cache.release_lock(cache_key, lock_token)
+
+            try:
+                return single_flight.do(cache_key, recompute)
+            except UpstreamError as e:
+                return e.fallback
         
+        if not include_selection:
+            cache_warmer.register(key_prefix, wrapper)
         return wrapper
     return decorator
 
 
+# A cached value that could not be turned back into a result (an id list whose
+# entities are gone); the caller treats it as a miss.
+_UNRESOLVED = object()
+
+
+class ContentNotFound(Exception):
+    # Raised by a resolver for content that does not exist; surfaces as a
+    # GraphQL error and is remembered as a negative cache entry.
+    pass
+
+
+class UpstreamError(Exception):
+    # Raised by a resolver when its backing service fails. The fallback is
+    # what the field resolves to until the short error TTL lapses.
+
+    def __init__(self, message: str = '', fallback: Any = None):
+        super().__init__(message)
+        self.fallback = fallback
+
+
+def _resolve_absent(marker: AbsentMarker) -> Any:
+    if marker.kind == 'error':
+        return marker.fallback
+    if marker.message:
+        raise ContentNotFound(marker.message)
+    return None
+
+
+def _generate_cache_key(prefix: str, *args, **kwargs) -> str:
+    key_data = json.dumps([args, kwargs], sort_keys=True, separators=(',', ':'), default=str)
+    return f"graphql:{prefix}:{hashlib.md5(key_data.encode()).hexdigest()}"
+
+
+def build_query_key(key_prefix: str, info: Any, arguments: dict,
+                    include_selection: bool = False, default_field: str = None) -> str:
+    # The key is derived from what identifies the result - parent type, field
+    # and normalized arguments - never from the info object itself.
+    parent_type = getattr(getattr(info, 'parent_type', None), 'name', None)
+    field_name = getattr(info, 'field_name', None) or default_field
+    selection = selection_signature(info) if include_selection else None
+    return _generate_cache_key(key_prefix, parent_type, field_name, arguments, selection)
+
+
+def selection_signature(info: Any) -> Optional[str]:
+    field_nodes = getattr(info, 'field_nodes', None)
+    if not field_nodes:
+        return None
+    fragments = getattr(info, 'fragments', None) or {}
+    fields = {}
+    for node in field_nodes:
+        _collect_selection(node.selection_set, fragments, fields)
+    return hashlib.md5(_format_selection(fields).encode()).hexdigest()
+
+
+def _collect_selection(selection_set: Any, fragments: dict, fields: dict):
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        kind = selection.kind
+        if kind == 'field':
+            children = fields.setdefault(selection.name.value, {})
+            _collect_selection(selection.selection_set, fragments, children)
+        elif kind == 'inline_fragment':
+            _collect_selection(selection.selection_set, fragments, fields)
+        elif kind == 'fragment_spread':
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                _collect_selection(fragment.selection_set, fragments, fields)
+
+
+def _format_selection(fields: dict) -> str:
+    return ','.join(
+        f"{name}{{{_format_selection(children)}}}" if children else name
+        for name, children in sorted(fields.items())
+    )
+
+
+def _jittered(ttl: int, jitter: float) -> int:
+    if not jitter:
+        return ttl
+    spread = ttl * jitter
+    return max(1, int(round(ttl + random.uniform(-spread, spread))))
+
+
+def _resolve_tags(tags: Iterable[str], arguments: dict) -> list:
+    # Tags are templates such as "article:{article_id}", filled in from the
+    # resolver's arguments (defaults included).
+    if not tags:
+        return []
+    try:
+        return [tag.format(**arguments) for tag in tags]
+    except (KeyError, IndexError, ValueError) as e:
+        print(f"Cache tag warning: {e}")
+        return []
+
+
+def _to_payload(result: Any) -> Any:
+    if isinstance(result, list) and len(result) > 0 and hasattr(result[0], 'to_dict'):
+        return [item.to_dict() for item in result]
+    if hasattr(result, 'to_dict'):
+        return result.to_dict()
+    return result
+
+
+def _store_result(cache: RedisCache, cache_key: str, result: Any, ttl: int,
+                  stale_ttl: int = 0, ttl_jitter: float = 0, tags: Iterable[str] = ()):
+    if result is None:
+        return
+    try:
+        cache_data = _to_payload(result)
+        fresh_ttl = _jittered(ttl, ttl_jitter)
+        cache.set(cache_key, cache_data, fresh_ttl + stale_ttl, local_ttl=fresh_ttl, tags=tags)
+    except Exception as e:
+        print(f"Cache serialization warning: {e}")
+
+
+class BackgroundRefresher:
+    # Recomputes stale entries on a bounded pool. A key is only queued once at a
+    # time, and the Redis lock makes sure a single replica does the refresh.
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='cache-refresh'
+        )
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, cache: RedisCache, cache_key: str, compute: Callable,
+                 lock_timeout: int = 15) -> bool:
+        with self._lock:
+            if cache_key in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(cache_key)
+
+        app = current_app._get_current_object() if has_app_context() else None
+        try:
+            self._executor.submit(self._refresh, app, cache, cache_key, compute, lock_timeout)
+        except RuntimeError as e:
+            print(f"Cache refresh scheduling error: {e}")
+            self._done(cache_key)
+            return False
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _refresh(self, app, cache: RedisCache, cache_key: str, compute: Callable,
+                 lock_timeout: int):
+        try:
+            lock_token = cache.acquire_lock(cache_key, lock_timeout)
+            if lock_token is None:
+                return
+            try:
+                if app is not None:
+                    with app.app_context():
+                        compute()
+                else:
+                    compute()
+            finally:
+                cache.release_lock(cache_key, lock_token)
+        except Exception as e:
+            print(f"Cache refresh error for {cache_key}: {e}")
+        finally:
+            self._done(cache_key)
+
+    def _done(self, cache_key: str):
+        with self._lock:
+            self._pending.discard(cache_key)
+
+
+background_refresher = BackgroundRefresher(max_workers=Config.CACHE_REFRESH_WORKERS)
+warmup_recorder = WarmupRecorder()
+
+
 cache_query = cache_graphql_query
 
 
-cache = RedisCache()
\ No newline at end of file
+class CacheInvalidationListener:
+    # Subscribes to the invalidation channel so every replica drops L1 entries
+    # that another replica deleted. The L1 is flushed whenever the subscription
+    # is (re)established because messages published while we were away are lost.
+
+    def __init__(self, cache: RedisCache):
+        self.cache = cache
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or not self.cache.local_cache.enabled:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='cache-invalidation-listener', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def handle_message(self, message: dict):
+        if message.get('type') != 'message':
+            return
+        try:
+            self.cache.apply_invalidation(json.loads(message['data']))
+        except (ValueError, TypeError) as e:
+            print(f"Cache invalidation message error: {e}")
+
+    def _run(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            pubsub = None
+            try:
+                pubsub = self.cache.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.cache.local_cache.clear()
+                backoff = 1
+
+                while not self._stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self.handle_message(message)
+            except redis.RedisError as e:
+                print(f"Cache invalidation listener error: {e}")
+                self.cache.local_cache.clear()
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+class HealthProber:
+    # Pings Redis off the request path so the breaker can open while Redis is
+    # down and close again once it recovers.
+
+    def __init__(self, cache: RedisCache):
+        self.cache = cache
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='redis-health-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.cache.health_check_interval):
+            self.cache.is_connected()
+
+
+cache = RedisCache()
+invalidation_listener = CacheInvalidationListener(cache)
+health_prober = HealthProber(cache)
+stats_flusher = StatsFlusher(cache_stats, lambda: cache.redis_client, Config.CACHE_STATS_FLUSH_INTERVAL)
+entity_cache = EntityCache(cache, cache_policies)
+cache_warmer = CacheWarmer(
+    cache, warmup_recorder,
+    max_workers=Config.CACHE_WARMUP_WORKERS,
+    limit=Config.CACHE_WARMUP_LIMIT,
+    rate=Config.CACHE_WARMUP_RATE,
+    throttled_prefixes=Config.CACHE_WARMUP_THROTTLED_PREFIXES
+)
+warmup_flusher = StatsFlusher(warmup_recorder, lambda: cache.redis_client, Config.CACHE_STATS_FLUSH_INTERVAL)
+snapshot_writer = StatsFlusher(cache.snapshot, lambda: cache.redis_client, Config.CACHE_SNAPSHOT_INTERVAL)
\ No newline at end of file
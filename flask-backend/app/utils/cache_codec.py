@@ -0,0 +1,178 @@
+import json
+import zlib
+from datetime import datetime, date
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+# Envelope header byte: 1 vv ccc pp
+#   bit 7      always set, so it can never be mistaken for the first byte of the
+#              plain json.dumps text written before this format existed
+#   bits 6-5   format version
+#   bits 4-2   codec
+#   bits 1-0   compression
+ENVELOPE_FLAG = 0x80
+FORMAT_VERSION = 1
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+# Not a serializer: marks a negative entry whose payload is an AbsentMarker.
+CODEC_ABSENT = 7
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZ4 = 2
+
+CODECS = {'json': CODEC_JSON, 'msgpack': CODEC_MSGPACK}
+COMPRESSIONS = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB, 'lz4': COMPRESSION_LZ4}
+
+
+class CacheDecodeError(ValueError):
+    pass
+
+
+class AbsentMarker:
+    # A cached "known absent" result: kind is 'missing' for content that does
+    # not exist and 'error' for an upstream failure. Distinct from any real
+    # value, including None and [].
+    __slots__ = ('kind', 'message', 'fallback')
+
+    def __init__(self, kind: str = 'missing', message: str = '', fallback: Any = None):
+        self.kind = kind
+        self.message = message
+        self.fallback = fallback
+
+    def to_dict(self) -> dict:
+        return {'kind': self.kind, 'message': self.message, 'fallback': self.fallback}
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, AbsentMarker) and other.to_dict() == self.to_dict()
+
+    def __repr__(self) -> str:
+        return f"<AbsentMarker {self.kind}>"
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return {
+            k: v for k, v in obj.__dict__.items()
+            if not k.startswith('_')
+        }
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def available_codec(name: str) -> int:
+    codec = CODECS.get(name, CODEC_JSON)
+    if codec == CODEC_MSGPACK and msgpack is None:
+        return CODEC_JSON
+    return codec
+
+
+def available_compression(name: str) -> int:
+    compression = COMPRESSIONS.get(name, COMPRESSION_ZLIB)
+    if compression == COMPRESSION_LZ4 and lz4_frame is None:
+        return COMPRESSION_ZLIB
+    return compression
+
+
+def dumps(value: Any, codec: int = CODEC_JSON) -> bytes:
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(value, default=_default, separators=(',', ':')).encode()
+
+
+def loads(data: bytes, codec: int = CODEC_JSON) -> Any:
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise CacheDecodeError("msgpack is not installed")
+        return msgpack.unpackb(data, raw=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def pack(payload: bytes, codec: int = CODEC_JSON, compression: int = COMPRESSION_ZLIB,
+         compress_threshold: int = 1024) -> bytes:
+    # Compression is only kept when the payload is large enough and actually shrinks.
+    used = COMPRESSION_NONE
+    if compression != COMPRESSION_NONE and len(payload) >= compress_threshold:
+        compressed = _compress(payload, compression)
+        if len(compressed) < len(payload):
+            payload, used = compressed, compression
+
+    header = ENVELOPE_FLAG | (FORMAT_VERSION << 5) | (codec << 2) | used
+    return bytes((header,)) + payload
+
+
+def encode_value(value: Any, codec: int = CODEC_JSON, compression: int = COMPRESSION_ZLIB,
+                 compress_threshold: int = 1024) -> bytes:
+    return pack(dumps(value, codec), codec, compression, compress_threshold)
+
+
+def encode_absent(marker: AbsentMarker) -> bytes:
+    header = ENVELOPE_FLAG | (FORMAT_VERSION << 5) | (CODEC_ABSENT << 2) | COMPRESSION_NONE
+    return bytes((header,)) + dumps(marker.to_dict())
+
+
+def decode_value(raw: Any) -> Any:
+    try:
+        if isinstance(raw, str):
+            return json.loads(raw)
+        if not raw or not raw[0] & ENVELOPE_FLAG:
+            return loads(raw)
+
+        header = raw[0]
+        version = (header >> 5) & 0x03
+        if version != FORMAT_VERSION:
+            raise CacheDecodeError(f"Unknown cache format version {version}")
+
+        codec = (header >> 2) & 0x07
+        payload = _decompress(raw[1:], header & 0x03)
+        if codec == CODEC_ABSENT:
+            return AbsentMarker(**loads(payload))
+        return loads(payload, codec)
+    except CacheDecodeError:
+        raise
+    except (ValueError, TypeError, zlib.error, RuntimeError) as e:
+        raise CacheDecodeError(str(e)) from e
+
+
+def _compress(payload: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_LZ4:
+        return lz4_frame.compress(payload)
+    return zlib.compress(payload, 1)
+
+
+def _decompress(payload: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_NONE:
+        return payload
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise CacheDecodeError("lz4 is not installed")
+        return lz4_frame.decompress(payload)
+    raise CacheDecodeError(f"Unknown compression {compression}")
@@ -0,0 +1,116 @@
+from datetime import datetime, date
+from typing import Any, Callable, Optional
+
+import sqlalchemy as sa
+
+
+class CachedRecord:
+    # Read-only stand-in for a model instance rebuilt from a cached payload. It
+    # carries the model's column attributes and nothing else, so it never
+    # touches the session or identity map.
+    __slots__ = ()
+    __model__ = None
+    __primary_key__ = ()
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def to_dict(self) -> dict:
+        return {
+            name: value.isoformat() if isinstance(value, (datetime, date)) else value
+            for name, value in ((name, getattr(self, name)) for name in self.__slots__)
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        return (
+            isinstance(other, CachedRecord)
+            and other.__model__ is self.__model__
+            and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.__model__, getattr(self, 'id', None)))
+
+    def __repr__(self) -> str:
+        return f"<Cached {self.__model__.__name__} {getattr(self, 'id', None)}>"
+
+
+def _parse_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _parse_date(value: Any) -> Any:
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _column_parser(column: sa.Column) -> Optional[Callable]:
+    # to_dict() writes dates as ISO strings; turn them back into the types the
+    # ORM would have returned so graphene serializes both paths identically.
+    if isinstance(column.type, sa.DateTime):
+        return _parse_datetime
+    if isinstance(column.type, sa.Date):
+        return _parse_date
+    return None
+
+
+class Hydrator:
+
+    def __init__(self, model: type):
+        self.model = model
+        mapper = sa.inspect(model)
+        self.primary_key = tuple(mapper.get_property_by_column(column).key for column in mapper.primary_key)
+        self.fields = tuple(prop.key for prop in mapper.column_attrs)
+        self.parsers = {
+            prop.key: parser for prop in mapper.column_attrs
+            if (parser := _column_parser(prop.columns[0])) is not None
+        }
+        self.record_class = type(
+            f"Cached{model.__name__}", (CachedRecord,),
+            {'__slots__': self.fields, '__model__': model, '__primary_key__': self.primary_key}
+        )
+
+    def __call__(self, payload: Any) -> Any:
+        if payload is None or isinstance(payload, (CachedRecord, self.model)):
+            return payload
+        if isinstance(payload, list):
+            return [self(item) for item in payload]
+
+        record = object.__new__(self.record_class)
+        for name in self.fields:
+            value = payload.get(name)
+            parser = self.parsers.get(name)
+            object.__setattr__(record, name, parser(value) if parser and value is not None else value)
+        return record
+
+
+_hydrators = {}
+
+
+def register_hydrator(model: type, hydrator: Optional[Callable] = None) -> Callable:
+    hydrator = hydrator or Hydrator(model)
+    _hydrators[model] = hydrator
+    return hydrator
+
+
+def hydrator_for(model: type) -> Callable:
+    hydrator = _hydrators.get(model)
+    if hydrator is None:
+        hydrator = register_hydrator(model)
+    return hydrator
+
+
+def is_cached_instance(root: Any, model: type) -> bool:
+    return isinstance(root, CachedRecord) and root.__model__ is model
+
+
+def primary_key_of(record: CachedRecord) -> Any:
+    # Same shape graphene-sqlalchemy's resolve_id gives a mapped instance.
+    keys = [getattr(record, name) for name in record.__primary_key__]
+    return str(tuple(keys)) if len(keys) > 1 else keys[0]
@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+
+def _setting(settings: Any, name: str, default: Any = None) -> Any:
+    if isinstance(settings, dict):
+        return settings.get(name, default)
+    return getattr(settings, name, default)
+
+
+class CachePolicy:
+
+    def __init__(self, prefix: str, ttl: int, stale_ttl: int = 0, compression: Optional[str] = None,
+                 local: bool = True, adaptive: bool = True, negative_ttl: int = 30, error_ttl: int = 10):
+        self.prefix = prefix
+        self.ttl = int(ttl)
+        self.stale_ttl = int(stale_ttl)
+        self.negative_ttl = int(negative_ttl)
+        self.error_ttl = int(error_ttl)
+        self.compression = compression
+        self.local = local
+        self.adaptive = adaptive
+
+    def to_dict(self) -> dict:
+        return {
+            'ttl': self.ttl,
+            'stale_ttl': self.stale_ttl,
+            'negative_ttl': self.negative_ttl,
+            'error_ttl': self.error_ttl,
+            'compression': self.compression,
+            'local': self.local,
+            'adaptive': self.adaptive
+        }
+
+
+class _ChangeRate:
+    # Exponentially weighted mean of the time between invalidations of a prefix.
+
+    def __init__(self, now: float):
+        self.last_change = now
+        self.interval = None
+        self.changes = 1
+
+    def observe(self, now: float, weight: float):
+        elapsed = now - self.last_change
+        self.interval = elapsed if self.interval is None else (
+            weight * elapsed + (1 - weight) * self.interval
+        )
+        self.last_change = now
+        self.changes += 1
+
+
+class CachePolicyRegistry:
+    # Per key-prefix TTL, stale window, compression and L1 eligibility, read
+    # from CACHE_POLICIES. In adaptive mode a prefix's TTL follows how often
+    # its entries are actually invalidated, within the configured bounds.
+
+    def __init__(self, settings: Any = None):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._rates = {}
+        self.configure(settings or {})
+
+    def configure(self, settings: Any):
+        self.default_ttl = int(_setting(settings, 'CACHE_DEFAULT_TTL', 300))
+        self.adaptive = bool(_setting(settings, 'CACHE_ADAPTIVE_TTL', False))
+        self.min_ttl = int(_setting(settings, 'CACHE_ADAPTIVE_MIN_TTL', 30))
+        self.max_ttl = int(_setting(settings, 'CACHE_ADAPTIVE_MAX_TTL', 3600))
+        self.factor = float(_setting(settings, 'CACHE_ADAPTIVE_FACTOR', 0.5))
+        self.weight = float(_setting(settings, 'CACHE_ADAPTIVE_WEIGHT', 0.3))
+        self.defaults = {
+            'ttl': self.default_ttl,
+            'negative_ttl': int(_setting(settings, 'CACHE_NEGATIVE_TTL', 30)),
+            'error_ttl': int(_setting(settings, 'CACHE_ERROR_TTL', 10))
+        }
+        self.policies = {
+            prefix: CachePolicy(prefix, **{**self.defaults, **options})
+            for prefix, options in (_setting(settings, 'CACHE_POLICIES') or {}).items()
+        }
+
+    def get(self, prefix: str) -> CachePolicy:
+        policy = self.policies.get(prefix)
+        if policy is None:
+            policy = CachePolicy(prefix, **self.defaults)
+        return policy
+
+    def ttl_for(self, prefix: str) -> int:
+        policy = self.get(prefix)
+        if not (self.adaptive and policy.adaptive):
+            return policy.ttl
+
+        now = time.monotonic()
+        with self._lock:
+            rate = self._rates.get(prefix)
+            last_change = rate.last_change if rate else self._started
+            interval = rate.interval if rate else None
+
+        quiet = now - last_change
+        if interval is None:
+            # Not enough changes seen to estimate a rate; only ever lengthen.
+            target = max(policy.ttl, quiet * self.factor)
+        else:
+            target = max(interval, quiet) * self.factor
+        return int(min(max(target, self.min_ttl), self.max_ttl))
+
+    def record_invalidation(self, prefixes: Iterable[str]):
+        now = time.monotonic()
+        with self._lock:
+            for prefix in set(prefixes):
+                rate = self._rates.get(prefix)
+                if rate is None:
+                    self._rates[prefix] = _ChangeRate(now)
+                else:
+                    rate.observe(now, self.weight)
+
+    def reset(self):
+        with self._lock:
+            self._rates.clear()
+            self._started = time.monotonic()
+
+    def describe(self) -> dict:
+        prefixes = sorted(set(self.policies) | set(self._rates))
+        with self._lock:
+            rates = {
+                prefix: (rate.changes, rate.interval) for prefix, rate in self._rates.items()
+            }
+        described = {}
+        for prefix in prefixes:
+            changes, interval = rates.get(prefix, (0, None))
+            described[prefix] = {
+                **self.get(prefix).to_dict(),
+                'effective_ttl': self.ttl_for(prefix),
+                'invalidations': changes,
+                'mean_change_interval': round(interval, 2) if interval is not None else None
+            }
+        return described
@@ -0,0 +1,326 @@
+import fnmatch
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+import redis
+
+
+SNAPSHOT_MAGIC = b'GQLSNAP1'
+# Magic, then the length of the JSON index that follows; values come after it.
+SNAPSHOT_HEADER = struct.Struct('>8sI')
+
+# Shared invalidation history: when each key / tag was last invalidated, and a
+# floor before which no snapshot is trusted (raised by a flush or a pattern
+# delete). Times are Redis server time, so replica clocks do not matter.
+HISTORY_KEY = 'cache:snapshot:invalidations'
+FLOOR_KEY = 'cache:snapshot:floor'
+# Invalidations are remembered this long; older snapshots are not trusted.
+HISTORY_SECONDS = 86400
+
+RECORD_INVALIDATION_SCRIPT = """
+local time = redis.call('time')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local history = tonumber(ARGV[1])
+for i = 3, #ARGV do
+    redis.call('zadd', KEYS[1], string.format('%.6f', now), ARGV[i])
+end
+redis.call('zremrangebyscore', KEYS[1], '-inf', string.format('%.6f', now - history))
+redis.call('expire', KEYS[1], history)
+if ARGV[2] ~= '' then
+    local floor = now
+    if ARGV[2] ~= 'now' then
+        floor = tonumber(ARGV[2])
+    end
+    redis.call('set', KEYS[2], string.format('%.6f', floor), 'ex', history)
+end
+return 1
+"""
+
+CHECK_CURRENT_SCRIPT = """
+local time = redis.call('time')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local created = tonumber(ARGV[1])
+if created < now - tonumber(ARGV[2]) then
+    return 0
+end
+local floor = redis.call('get', KEYS[2])
+if floor and created < tonumber(floor) then
+    return 0
+end
+for i = 3, #ARGV do
+    local score = redis.call('zscore', KEYS[1], ARGV[i])
+    if score and tonumber(score) >= created then
+        return 0
+    end
+end
+return 1
+"""
+
+
+def _setting(settings: Any, name: str, default: Any = None) -> Any:
+    if isinstance(settings, dict):
+        return settings.get(name, default)
+    return getattr(settings, name, default)
+
+
+def _server_time(redis_client: redis.Redis) -> float:
+    seconds, microseconds = redis_client.time()
+    return float(seconds) + float(microseconds) / 1000000
+
+
+def _history_members(keys: Iterable[str] = (), tags: Iterable[str] = ()) -> list:
+    return [f"key:{key}" for key in keys] + [f"tag:{tag}" for tag in tags]
+
+
+class CacheSnapshot:
+    # Periodic copy of the hottest cache entries to a local file, so a
+    # restarted replica or a flushed Redis does not send every request to
+    # WordPress at once. Values are the exact bytes Redis holds, so the usual
+    # codec decodes them; the index records each entry's absolute expiry and
+    # tags. The file is memory-mapped on first use and an entry is handed out
+    # at most once, after which Redis owns it again.
+    #
+    # Only keys whose tags this process knows (it wrote them) are saved, since
+    # an entry restored without its tags would miss later invalidations.
+    # Invalidations are recorded in Redis (see HISTORY_KEY) and an entry is
+    # only restored if none of its key or tags was invalidated after the
+    # snapshot was taken, which covers other replicas and time spent down.
+    # Local discards are also kept as tombstones until the next flush, so
+    # reloading the file does not bring them back.
+
+    def __init__(self, hot_keys: Callable[[int], list], path: str = '', max_entries: int = 500,
+                 max_bytes: int = 16 * 1024 * 1024):
+        self.hot_keys = hot_keys
+        self._lock = threading.Lock()
+        self.configure({'CACHE_SNAPSHOT_PATH': path, 'CACHE_SNAPSHOT_MAX_ENTRIES': max_entries,
+                        'CACHE_SNAPSHOT_MAX_BYTES': max_bytes})
+
+    def configure(self, settings: Any):
+        with self._lock:
+            self.path = _setting(settings, 'CACHE_SNAPSHOT_PATH') or ''
+            self.max_entries = int(_setting(settings, 'CACHE_SNAPSHOT_MAX_ENTRIES') or 500)
+            self.max_bytes = int(_setting(settings, 'CACHE_SNAPSHOT_MAX_BYTES') or 16 * 1024 * 1024)
+            self._tags = OrderedDict()
+            self._tombstones = set()
+            self.written_at = None
+            self._reset()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def note_write(self, key: str, tags: Optional[Iterable[str]]):
+        # Called for every write: remembers the key's tags and retires any
+        # snapshot copy, which is now older than what Redis holds.
+        if not self.path:
+            return
+        with self._lock:
+            self._tags[key] = tuple(tags or ())
+            self._tags.move_to_end(key)
+            while len(self._tags) > self.max_entries * 4:
+                self._tags.popitem(last=False)
+            self._ensure_loaded()
+            self._drop(key)
+
+    def take(self, key: str) -> Optional[tuple]:
+        # (stored bytes, remaining TTL in seconds, tags), or None.
+        entry = self._take(key)
+        return entry[:3] if entry is not None else None
+
+    def take_current(self, key: str, redis_client: redis.Redis) -> Optional[tuple]:
+        # Like take, but only if the shared history has no later invalidation
+        # of the key or its tags.
+        entry = self._take(key)
+        if entry is None:
+            return None
+        value, remaining, tags, created = entry
+        if created is None or not redis_client.eval(
+            CHECK_CURRENT_SCRIPT, 2, HISTORY_KEY, FLOOR_KEY,
+            repr(created), HISTORY_SECONDS, *_history_members([key], tags)
+        ):
+            return None
+        return value, remaining, tags
+
+    def record_invalidation(self, redis_client: Any, keys: Iterable[str] = (), tags: Iterable[str] = (),
+                            floor: Any = None):
+        # Queues the history update on redis_client, which may be a pipeline.
+        # floor is a server timestamp, 'now', or None to leave it alone.
+        if not self.path:
+            return
+        if floor is None:
+            floor = ''
+        elif floor != 'now':
+            floor = repr(float(floor))
+        redis_client.eval(RECORD_INVALIDATION_SCRIPT, 2, HISTORY_KEY, FLOOR_KEY, HISTORY_SECONDS, floor,
+                          *_history_members(keys, tags))
+
+    def discard(self, keys: Iterable[str]):
+        if not self.path:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            for key in keys:
+                self._drop(key)
+
+    def discard_tags(self, tags: Iterable[str]):
+        if not self.path:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def discard_pattern(self, pattern: str):
+        if not self.path:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            for key in [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]:
+                self._drop(key)
+
+    def reload(self):
+        # Forget what was loaded; the file is mapped again on next use.
+        with self._lock:
+            self._reset()
+
+    def flush(self, redis_client: redis.Redis) -> bool:
+        # Writes a fresh snapshot; StatsFlusher calls this on its interval.
+        if not self.path:
+            return True
+        with self._lock:
+            keys = [key for key in self.hot_keys(self.max_entries * 2) if key in self._tags]
+            tags = {key: self._tags[key] for key in keys[:self.max_entries]}
+            tombstones = set(self._tombstones)
+        if not tags:
+            return True
+
+        try:
+            # Taken before reading, so an invalidation racing the reads is
+            # newer than the snapshot and vetoes the entry.
+            created = _server_time(redis_client)
+            pipe = redis_client.pipeline(transaction=False)
+            for key in tags:
+                pipe.get(key)
+                pipe.pttl(key)
+            results = pipe.execute()
+        except redis.RedisError as e:
+            print(f"Cache snapshot error: {e}")
+            return False
+
+        now = time.time()
+        entries = []
+        chunks = []
+        offset = 0
+        for index, key in enumerate(tags):
+            value, pttl = results[index * 2:index * 2 + 2]
+            if not value or not pttl or pttl <= 0:
+                continue
+            if offset + len(value) > self.max_bytes:
+                break
+            entries.append([key, offset, len(value), round(now + pttl / 1000, 3), list(tags[key])])
+            chunks.append(value)
+            offset += len(value)
+
+        index = json.dumps({'created': created, 'entries': entries}, separators=(',', ':')).encode()
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as snapshot_file:
+                snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(index)))
+                snapshot_file.write(index)
+                for chunk in chunks:
+                    snapshot_file.write(chunk)
+            # An mmap of the previous file stays valid after the rename.
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Cache snapshot error: {e}")
+            return False
+        with self._lock:
+            # Discards older than the new file no longer apply to it.
+            self._tombstones -= tombstones
+            self.written_at = created
+        return True
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': bool(self.path),
+                'path': self.path or None,
+                'loaded': self._loaded,
+                'entries': len(self._entries),
+                'created': self._created
+            }
+
+    def _reset(self):
+        self._entries = {}
+        self._by_tag = {}
+        self._loaded = False
+        self._created = None
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+        self._map = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, 'rb') as snapshot_file:
+                snapshot_map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # No snapshot yet, or an empty file.
+            return
+
+        try:
+            magic, index_length = SNAPSHOT_HEADER.unpack_from(snapshot_map, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("not a cache snapshot")
+            start = SNAPSHOT_HEADER.size
+            index = json.loads(snapshot_map[start:start + index_length])
+        except (struct.error, ValueError) as e:
+            print(f"Cache snapshot load error: {e}")
+            snapshot_map.close()
+            return
+
+        base = SNAPSHOT_HEADER.size + index_length
+        now = time.time()
+        for key, offset, length, expires_at, tags in index.get('entries', ()):
+            if expires_at <= now or key in self._tombstones or base + offset + length > len(snapshot_map):
+                continue
+            self._entries[key] = (base + offset, length, expires_at, tuple(tags))
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+        self._created = index.get('created')
+        self._map = snapshot_map
+
+    def _take(self, key: str) -> Optional[tuple]:
+        if not self.path:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._drop(key)
+            if entry is None:
+                return None
+            offset, length, expires_at, tags = entry
+            remaining = int(expires_at - time.time())
+            if remaining <= 0:
+                return None
+            return bytes(self._map[offset:offset + length]), remaining, tags, self._created
+
+    def _drop(self, key: str) -> Optional[tuple]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._tombstones.add(key)
+            for tag in entry[3]:
+                keys = self._by_tag.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_tag[tag]
+        return entry
@@ -0,0 +1,182 @@
+import threading
+from collections import Counter, defaultdict
+from typing import Optional
+
+import redis
+
+
+STATS_KEY_PREFIX = 'cache:stats'
+STATS_PREFIXES_KEY = 'cache:stats:prefixes'
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+COUNTERS = (
+    'hits', 'l1_hits', 'misses', 'stale', 'negative_hits', 'snapshot_hits', 'bypassed', 'errors', 'oversized',
+    'bytes_read', 'bytes_written', 'recomputes', 'recompute_ms'
+)
+
+
+def key_prefix(cache_key: str) -> str:
+    # Keys look like graphql:<prefix>:<digest> or entity:<type>:<id>; anything
+    # else is grouped together.
+    parts = cache_key.split(':') if isinstance(cache_key, str) else []
+    if len(parts) >= 3 and parts[0] == 'graphql':
+        return parts[1]
+    if len(parts) >= 3 and parts[0] == 'entity':
+        return f"entity:{parts[1]}"
+    return 'other'
+
+
+def _bucket_field(elapsed_ms: float) -> str:
+    for bound in LATENCY_BUCKETS_MS:
+        if elapsed_ms <= bound:
+            return f"latency_le_{bound}"
+    return 'latency_le_inf'
+
+
+def _histogram_fields() -> list:
+    return [f"latency_le_{bound}" for bound in LATENCY_BUCKETS_MS] + ['latency_le_inf']
+
+
+class CacheStats:
+    # Per key-prefix counters kept in-process. Increments since the last flush
+    # are also buffered separately so flush() can add them to the Redis hashes
+    # shared by every replica.
+
+    def __init__(self):
+        self._totals = defaultdict(Counter)
+        self._pending = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def incr(self, prefix: str, name: str, amount: int = 1):
+        if not amount:
+            return
+        with self._lock:
+            self._totals[prefix][name] += amount
+            self._pending[prefix][name] += amount
+
+    def observe_recompute(self, prefix: str, seconds: float):
+        elapsed_ms = seconds * 1000
+        bucket = _bucket_field(elapsed_ms)
+        with self._lock:
+            for counters in (self._totals[prefix], self._pending[prefix]):
+                counters['recomputes'] += 1
+                counters['recompute_ms'] += int(round(elapsed_ms))
+                counters[bucket] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {prefix: summarize(counters) for prefix, counters in self._totals.items()}
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._pending.clear()
+
+    def flush(self, redis_client: redis.Redis) -> bool:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+        if not pending:
+            return True
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for prefix, counters in pending.items():
+                pipe.sadd(STATS_PREFIXES_KEY, prefix)
+                for name, amount in counters.items():
+                    pipe.hincrby(f"{STATS_KEY_PREFIX}:{prefix}", name, amount)
+            pipe.execute()
+            return True
+        except redis.RedisError as e:
+            print(f"Cache stats flush error: {e}")
+            with self._lock:
+                for prefix, counters in pending.items():
+                    self._pending[prefix].update(counters)
+            return False
+
+    def cluster_snapshot(self, redis_client: redis.Redis) -> Optional[dict]:
+        try:
+            prefixes = sorted(_decode(prefix) for prefix in redis_client.smembers(STATS_PREFIXES_KEY))
+            pipe = redis_client.pipeline(transaction=False)
+            for prefix in prefixes:
+                pipe.hgetall(f"{STATS_KEY_PREFIX}:{prefix}")
+            results = pipe.execute()
+        except redis.RedisError as e:
+            print(f"Cache stats read error: {e}")
+            return None
+
+        return {
+            prefix: summarize(Counter({_decode(k): int(v) for k, v in raw.items()}))
+            for prefix, raw in zip(prefixes, results)
+        }
+
+    def reset_cluster(self, redis_client: redis.Redis):
+        prefixes = redis_client.smembers(STATS_PREFIXES_KEY)
+        keys = [f"{STATS_KEY_PREFIX}:{_decode(prefix)}" for prefix in prefixes]
+        redis_client.delete(STATS_PREFIXES_KEY, *keys)
+
+
+def summarize(counters: Counter) -> dict:
+    lookups = counters['hits'] + counters['misses']
+    histogram = {field: counters[field] for field in _histogram_fields()}
+    summary = {name: counters[name] for name in COUNTERS}
+    summary.update({
+        'hit_rate': round(counters['hits'] / lookups * 100, 2) if lookups else 0.0,
+        'avg_recompute_ms': (
+            round(counters['recompute_ms'] / counters['recomputes'], 2)
+            if counters['recomputes'] else None
+        ),
+        'recompute_p50_ms': _percentile(histogram, 0.5),
+        'recompute_p95_ms': _percentile(histogram, 0.95),
+        'recompute_histogram': histogram
+    })
+    return summary
+
+
+def _percentile(histogram: dict, quantile: float) -> Optional[float]:
+    # Upper bound of the bucket containing the quantile; None when there is no data.
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = total * quantile
+    seen = 0
+    for bound, field in zip(LATENCY_BUCKETS_MS + (None,), _histogram_fields()):
+        seen += histogram[field]
+        if seen >= threshold:
+            return bound
+    return None
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class StatsFlusher:
+
+    def __init__(self, stats: CacheStats, redis_client_getter, interval: float = 10):
+        self.stats = stats
+        self.redis_client_getter = redis_client_getter
+        self.interval = interval
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-stats-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.stats.flush(self.redis_client_getter())
+
+
+cache_stats = CacheStats()
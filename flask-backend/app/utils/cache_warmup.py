@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Optional
+
+import redis
+
+
+WARMUP_KEY = 'cache:warmup:calls'
+
+
+class WarmupInfo:
+    # Just enough of graphene's ResolveInfo for cache_graphql_query to build the
+    # same key a real request would.
+
+    warmup = True
+
+    class _ParentType:
+        def __init__(self, name: Optional[str]):
+            self.name = name
+
+    def __init__(self, parent_type: Optional[str], field_name: str, context: dict):
+        self.parent_type = self._ParentType(parent_type)
+        self.field_name = field_name
+        self.context = context
+        self.field_nodes = None
+        self.fragments = None
+
+
+class WarmupRecorder:
+    # Counts (resolver, arguments) calls in-process; flush() folds them into a
+    # sorted set shared by every replica so warmup replays what traffic asks for.
+
+    def __init__(self, max_pending: int = 10000, tracked: int = 1000):
+        self.max_pending = max_pending
+        self.tracked = tracked
+        self._pending = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, key_prefix: str, parent_type: Optional[str], field_name: str, arguments: dict):
+        try:
+            member = json.dumps(
+                {'p': key_prefix, 't': parent_type, 'f': field_name, 'a': arguments},
+                sort_keys=True, separators=(',', ':')
+            )
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            if member in self._pending or len(self._pending) < self.max_pending:
+                self._pending[member] += 1
+
+    def flush(self, redis_client: redis.Redis) -> bool:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return True
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for member, count in pending.items():
+                pipe.zincrby(WARMUP_KEY, count, member)
+            pipe.zremrangebyrank(WARMUP_KEY, 0, -(self.tracked + 1))
+            pipe.execute()
+            return True
+        except redis.RedisError as e:
+            print(f"Cache warmup record error: {e}")
+            return False
+
+    def top(self, redis_client: redis.Redis, limit: int) -> list:
+        try:
+            rows = redis_client.zrevrange(WARMUP_KEY, 0, limit - 1, withscores=True)
+        except redis.RedisError as e:
+            print(f"Cache warmup read error: {e}")
+            return []
+        entries = []
+        for member, score in rows:
+            try:
+                entry = json.loads(member)
+            except ValueError:
+                continue
+            entry['score'] = score
+            entries.append(entry)
+        return entries
+
+
+class RateLimiter:
+    # Token bucket shared by the warmup workers.
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class CacheWarmer:
+    # Replays the most requested resolver calls on a bounded pool. Resolvers
+    # register themselves through cache_graphql_query; entries for key prefixes
+    # listed in throttled_prefixes (the WordPress ones) share a rate limit.
+
+    def __init__(self, cache: Any, recorder: WarmupRecorder, max_workers: int = 8,
+                 limit: int = 200, rate: float = 10, throttled_prefixes: Iterable[str] = ()):
+        self.cache = cache
+        self.recorder = recorder
+        self.max_workers = max_workers
+        self.limit = limit
+        self.limiter = RateLimiter(rate, burst=max_workers)
+        self.throttled_prefixes = set(throttled_prefixes)
+        self._resolvers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {'state': 'idle'}
+        # Entries handed to a run that is already going; see enqueue.
+        self._accepting = False
+        self._queued = []
+
+    def register(self, key_prefix: str, resolver: Callable):
+        self._resolvers[key_prefix] = resolver
+
+    def configure(self, settings: Any):
+        self.max_workers = settings.get('CACHE_WARMUP_WORKERS', self.max_workers)
+        self.limit = settings.get('CACHE_WARMUP_LIMIT', self.limit)
+        self.limiter = RateLimiter(settings.get('CACHE_WARMUP_RATE', self.limiter.rate), burst=self.max_workers)
+        self.throttled_prefixes = set(settings.get('CACHE_WARMUP_THROTTLED_PREFIXES', self.throttled_prefixes))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> dict:
+        with self._lock:
+            status = dict(self._status)
+        if status.get('started_at'):
+            end = status.get('finished_at') or time.time()
+            status['elapsed'] = round(end - status['started_at'], 3)
+        return status
+
+    def snapshot(self, limit: Optional[int] = None) -> list:
+        self.recorder.flush(self.cache.redis_client)
+        return self.recorder.top(self.cache.redis_client, limit or self.limit)
+
+    def start(self, app, trigger: str = 'manual', entries: Optional[list] = None,
+              limit: Optional[int] = None) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            self._launch(app, trigger, entries, limit)
+        return True
+
+    def enqueue(self, app, entries: list, trigger: str = 'manual') -> bool:
+        # Like start with explicit entries, but a run already going picks them
+        # up when its current batch is done instead of them being dropped.
+        while True:
+            with self._lock:
+                if self._accepting:
+                    self._queued.extend(entries)
+                    return True
+                finishing = self._thread if self.running else None
+                if finishing is None:
+                    self._launch(app, trigger, entries, None)
+                    return True
+            finishing.join()
+
+    def _launch(self, app, trigger: str, entries: Optional[list], limit: Optional[int]):
+        # Called with the lock held.
+        self._accepting = True
+        self._status = {'state': 'starting', 'trigger': trigger}
+        self._thread = threading.Thread(
+            target=self.run, args=(app, trigger, entries, limit),
+            name='cache-warmup', daemon=True
+        )
+        self._thread.start()
+
+    def run(self, app, trigger: str = 'manual', entries: Optional[list] = None,
+            limit: Optional[int] = None) -> dict:
+        if entries is None:
+            entries = self.recorder.top(self.cache.redis_client, limit or self.limit)
+        entries = [entry for entry in entries if entry.get('p') in self._resolvers]
+        context = {'WORDPRESS_GRAPHQL_URL': app.config.get('WORDPRESS_GRAPHQL_URL')}
+
+        with self._lock:
+            self._accepting = True
+            self._status = {
+                'state': 'running', 'trigger': trigger, 'started_at': time.time(),
+                'finished_at': None, 'total': len(entries), 'completed': 0, 'failed': 0
+            }
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cache-warmup') as pool:
+            while True:
+                wait([pool.submit(self._replay, app, entry, context) for entry in entries])
+                with self._lock:
+                    entries = [entry for entry in self._queued if entry.get('p') in self._resolvers]
+                    self._queued = []
+                    if not entries:
+                        self._accepting = False
+                        self._status['state'] = 'done'
+                        self._status['finished_at'] = time.time()
+                        break
+                    self._status['total'] += len(entries)
+        return self.status()
+
+    def _replay(self, app, entry: dict, context: dict):
+        if entry['p'] in self.throttled_prefixes:
+            self.limiter.acquire()
+        info = WarmupInfo(entry.get('t'), entry.get('f'), context)
+        try:
+            with app.app_context():
+                self._resolvers[entry['p']](None, info, **(entry.get('a') or {}))
+            outcome = 'completed'
+        except Exception as e:
+            print(f"Cache warmup error for {entry['p']}: {e}")
+            outcome = 'failed'
+        with self._lock:
+            self._status[outcome] += 1
@@ -0,0 +1,76 @@
+from typing import Any, Callable, Iterable, Optional
+
+import sqlalchemy as sa
+
+from app.utils.cache_codec import AbsentMarker
+
+
+ENTITY_PREFIX = 'entity'
+
+
+def entity_key(entity_type: str, entity_id: Any) -> str:
+    return f"{ENTITY_PREFIX}:{entity_type}:{entity_id}"
+
+
+def entity_tag(entity_type: str, entity_id: Any) -> str:
+    # Same tag the resolvers and mutations already use for a single item,
+    # e.g. "article:42", so one invalidation drops the entity everywhere.
+    return f"{entity_type}:{entity_id}"
+
+
+def load_rows(model: type, ids: list) -> list:
+    primary_key = sa.inspect(model).primary_key[0]
+    return [row.to_dict() for row in model.query.filter(primary_key.in_(ids)).all()]
+
+
+class EntityCache:
+    # Normalized layer: every entity is stored once under entity:<type>:<id>
+    # and list queries keep only their ordered ids, so an edit rewrites a
+    # single entry and single-item lookups are primed by lists.
+
+    def __init__(self, cache: Any, policies: Any):
+        self.cache = cache
+        self.policies = policies
+
+    def ttl(self, entity_type: str) -> int:
+        return self.policies.ttl_for(f"{ENTITY_PREFIX}:{entity_type}")
+
+    def get_many(self, entity_type: str, ids: Iterable[Any]) -> dict:
+        keys = {entity_key(entity_type, entity_id): str(entity_id) for entity_id in ids}
+        return {
+            keys[key]: value for key, value in self.cache.get_many(keys).items()
+            if not isinstance(value, AbsentMarker)
+        }
+
+    def put_many(self, entity_type: str, payloads: list, id_field: str = 'id',
+                 tags: Iterable[str] = ()) -> Optional[list]:
+        # Returns the ordered ids, or None when an item has no id to key it by.
+        ids = [payload.get(id_field) if isinstance(payload, dict) else None for payload in payloads]
+        if any(entity_id is None for entity_id in ids):
+            return None
+        mapping = {entity_key(entity_type, entity_id): payload for entity_id, payload in zip(ids, payloads)}
+        entry_tags = {
+            entity_key(entity_type, entity_id): [entity_tag(entity_type, entity_id), *tags]
+            for entity_id in ids
+        }
+        if mapping:
+            self.cache.set_many(mapping, self.ttl(entity_type), tags=entry_tags)
+        return ids
+
+    def put(self, entity_type: str, payload: dict, id_field: str = 'id') -> bool:
+        return self.put_many(entity_type, [payload], id_field) is not None
+
+    def assemble(self, entity_type: str, ids: list, id_field: str = 'id',
+                 loader: Optional[Callable] = None) -> Optional[list]:
+        # Rebuilds a list from its ids with one multi-get. Entities that have
+        # expired are reloaded through `loader` if there is one; otherwise the
+        # list counts as a miss and None is returned.
+        found = self.get_many(entity_type, ids)
+        missing = [entity_id for entity_id in ids if str(entity_id) not in found]
+        if missing and loader is not None:
+            payloads = loader(missing)
+            self.put_many(entity_type, payloads, id_field)
+            found.update((str(payload.get(id_field)), payload) for payload in payloads)
+        if any(str(entity_id) not in found for entity_id in ids):
+            return None
+        return [found[str(entity_id)] for entity_id in ids]
@@ -0,0 +1,196 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import Optional
+
+from flask import Response, current_app, g, request
+from graphql import parse, print_ast, GraphQLError
+from graphql.language import OperationDefinitionNode, FieldNode, OperationType
+from graphql.utilities import value_from_ast_untyped
+
+from app.utils.cache import cache, cache_policies, _generate_cache_key
+from app.utils.cache_stats import cache_stats
+
+
+RESPONSE_KEY_PREFIX = 'response'
+
+# Root fields that may be served from the response cache, with the tags a
+# mutation invalidates when the content behind them changes. These mirror the
+# tags on the resolvers in app/graphql/resolvers.py; a query touching any
+# other root field is never cached because nothing would invalidate it.
+ROOT_FIELD_TAGS = {
+    'wordpressPosts': ('wp_posts', 'wp_posts:content'),
+    'wordpressPost': ('wp_post:{postId}',),
+    'articles': ('articles', 'articles:content'),
+    'article': ('article:{articleId}',),
+    'products': ('products', 'products:content'),
+    'product': ('product:{productId}',),
+    'teamMembers': ('team',),
+    '__typename': (),
+}
+
+
+class CachePlan:
+
+    def __init__(self, key: str, tags: tuple):
+        self.key = key
+        self.tags = tags
+
+
+@lru_cache(maxsize=512)
+def _parse_document(query: str):
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return None, None
+    return document, print_ast(document)
+
+
+def _select_operation(document, operation_name: Optional[str]):
+    operations = [
+        definition for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+    ]
+    if operation_name:
+        for operation in operations:
+            if operation.name and operation.name.value == operation_name:
+                return operation
+        return None
+    return operations[0] if len(operations) == 1 else None
+
+
+def _root_field_tags(operation, variables: dict) -> Optional[list]:
+    tags = []
+    for selection in operation.selection_set.selections:
+        # Fragments at the root would need resolving against the schema; skip them.
+        if not isinstance(selection, FieldNode):
+            return None
+        templates = ROOT_FIELD_TAGS.get(selection.name.value)
+        if templates is None:
+            return None
+        arguments = {
+            argument.name.value: value_from_ast_untyped(argument.value, variables)
+            for argument in selection.arguments or ()
+        }
+        try:
+            tags.extend(template.format(**arguments) for template in templates)
+        except KeyError:
+            return None
+    return sorted(set(tags))
+
+
+def auth_scope() -> str:
+    from app.utils.auth import JWTAuth
+
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header.split(' ')[1] if ' ' in auth_header else ''
+    if token:
+        payload = JWTAuth.decode_token(token)
+        if 'error' not in payload and payload.get('user_id') is not None:
+            return f"user:{payload['user_id']}"
+    return 'anonymous'
+
+
+def request_params() -> Optional[tuple]:
+    if request.method == 'GET':
+        # A browser asking for HTML gets GraphiQL, not a result.
+        if request.accept_mimetypes.accept_html and 'raw' not in request.args:
+            return None
+        data = request.args
+        variables = data.get('variables')
+        if isinstance(variables, str):
+            try:
+                variables = json.loads(variables)
+            except ValueError:
+                return None
+    elif request.method == 'POST' and request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return None
+        variables = data.get('variables')
+    else:
+        return None
+
+    query = data.get('query')
+    if not isinstance(query, str):
+        return None
+    return query, data.get('operationName'), variables or {}
+
+
+def build_plan() -> Optional[CachePlan]:
+    params = request_params()
+    if params is None:
+        return None
+    query, operation_name, variables = params
+    if not isinstance(variables, dict):
+        return None
+
+    scope = auth_scope()
+    if scope != 'anonymous':
+        return None
+
+    document, normalized = _parse_document(query)
+    if document is None:
+        return None
+    operation = _select_operation(document, operation_name)
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+
+    tags = _root_field_tags(operation, variables)
+    if tags is None:
+        return None
+
+    document_hash = hashlib.sha256(normalized.encode()).hexdigest()
+    key = _generate_cache_key(
+        RESPONSE_KEY_PREFIX, document_hash,
+        operation_name=operation_name, variables=variables, scope=scope
+    )
+    return CachePlan(key, tuple(tags))
+
+
+def serve_cached_response():
+    if not current_app.config.get('GRAPHQL_RESPONSE_CACHE'):
+        return None
+
+    plan = build_plan()
+    if plan is None:
+        return None
+    if not cache.is_available():
+        cache_stats.incr(RESPONSE_KEY_PREFIX, 'bypassed')
+        return None
+
+    body = cache.get_raw(plan.key)
+    if body is not None:
+        cache_stats.incr(RESPONSE_KEY_PREFIX, 'hits')
+        response = Response(body, status=200, mimetype='application/json')
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    cache_stats.incr(RESPONSE_KEY_PREFIX, 'misses')
+    g.response_cache_plan = plan
+    return None
+
+
+def store_response(response: Response) -> Response:
+    plan = g.pop('response_cache_plan', None)
+    if plan is None:
+        return response
+
+    response.headers['X-Cache'] = 'MISS'
+    if response.status_code != 200 or response.mimetype != 'application/json':
+        return response
+
+    body = response.get_data()
+    try:
+        # Partial results carry errors that may be transient; never pin them.
+        if 'errors' in json.loads(body):
+            return response
+    except ValueError:
+        return response
+
+    cache.set_raw(
+        plan.key, body,
+        ttl=cache_policies.ttl_for(RESPONSE_KEY_PREFIX),
+        tags=plan.tags
+    )
+    return response
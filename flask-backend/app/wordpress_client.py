@@ -1,39 +1,298 @@
+import hashlib
+import json
 import requests
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Iterator, List, Optional
 import os
 
+from config import Config
+
+
+# Gateway errors worth another attempt; anything else is returned as is.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Persisted GETs whose URL would be longer than this are POSTed instead.
+MAX_GET_URL_LENGTH = 2000
+
+# How WPGraphQL Smart Cache (and APQ servers) report an unregistered queryId.
+PERSISTED_QUERY_MISSES = ('PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND', 'Query Not Found')
+
+_session = None
+_session_lock = threading.Lock()
+_clients = {}
+_prefetcher = ThreadPoolExecutor(max_workers=Config.WORDPRESS_PREFETCH_WORKERS, thread_name_prefix='wp-prefetch')
+
+
+def create_session(settings: Any = Config) -> requests.Session:
+    session = requests.Session()
+    # Retries are done by the client, where it knows whether a request is safe to repeat.
+    adapter = HTTPAdapter(
+        pool_connections=settings.WORDPRESS_POOL_CONNECTIONS,
+        pool_maxsize=settings.WORDPRESS_POOL_MAXSIZE,
+        max_retries=0
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Content-Type': 'application/json'})
+    return session
+
+
+def shared_session() -> requests.Session:
+    # One keep-alive pool per process, shared by every WordPress client.
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def persisted_query_id(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def _persisted_query_missing(response: requests.Response) -> bool:
+    if response.status_code not in (200, 400):
+        return False
+    try:
+        errors = response.json().get('errors') or []
+    except ValueError:
+        return False
+    return any(
+        str(error.get('message', '')).startswith(PERSISTED_QUERY_MISSES)
+        or (error.get('extensions') or {}).get('code') in PERSISTED_QUERY_MISSES
+        for error in errors if isinstance(error, dict)
+    )
+
+
+def wordpress_client(graphql_url: str) -> 'WordPressGraphQLClient':
+    # Clients are kept per endpoint so the endpoint that answered is remembered.
+    with _session_lock:
+        client = _clients.get(graphql_url)
+        if client is None:
+            client = _clients[graphql_url] = WordPressGraphQLClient.for_endpoint(graphql_url)
+        return client
+
 
 class WordPressGraphQLClient:
-    def __init__(self, wordpress_url: str):
+    POSTS_QUERY = """
+    query GetPosts($first: Int!, $after: String) {
+      posts(first: $first, after: $after) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
+        nodes {
+          id
+          databaseId
+          title
+          content
+          excerpt
+          date
+          author {
+            node {
+              name
+            }
+          }
+          categories {
+            nodes {
+              name
+            }
+          }
+        }
+      }
+    }
+    """
+
+    def __init__(self, wordpress_url: str, session: Optional[requests.Session] = None, settings: Any = Config):
         self.graphql_endpoint = f"{wordpress_url}/graphql"
         self.graphql_fallback = f"{wordpress_url}/?graphql"
-    
-    def execute_query(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        self.session = session
+        self.timeout = (settings.WORDPRESS_CONNECT_TIMEOUT, settings.WORDPRESS_READ_TIMEOUT)
+        self.retries = settings.WORDPRESS_RETRIES
+        self.retry_backoff = settings.WORDPRESS_RETRY_BACKOFF
+        self.page_size = settings.WORDPRESS_PAGE_SIZE
+        self.persisted_queries = settings.WORDPRESS_PERSISTED_QUERIES
+        self.revalidate_entries = settings.WORDPRESS_REVALIDATE_ENTRIES
+        self.revalidate_bytes = settings.WORDPRESS_REVALIDATE_MAX_BYTES
+        self.revalidate_body_bytes = settings.WORDPRESS_REVALIDATE_MAX_BODY_BYTES
+        self._validators = OrderedDict()
+        self._validator_bytes = 0
+        self._validators_lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, graphql_url: str, **kwargs) -> 'WordPressGraphQLClient':
+        # Accepts a full GraphQL URL; only .../graphql has a ?graphql fallback.
+        base_url = graphql_url[:-len('/graphql')] if graphql_url.endswith('/graphql') else graphql_url
+        client = cls(base_url, **kwargs)
+        if not graphql_url.endswith('/graphql'):
+            client.graphql_endpoint = graphql_url
+            client.graphql_fallback = None
+        return client
+
+    def request(self, query: str, variables: Optional[Dict] = None, idempotent: bool = True) -> Dict:
+        # Raises requests.RequestException on transport or HTTP errors; GraphQL
+        # errors come back in the body. Queries are retried with exponential
+        # backoff, mutations (idempotent=False) never are. With persisted
+        # queries on, queries go out as GETs the WordPress CDN can cache.
+        payload = {'query': query}
+        if variables:
+            payload['variables'] = variables
+        persisted = idempotent and self.persisted_queries
+
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self._get_persisted(query, variables) if persisted else self._post(payload)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    response.raise_for_status()
+                    return response.json()
+            time.sleep(self.retry_backoff * (2 ** attempt))
+
+    def paginate(self, query: str, connection: str, variables: Optional[Dict] = None,
+                 limit: Optional[int] = None, page_size: Optional[int] = None,
+                 prefetch: bool = True) -> Iterator[Dict]:
+        # Yields the nodes of a WPGraphQL connection page by page, following
+        # pageInfo.endCursor. The query takes $first and $after and selects
+        # pageInfo { hasNextPage endCursor }. With prefetch the next page is
+        # requested while the current one is consumed, so at most two pages
+        # are held in memory whatever the total.
+        page_size = page_size or self.page_size
+        remaining = limit
+
+        def fetch(after: Optional[str], first: int) -> Dict:
+            data = self.request(query, {**(variables or {}), 'first': first, 'after': after})
+            page = (data.get('data') or {}).get(connection)
+            if page is None and data.get('errors'):
+                raise requests.RequestException(f"WordPress GraphQL errors: {data['errors']}")
+            return page or {}
+
+        pending = None
+        page = fetch(None, page_size if remaining is None else min(page_size, remaining))
         try:
-            payload = {
-                'query': query
-            }
-            
+            while True:
+                nodes = page.get('nodes') or []
+                if remaining is not None:
+                    nodes = nodes[:remaining]
+                    remaining -= len(nodes)
+                page_info = page.get('pageInfo') or {}
+                has_next = bool(nodes) and page_info.get('hasNextPage') and (remaining is None or remaining > 0)
+                if has_next:
+                    first = page_size if remaining is None else min(page_size, remaining)
+                    if prefetch:
+                        pending = _prefetcher.submit(fetch, page_info.get('endCursor'), first)
+
+                yield from nodes
+
+                if not has_next:
+                    return
+                page = pending.result() if pending is not None else fetch(page_info.get('endCursor'), first)
+                pending = None
+        finally:
+            # A consumer that stops early does not need the page in flight.
+            if pending is not None:
+                pending.cancel()
+
+    def iter_posts(self, limit: Optional[int] = None, page_size: Optional[int] = None,
+                   prefetch: bool = True) -> Iterator[Dict]:
+        return self.paginate(self.POSTS_QUERY, 'posts', limit=limit, page_size=page_size, prefetch=prefetch)
+
+    def _get_persisted(self, query: str, variables: Optional[Dict]) -> requests.Response:
+        # Sends only the query's sha256 queryId and the variables. The first
+        # time WordPress does not know the id (or after it forgot it), the
+        # text is POSTed along with it so WordPress stores it under that id.
+        query_id = persisted_query_id(query)
+        params = {'queryId': query_id}
+        if variables:
+            params['variables'] = json.dumps(variables, sort_keys=True, separators=(',', ':'))
+        # Measured as sent: queryId plus percent-encoded variables, which
+        # can be about three times their JSON length.
+        if len(requests.Request('GET', self.graphql_endpoint, params=params).prepare().url) > MAX_GET_URL_LENGTH:
+            return self._post({'query': query, **({'variables': variables} if variables else {})})
+
+        response = self._get(params)
+        if _persisted_query_missing(response):
+            payload = {'query': query, 'queryId': query_id}
             if variables:
                 payload['variables'] = variables
-            
-            response = requests.post(
-                self.graphql_endpoint,
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            
-            if response.status_code == 404:
-                response = requests.post(
-                    self.graphql_fallback,
-                    json=payload,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=10
-                )
-            
-            response.raise_for_status()
-            result = response.json()
+            response = self._post(payload)
+        return response
+
+    def _get(self, params: Dict) -> requests.Response:
+        # Conditional GET: the ETag / Last-Modified of the last answer are sent
+        # back, and a 304 is answered from the body stored with them. Stored
+        # bodies are bounded by count and total bytes; large ones (e.g. a page
+        # of full post content during a mirror sync) are not kept at all.
+        key = json.dumps(params, sort_keys=True)
+        with self._validators_lock:
+            validator = self._validators.get(key)
+        headers = {}
+        if validator is not None:
+            etag, last_modified, _ = validator
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = self._call('get', params=params, headers=headers)
+        if response.status_code == 304 and validator is not None:
+            response.status_code = 200
+            response._content = validator[2]
+            with self._validators_lock:
+                if key in self._validators:
+                    self._validators.move_to_end(key)
+        elif response.status_code == 200 and self.revalidate_entries > 0:
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            if (etag or last_modified) and not _persisted_query_missing(response):
+                self._remember(key, (etag, last_modified, response.content))
+        return response
+
+    def _remember(self, key: str, validator: tuple):
+        size = len(validator[2])
+        with self._validators_lock:
+            previous = self._validators.pop(key, None)
+            if previous is not None:
+                self._validator_bytes -= len(previous[2])
+            if size > min(self.revalidate_body_bytes, self.revalidate_bytes):
+                return
+            self._validators[key] = validator
+            self._validator_bytes += size
+            while len(self._validators) > self.revalidate_entries or self._validator_bytes > self.revalidate_bytes:
+                _, (_, _, content) = self._validators.popitem(last=False)
+                self._validator_bytes -= len(content)
+
+    def _post(self, payload: Dict) -> requests.Response:
+        return self._call('post', json=payload)
+
+    def _call(self, method: str, **kwargs) -> requests.Response:
+        session = self.session or shared_session()
+        endpoint, fallback = self.graphql_endpoint, self.graphql_fallback
+        response = self._send(session, method, endpoint, kwargs)
+        if response.status_code == 404 and fallback:
+            response = self._send(session, method, fallback, kwargs)
+            if response.status_code != 404:
+                # Send later queries straight to the endpoint that answered.
+                self.graphql_endpoint, self.graphql_fallback = fallback, endpoint
+        return response
+
+    def _send(self, session: requests.Session, method: str, url: str, kwargs: Dict) -> requests.Response:
+        response = getattr(session, method)(url, timeout=self.timeout, **kwargs)
+        # Read the body now so the connection goes straight back to the pool,
+        # even when the status means it is thrown away.
+        response.content
+        return response
+
+    def execute_query(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        try:
+            result = self.request(query, variables)
             
             if 'errors' in result:
                 print(f"WordPress GraphQL errors: {result['errors']}")
@@ -44,38 +303,20 @@ class WordPressGraphQLClient:
         except requests.exceptions.RequestException as e:
             print(f"WordPress GraphQL request error: {e}")
             return {'data': None, 'errors': [str(e)]}
+        except ValueError as e:
+            print(f"WordPress GraphQL response error: {e}")
+            return {'data': None, 'errors': [str(e)]}
     
     def get_posts(self, first: int = 10) -> List[Dict]:
-        query = """
-        query GetPosts($first: Int!) {
-          posts(first: $first) {
-            nodes {
-              id
-              databaseId
-              title
-              content
-              excerpt
-              date
-              author {
-                node {
-                  name
-                }
-              }
-              categories {
-                nodes {
-                  name
-                }
-              }
-            }
-          }
-        }
-        """
-        
-        result = self.execute_query(query, {'first': first})
-        
-        if result.get('data') and result['data'].get('posts'):
-            return result['data']['posts']['nodes']
-        return []
+        # Large sets are fetched in pages instead of one posts(first: N) call.
+        try:
+            return list(self.iter_posts(limit=first))
+        except requests.exceptions.RequestException as e:
+            print(f"WordPress GraphQL request error: {e}")
+            return []
+        except ValueError as e:
+            print(f"WordPress GraphQL response error: {e}")
+            return []
     
     def get_post_by_id(self, post_id: int) -> Optional[Dict]:
         query = """
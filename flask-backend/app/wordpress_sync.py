@@ -0,0 +1,326 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import func
+
+from app import db
+from app.models import WordPressPost, WordPressPage
+from app.utils.cache import cache
+from app.wordpress_client import wordpress_client
+
+
+POST_SYNC_FIELDS = """
+      id
+      databaseId
+      slug
+      title
+      content
+      excerpt
+      date
+      modified
+      author {
+        node {
+          name
+        }
+      }
+"""
+
+PAGE_SYNC_FIELDS = """
+      id
+      databaseId
+      slug
+      title
+      content
+      date
+      modified
+"""
+
+POSTS_SYNC_QUERY = """
+query SyncPosts($first: Int!, $after: String) {
+  posts(first: $first, after: $after, where: {orderby: [{field: MODIFIED, order: DESC}]}) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {%s    }
+  }
+}
+""" % POST_SYNC_FIELDS
+
+POST_SYNC_QUERY = """
+query SyncPost($id: ID!) {
+  node: post(id: $id, idType: DATABASE_ID) {%s  }
+}
+""" % POST_SYNC_FIELDS
+
+PAGES_SYNC_QUERY = """
+query SyncPages($first: Int!, $after: String) {
+  pages(first: $first, after: $after, where: {orderby: [{field: MODIFIED, order: DESC}]}) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {%s    }
+  }
+}
+""" % PAGE_SYNC_FIELDS
+
+PAGE_SYNC_QUERY = """
+query SyncPage($id: ID!) {
+  node: page(id: $id, idType: DATABASE_ID) {%s  }
+}
+""" % PAGE_SYNC_FIELDS
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    # WPGraphQL dates are site-local ISO strings without an offset.
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _post_columns(node: dict) -> dict:
+    return {
+        'global_id': node.get('id'),
+        'slug': node.get('slug'),
+        'title': node.get('title'),
+        'content': node.get('content'),
+        'excerpt': node.get('excerpt'),
+        'author_name': ((node.get('author') or {}).get('node') or {}).get('name'),
+        'date': _parse_date(node.get('date')),
+        'modified': _parse_date(node.get('modified'))
+    }
+
+
+def _page_columns(node: dict) -> dict:
+    return {
+        'global_id': node.get('id'),
+        'slug': node.get('slug'),
+        'title': node.get('title'),
+        'content': node.get('content'),
+        'date': _parse_date(node.get('date')),
+        'modified': _parse_date(node.get('modified'))
+    }
+
+
+class MirrorSpec:
+
+    def __init__(self, model: type, connection: str, query: str, single_query: str,
+                 columns: Callable[[dict], dict], tag_prefix: str, list_tags: Iterable[str] = ()):
+        self.model = model
+        self.connection = connection
+        self.query = query
+        self.single_query = single_query
+        self.columns = columns
+        self.tag_prefix = tag_prefix
+        self.list_tags = tuple(list_tags)
+
+
+MIRRORS = {
+    'posts': MirrorSpec(WordPressPost, 'posts', POSTS_SYNC_QUERY, POST_SYNC_QUERY, _post_columns,
+                        'wp_post', ('wp_posts', 'wp_posts:content')),
+    'pages': MirrorSpec(WordPressPage, 'pages', PAGES_SYNC_QUERY, PAGE_SYNC_QUERY, _page_columns, 'wp_page'),
+}
+
+
+class WordPressMirror:
+    # Keeps local copies of WordPress posts and pages. A sync fetches the
+    # delta: content is walked newest-modified first, and the walk stops once
+    # it is older than the newest mirrored row. A reconcile walks everything
+    # and also deletes rows WordPress no longer returns (deleted, trashed or
+    # unpublished). Rows that change invalidate their cache tags.
+
+    def __init__(self, batch_size: int = 100, interval: float = 300, reconcile_every: int = 12,
+                 max_delete_fraction: float = 0.5):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.reconcile_every = reconcile_every
+        self.max_delete_fraction = max_delete_fraction
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._status = {'state': 'idle'}
+
+    def configure(self, settings: Any):
+        self.batch_size = settings.get('WORDPRESS_SYNC_BATCH_SIZE', self.batch_size)
+        self.interval = settings.get('WORDPRESS_SYNC_INTERVAL', self.interval)
+        self.reconcile_every = settings.get('WORDPRESS_RECONCILE_EVERY', self.reconcile_every)
+        self.max_delete_fraction = settings.get('WORDPRESS_RECONCILE_MAX_DELETE_FRACTION', self.max_delete_fraction)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def start(self, app):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(app,), name='wordpress-mirror', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def trigger(self, app, reconcile: bool = False) -> bool:
+        # One-off run in the background; False when a run is already going.
+        if self._run_lock.locked():
+            return False
+        threading.Thread(
+            target=self.run, args=(app, reconcile), name='wordpress-mirror-run', daemon=True
+        ).start()
+        return True
+
+    def _run(self, app):
+        # A reconcile on startup, then deltas with a periodic full pass.
+        runs = 0
+        while True:
+            self.run(app, reconcile=runs % max(self.reconcile_every, 1) == 0)
+            runs += 1
+            if self._stop_event.wait(self.interval):
+                return
+
+    def run(self, app, reconcile: bool = False, kinds: Optional[Iterable[str]] = None) -> dict:
+        # Runs under the app context; concurrent runs are skipped, not queued.
+        if not self._run_lock.acquire(blocking=False):
+            return {'state': 'busy'}
+        mode = 'reconcile' if reconcile else 'sync'
+        try:
+            with self._lock:
+                self._status = {'state': 'running', 'mode': mode, 'started_at': time.time()}
+            with app.app_context():
+                try:
+                    client = wordpress_client(app.config.get('WORDPRESS_GRAPHQL_URL'))
+                    results = {
+                        kind: self.mirror(MIRRORS[kind], client, full=reconcile)
+                        for kind in (kinds or MIRRORS)
+                    }
+                except Exception:
+                    db.session.rollback()
+                    raise
+            status = {'state': 'done', 'mode': mode, 'results': results}
+        except Exception as e:
+            print(f"WordPress mirror {mode} error: {e}")
+            status = {'state': 'failed', 'mode': mode, 'error': str(e)}
+        finally:
+            self._run_lock.release()
+
+        with self._lock:
+            status['started_at'] = self._status.get('started_at')
+            status['finished_at'] = time.time()
+            self._status = status
+        return status
+
+    def mirror(self, spec: MirrorSpec, client: Any, full: bool = False) -> dict:
+        model = spec.model
+        high_water = None if full else db.session.query(func.max(model.modified)).scalar()
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        changed = []
+        seen = set()
+        batch = []
+
+        for node in client.paginate(spec.query, spec.connection, page_size=self.batch_size):
+            values = spec.columns(node)
+            if high_water is not None and values['modified'] is not None and values['modified'] < high_water:
+                break
+            entity_id = node.get('databaseId')
+            if entity_id is None:
+                continue
+            seen.add(entity_id)
+            batch.append((entity_id, values))
+            if len(batch) >= self.batch_size:
+                changed.extend(self._upsert(model, batch, counts))
+                batch = []
+        if batch:
+            changed.extend(self._upsert(model, batch, counts))
+
+        deleted = []
+        if full:
+            existing = [entity_id for (entity_id,) in db.session.query(model.id)]
+            deleted = [entity_id for entity_id in existing if entity_id not in seen]
+            # An empty or truncated walk (auth or visibility change, a plugin
+            # error answered with 200) must not wipe the mirror.
+            if deleted and (not seen or len(deleted) > self.max_delete_fraction * len(existing)):
+                print(f"WordPress mirror reconcile of {spec.connection}: not deleting {len(deleted)} of "
+                      f"{len(existing)} rows after a walk that returned {len(seen)}")
+                counts['delete_aborted'] = len(deleted)
+                deleted = []
+            for start in range(0, len(deleted), self.batch_size):
+                chunk = deleted[start:start + self.batch_size]
+                model.query.filter(model.id.in_(chunk)).delete(synchronize_session=False)
+                db.session.commit()
+            counts['deleted'] = len(deleted)
+
+        self._invalidate(spec, changed + deleted)
+        return counts
+
+    def mirror_one(self, spec: MirrorSpec, client: Any, entity_id: int, removed: bool = False) -> dict:
+        # Brings a single row up to date, e.g. for a webhook. A post WordPress
+        # no longer returns (or one reported as removed) is deleted. Only the
+        # row's own tag is invalidated: whether list membership changed is up
+        # to the caller, which knows what happened to the post.
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        node = None
+        if not removed:
+            data = client.request(spec.single_query, {'id': entity_id})
+            node = (data.get('data') or {}).get('node')
+        if node is None:
+            counts['deleted'] = spec.model.query.filter_by(id=entity_id).delete(synchronize_session=False)
+            db.session.commit()
+            changed = [entity_id] if counts['deleted'] else []
+        else:
+            changed = self._upsert(spec.model, [(entity_id, spec.columns(node))], counts)
+        self._invalidate(spec, changed, lists=False)
+        return counts
+
+    def _upsert(self, model: type, batch: list, counts: dict) -> list:
+        existing = {row.id: row for row in model.query.filter(model.id.in_([entity_id for entity_id, _ in batch]))}
+        changed = []
+        for entity_id, values in batch:
+            row = existing.get(entity_id)
+            if row is None:
+                db.session.add(model(id=entity_id, **values))
+                counts['inserted'] += 1
+            elif any(getattr(row, column) != value for column, value in values.items()):
+                for column, value in values.items():
+                    setattr(row, column, value)
+                counts['updated'] += 1
+            else:
+                continue
+            changed.append(entity_id)
+        db.session.commit()
+        return changed
+
+    def _invalidate(self, spec: MirrorSpec, entity_ids: list, lists: bool = True):
+        if not entity_ids or not cache.is_available():
+            return
+        tags = [f"{spec.tag_prefix}:{entity_id}" for entity_id in entity_ids]
+        for start in range(0, len(tags), 500):
+            cache.invalidate_tags(*tags[start:start + 500])
+        if lists and spec.list_tags:
+            cache.invalidate_tags(*spec.list_tags)
+
+
+def mirror_posts(limit: int, fields: Optional[Iterable[str]] = None) -> list:
+    # Newest first, like WPGraphQL's default posts ordering.
+    rows = WordPressPost.query.order_by(WordPressPost.date.desc(), WordPressPost.id.desc()).limit(limit)
+    return [row.to_dict(fields) for row in rows]
+
+
+def mirror_posts_by_id(ids: Iterable[Any]) -> list:
+    database_ids = [int(post_id) for post_id in ids if str(post_id).isdigit()]
+    if not database_ids:
+        return []
+    return [row.to_dict() for row in WordPressPost.query.filter(WordPressPost.id.in_(database_ids))]
+
+
+wordpress_mirror = WordPressMirror()
@@ -0,0 +1,104 @@
+"""Compare the cache value envelope against the legacy json.dumps format.
+
+Run from flask-backend/:
+
+    python benchmarks/bench_cache_codec.py [--posts 50] [--content-kb 8]
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import cache_codec  # noqa: E402
+
+
+def make_posts(count: int, content_kb: int) -> list:
+    # Seeded word salad so compression ratios resemble real prose rather than
+    # a single repeated paragraph.
+    rng = random.Random(42)
+    words = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10)))
+        for _ in range(2000)
+    ]
+
+    def html(size: int) -> str:
+        paragraphs = []
+        length = 0
+        while length < size:
+            paragraph = "<p>" + " ".join(rng.choice(words) for _ in range(60)) + ".</p>\n"
+            paragraphs.append(paragraph)
+            length += len(paragraph)
+        return "".join(paragraphs)
+
+    return [
+        {
+            "id": f"cG9zdDo{i}",
+            "databaseId": i,
+            "title": f"Post number {i}",
+            "content": html(content_kb * 1024),
+            "excerpt": html(200),
+            "date": "2024-05-01T12:30:15",
+            "author": {"node": {"name": "Editorial Team"}},
+        }
+        for i in range(count)
+    ]
+
+
+def variants() -> list:
+    rows = [('legacy json.dumps', None, None)]
+    for codec_name in ('json', 'msgpack'):
+        if codec_name == 'msgpack' and cache_codec.msgpack is None:
+            continue
+        codec = cache_codec.CODECS[codec_name]
+        rows.append((f'{codec_name}', codec, cache_codec.COMPRESSION_NONE))
+        rows.append((f'{codec_name} + zlib', codec, cache_codec.COMPRESSION_ZLIB))
+        if cache_codec.lz4_frame is not None:
+            rows.append((f'{codec_name} + lz4', codec, cache_codec.COMPRESSION_LZ4))
+    return rows
+
+
+def encoders(posts: list, codec, compression) -> tuple:
+    # (encode(), decode(payload)) for one variant; codec None is the legacy format.
+    if codec is None:
+        def encode():
+            return json.dumps(posts)
+
+        def decode(payload):
+            return json.loads(payload)
+    else:
+        def encode():
+            return cache_codec.encode_value(posts, codec, compression, 1024)
+
+        def decode(payload):
+            return cache_codec.decode_value(payload)
+    return encode, decode
+
+
+def run(posts: list, number: int):
+    print(f"{'format':<22}{'bytes':>12}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+    baseline = None
+    for name, codec, compression in variants():
+        encode, decode = encoders(posts, codec, compression)
+        decode_input = encode()
+
+        size = len(decode_input.encode() if isinstance(decode_input, str) else decode_input)
+        baseline = baseline or size
+        encode_us = min(timeit.repeat(encode, number=number, repeat=3)) / number * 1e6
+        decode_us = min(timeit.repeat(lambda: decode(decode_input), number=number, repeat=3)) / number * 1e6
+        print(f"{name:<22}{size:>12}{size / baseline:>8.2f}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=50)
+    parser.add_argument('--content-kb', type=int, default=8)
+    parser.add_argument('--number', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.posts} posts with ~{args.content_kb}KB of content each")
+    run(make_posts(args.posts, args.content_kb), args.number)
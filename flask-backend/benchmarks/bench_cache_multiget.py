@@ -0,0 +1,75 @@
+"""Compare get_many/set_many/delete_many against a per-key loop.
+
+Needs a reachable Redis (REDIS_HOST/REDIS_PORT, database REDIS_DB). Keys are
+written under graphql:bench:* and removed afterwards. Run from flask-backend/:
+
+    python benchmarks/bench_cache_multiget.py [--keys 50] [--content-kb 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.cache import RedisCache, LocalCache  # noqa: E402
+from bench_cache_codec import make_posts  # noqa: E402
+
+
+def timed(fn, number: int) -> float:
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3
+
+
+def run(cache: RedisCache, count: int, content_kb: int, number: int):
+    posts = make_posts(count, content_kb)
+    entries = {f"graphql:bench:{i}": post for i, post in enumerate(posts)}
+    keys = list(entries)
+
+    def set_loop():
+        for key, value in entries.items():
+            cache.set(key, value, ttl=60)
+
+    def get_loop():
+        return {key: cache.get(key) for key in keys}
+
+    def delete_loop():
+        for key in keys:
+            cache.delete(key)
+
+    rows = [
+        ('set', timed(set_loop, number), timed(lambda: cache.set_many(entries, ttl=60), number)),
+        ('get', timed(get_loop, number), timed(lambda: cache.get_many(keys), number)),
+    ]
+    delete_per_key = timed(lambda: (set_loop(), delete_loop()), number) - rows[0][1]
+    delete_batched = timed(lambda: (set_loop(), cache.delete_many(keys)), number) - rows[0][1]
+    rows.append(('delete', delete_per_key, delete_batched))
+
+    print(f"{'operation':<12}{'per-key ms':>12}{'batched ms':>12}{'speedup':>10}")
+    for name, loop_ms, batch_ms in rows:
+        print(f"{name:<12}{loop_ms:>12.2f}{batch_ms:>12.2f}{loop_ms / max(batch_ms, 1e-9):>9.1f}x")
+
+    cache.delete_many(keys)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--keys', type=int, default=50)
+    parser.add_argument('--content-kb', type=int, default=2)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    cache = RedisCache()
+    # Measure Redis round trips, not the in-process tier.
+    cache.local_cache = LocalCache(max_bytes=0, max_entries=0, ttl=0)
+    if not cache.is_connected():
+        sys.exit("Redis is not reachable; set REDIS_HOST/REDIS_PORT")
+
+    print(f"{args.keys} keys with ~{args.content_kb}KB of content each")
+    run(cache, args.keys, args.content_kb, args.number)
@@ -1,10 +1,19 @@
 import os
+import json
 from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def _with_overrides(policies, env_name):
+    overrides = json.loads(os.getenv(env_name, '{}'))
+    return {
+        prefix: {**policies.get(prefix, {}), **overrides.get(prefix, {})}
+        for prefix in {**policies, **overrides}
+    }
+
+
 class Config:
     
     
@@ -20,13 +29,97 @@ class Config:
     
    
     WORDPRESS_GRAPHQL_URL = os.getenv('WORDPRESS_GRAPHQL_URL', 'http://localhost:8080/graphql')
+    # Shared keep-alive pool for WordPress; queries are retried with exponential backoff.
+    WORDPRESS_CONNECT_TIMEOUT = float(os.getenv('WORDPRESS_CONNECT_TIMEOUT', 3))
+    WORDPRESS_READ_TIMEOUT = float(os.getenv('WORDPRESS_READ_TIMEOUT', 10))
+    WORDPRESS_RETRIES = int(os.getenv('WORDPRESS_RETRIES', 2))
+    WORDPRESS_RETRY_BACKOFF = float(os.getenv('WORDPRESS_RETRY_BACKOFF', 0.2))
+    WORDPRESS_POOL_CONNECTIONS = int(os.getenv('WORDPRESS_POOL_CONNECTIONS', 4))
+    WORDPRESS_POOL_MAXSIZE = int(os.getenv('WORDPRESS_POOL_MAXSIZE', 20))
+    # Send queries as persisted GETs (needs WPGraphQL Smart Cache) and revalidate them with ETag / Last-Modified.
+    WORDPRESS_PERSISTED_QUERIES = os.getenv('WORDPRESS_PERSISTED_QUERIES', 'false').lower() == 'true'
+    WORDPRESS_REVALIDATE_ENTRIES = int(os.getenv('WORDPRESS_REVALIDATE_ENTRIES', 1000))
+    WORDPRESS_REVALIDATE_MAX_BYTES = int(os.getenv('WORDPRESS_REVALIDATE_MAX_BYTES', 16 * 1024 * 1024))
+    WORDPRESS_REVALIDATE_MAX_BODY_BYTES = int(os.getenv('WORDPRESS_REVALIDATE_MAX_BODY_BYTES', 256 * 1024))
+    # Posts per request when paging through large sets, and threads prefetching the next page.
+    WORDPRESS_PAGE_SIZE = int(os.getenv('WORDPRESS_PAGE_SIZE', 50))
+    WORDPRESS_PREFETCH_WORKERS = int(os.getenv('WORDPRESS_PREFETCH_WORKERS', 4))
+    # Local mirror of WordPress content: background sync, and whether resolvers read from it.
+    WORDPRESS_MIRROR_SYNC = os.getenv('WORDPRESS_MIRROR_SYNC', 'false').lower() == 'true'
+    WORDPRESS_READ_FROM_MIRROR = os.getenv('WORDPRESS_READ_FROM_MIRROR', 'false').lower() == 'true'
+    WORDPRESS_SYNC_INTERVAL = float(os.getenv('WORDPRESS_SYNC_INTERVAL', 300))
+    # Every Nth sync is a full reconcile that also removes deleted content.
+    WORDPRESS_RECONCILE_EVERY = int(os.getenv('WORDPRESS_RECONCILE_EVERY', 12))
+    # A reconcile that would delete more than this share of the mirror (or that saw nothing) deletes nothing.
+    WORDPRESS_RECONCILE_MAX_DELETE_FRACTION = float(os.getenv('WORDPRESS_RECONCILE_MAX_DELETE_FRACTION', 0.5))
+    WORDPRESS_SYNC_BATCH_SIZE = int(os.getenv('WORDPRESS_SYNC_BATCH_SIZE', 100))
+    # Shared secret for /api/webhooks/wordpress (empty disables it); signatures older than the tolerance are refused.
+    WORDPRESS_WEBHOOK_SECRET = os.getenv('WORDPRESS_WEBHOOK_SECRET', '')
+    WORDPRESS_WEBHOOK_TOLERANCE = int(os.getenv('WORDPRESS_WEBHOOK_TOLERANCE', 300))
+    # Re-fetch the changed post and the popular post lists right after invalidating them.
+    WORDPRESS_WEBHOOK_REFRESH = os.getenv('WORDPRESS_WEBHOOK_REFRESH', 'true').lower() == 'true'
     
    
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
     
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', None)
-    CACHE_DEFAULT_TTL = 300  
+    REDIS_DB = int(os.getenv('REDIS_DB', 0))
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 1))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 1))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT', 2))
+    REDIS_HEALTH_CHECK_INTERVAL = float(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 5))
+    REDIS_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('REDIS_CIRCUIT_FAILURE_THRESHOLD', 3))
+    REDIS_CIRCUIT_RESET_TIMEOUT = float(os.getenv('REDIS_CIRCUIT_RESET_TIMEOUT', 10))
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 300))
+    # Short TTLs for "known absent" entries: missing content and upstream errors.
+    CACHE_NEGATIVE_TTL = int(os.getenv('CACHE_NEGATIVE_TTL', 30))
+    CACHE_ERROR_TTL = int(os.getenv('CACHE_ERROR_TTL', 10))
+    CACHE_CODEC = os.getenv('CACHE_CODEC', 'msgpack')
+    CACHE_COMPRESSION = os.getenv('CACHE_COMPRESSION', 'lz4')
+    CACHE_COMPRESS_THRESHOLD = int(os.getenv('CACHE_COMPRESS_THRESHOLD', 1024))
+    # Values still larger than this after compression are not cached (0 disables).
+    CACHE_MAX_VALUE_BYTES = int(os.getenv('CACHE_MAX_VALUE_BYTES', 1024 * 1024))
+    CACHE_L1_MAX_BYTES = int(os.getenv('CACHE_L1_MAX_BYTES', 32 * 1024 * 1024))
+    CACHE_L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', 1024))
+    CACHE_L1_TTL = int(os.getenv('CACHE_L1_TTL', 30))
+    CACHE_REFRESH_WORKERS = int(os.getenv('CACHE_REFRESH_WORKERS', 4))
+    CACHE_STATS_FLUSH_INTERVAL = float(os.getenv('CACHE_STATS_FLUSH_INTERVAL', 10))
+    GRAPHQL_RESPONSE_CACHE = os.getenv('GRAPHQL_RESPONSE_CACHE', 'false').lower() == 'true'
+    GRAPHQL_RESPONSE_CACHE_TTL = int(os.getenv('GRAPHQL_RESPONSE_CACHE_TTL', 60))
+    # Per key-prefix cache policy. Keys: ttl, stale_ttl, negative_ttl, error_ttl, compression
+    # (none/zlib/lz4, default CACHE_COMPRESSION), local (L1 eligible) and
+    # adaptive. CACHE_POLICY_OVERRIDES takes the same shape as JSON.
+    CACHE_POLICIES = _with_overrides({
+        'wp_posts': {'ttl': 300, 'stale_ttl': 300},
+        'wp_post_summaries': {'ttl': 300, 'stale_ttl': 300},
+        'wp_post': {'ttl': 300, 'stale_ttl': 300},
+        'articles': {'ttl': 300},
+        'article': {'ttl': 300},
+        'products': {'ttl': 600},
+        'product': {'ttl': 600},
+        'team': {'ttl': 1800},
+        'entity:article': {'ttl': 3600},
+        'entity:product': {'ttl': 3600},
+        'entity:wp_post': {'ttl': 600},
+        'response': {'ttl': GRAPHQL_RESPONSE_CACHE_TTL, 'adaptive': False},
+    }, 'CACHE_POLICY_OVERRIDES')
+    CACHE_ADAPTIVE_TTL = os.getenv('CACHE_ADAPTIVE_TTL', 'false').lower() == 'true'
+    CACHE_ADAPTIVE_MIN_TTL = int(os.getenv('CACHE_ADAPTIVE_MIN_TTL', 30))
+    CACHE_ADAPTIVE_MAX_TTL = int(os.getenv('CACHE_ADAPTIVE_MAX_TTL', 3600))
+    CACHE_ADAPTIVE_FACTOR = float(os.getenv('CACHE_ADAPTIVE_FACTOR', 0.5))
+    CACHE_WARMUP_ON_STARTUP = os.getenv('CACHE_WARMUP_ON_STARTUP', 'true').lower() == 'true'
+    CACHE_WARMUP_LIMIT = int(os.getenv('CACHE_WARMUP_LIMIT', 200))
+    CACHE_WARMUP_WORKERS = int(os.getenv('CACHE_WARMUP_WORKERS', 8))
+    # Replays per second against WordPress for the prefixes below.
+    CACHE_WARMUP_RATE = float(os.getenv('CACHE_WARMUP_RATE', 10))
+    CACHE_WARMUP_THROTTLED_PREFIXES = os.getenv('CACHE_WARMUP_THROTTLED_PREFIXES', 'wp_posts,wp_post_summaries,wp_post').split(',')
+    # Local file holding the hottest entries across restarts and flushes (empty disables).
+    CACHE_SNAPSHOT_PATH = os.getenv('CACHE_SNAPSHOT_PATH', '')
+    CACHE_SNAPSHOT_INTERVAL = float(os.getenv('CACHE_SNAPSHOT_INTERVAL', 60))
+    CACHE_SNAPSHOT_MAX_ENTRIES = int(os.getenv('CACHE_SNAPSHOT_MAX_ENTRIES', 500))
+    CACHE_SNAPSHOT_MAX_BYTES = int(os.getenv('CACHE_SNAPSHOT_MAX_BYTES', 16 * 1024 * 1024))
     REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}"
     
     
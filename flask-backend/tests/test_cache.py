@@ -1,8 +1,32 @@
 import pytest
+import os
 import json
 import time
+import threading
 from unittest.mock import Mock, patch, MagicMock
-from app.utils.cache import RedisCache, cache_query
+import redis
+from datetime import datetime
+from app.utils import cache_codec
+from app.utils.cache_codec import encode_value, decode_value, CacheDecodeError
+from app.utils.cache_stats import CacheStats, cache_stats, key_prefix
+from app.utils.cache_policy import CachePolicyRegistry
+from app.utils.cache_warmup import CacheWarmer, WarmupRecorder, WarmupInfo, WARMUP_KEY
+from app.utils.cache_hydration import Hydrator, CachedRecord, hydrator_for, is_cached_instance
+from app.utils.cache_codec import AbsentMarker
+from app.utils.entity_cache import EntityCache, entity_key
+from app.utils.cache_snapshot import CacheSnapshot
+from app.utils.cache import (
+    ContentNotFound, UpstreamError, RedisCache, LocalCache, CacheInvalidationListener, SingleFlight, BackgroundRefresher,
+    CircuitBreaker, cache_query, create_connection_pool, build_query_key, local_cache, INSTANCE_ID,
+    _jittered
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    local_cache.clear()
+    yield
+    local_cache.clear()
 
 
 @pytest.fixture
@@ -67,21 +91,64 @@ class TestRedisCache:
     
     def test_delete_pattern(self, redis_cache):
         
-        redis_cache.redis_client.keys.return_value = ["key1", "key2", "key3"]
-        redis_cache.redis_client.delete.return_value = 3
+        redis_cache.redis_client.scan_iter.return_value = iter(["key1", "key2", "key3"])
+        redis_cache.redis_client.unlink.return_value = 3
         
         deleted_count = redis_cache.delete_pattern("graphql:*")
         
         assert deleted_count == 3
-        redis_cache.redis_client.keys.assert_called_once_with("graphql:*")
+        redis_cache.redis_client.scan_iter.assert_called_once_with(match="graphql:*", count=500)
+        redis_cache.redis_client.unlink.assert_called_once_with("key1", "key2", "key3")
+        redis_cache.redis_client.keys.assert_not_called()
+
+    def test_delete_pattern_unlinks_in_batches(self, redis_cache):
+        redis_cache.scan_batch_size = 2
+        redis_cache.redis_client.scan_iter.return_value = iter(["key1", "key2", "key3"])
+        redis_cache.redis_client.unlink.side_effect = [2, 1]
+
+        assert redis_cache.delete_pattern("graphql:*") == 3
+        assert redis_cache.redis_client.unlink.call_count == 2
+
+    def test_scan_keys_defaults_to_cache_namespaces(self, redis_cache):
+        redis_cache.redis_client.scan.return_value = (0, [b"entity:article:1", b"cache:stats:prefixes", b"graphql:a"])
+
+        assert redis_cache.scan_keys(count=10) == (0, ["entity:article:1", "graphql:a"])
+        assert redis_cache.redis_client.scan.call_args[1]['match'] == '*'
+
+    def test_scan_keys_fills_page(self, redis_cache):
+        redis_cache.redis_client.scan.side_effect = [(17, []), (42, ["key1", "key2"])]
+
+        cursor, keys = redis_cache.scan_keys("graphql:*", cursor=0, count=2)
+
+        assert cursor == 42
+        assert keys == ["key1", "key2"]
+
+    def test_describe_keys_uses_single_pipeline(self, redis_cache):
+        pipe = redis_cache.redis_client.pipeline.return_value
+        pipe.execute.return_value = [120, "string", 512, -1, "set", 96]
+
+        described = redis_cache.describe_keys(["graphql:a", "tag:articles"])
+
+        assert described == [
+            {'key': "graphql:a", 'ttl': 120, 'type': "string", 'memory_bytes': 512},
+            {'key': "tag:articles", 'ttl': -1, 'type': "set", 'memory_bytes': 96}
+        ]
+        pipe.execute.assert_called_once()
+        redis_cache.redis_client.ttl.assert_not_called()
     
     def test_clear_all(self, redis_cache):
      
-        redis_cache.redis_client.flushdb.return_value = True
+        redis_cache.redis_client.scan_iter.side_effect = lambda match, count: {
+            'graphql:*': [b"graphql:a"], 'tag:*': [b"tag:articles"]
+        }.get(match, [])
         
         result = redis_cache.clear_all()
         assert result is True
-        redis_cache.redis_client.flushdb.assert_called_once()
+        redis_cache.redis_client.flushdb.assert_not_called()
+        assert [call[1]['match'] for call in redis_cache.redis_client.scan_iter.call_args_list] == \
+            ['graphql:*', 'entity:*', 'response:*', 'tag:*']
+        unlinked = [call[0] for call in redis_cache.redis_client.unlink.call_args_list]
+        assert unlinked == [(b"graphql:a",), (b"tag:articles",)]
     
     def test_is_connected_success(self, redis_cache):
         
@@ -103,14 +170,511 @@ class TestRedisCache:
         assert result is None
 
 
+class TestCacheCodec:
+
+    posts = [
+        {"id": i, "title": f"Post {i}", "content": "<p>Lorem ipsum dolor sit amet</p>" * 50}
+        for i in range(20)
+    ]
+
+    def test_small_values_are_not_compressed(self):
+        raw = encode_value({"id": 1})
+
+        assert raw[0] & 0x80
+        assert raw[0] & 0x03 == cache_codec.COMPRESSION_NONE
+        assert decode_value(raw) == {"id": 1}
+
+    def test_large_values_are_compressed(self):
+        raw = encode_value(self.posts)
+
+        assert raw[0] & 0x03 == cache_codec.COMPRESSION_ZLIB
+        assert len(raw) < len(json.dumps(self.posts)) / 5
+        assert decode_value(raw) == self.posts
+
+    @pytest.mark.skipif(cache_codec.lz4_frame is None, reason="lz4 not installed")
+    def test_lz4_round_trip(self):
+        raw = encode_value(self.posts, compression=cache_codec.COMPRESSION_LZ4)
+
+        assert raw[0] & 0x03 == cache_codec.COMPRESSION_LZ4
+        assert decode_value(raw) == self.posts
+
+    @pytest.mark.skipif(cache_codec.msgpack is None, reason="msgpack not installed")
+    def test_msgpack_round_trip(self):
+        raw = encode_value(self.posts, codec=cache_codec.CODEC_MSGPACK)
+
+        assert (raw[0] >> 2) & 0x07 == cache_codec.CODEC_MSGPACK
+        assert decode_value(raw) == self.posts
+
+    def test_legacy_json_entries_still_decode(self):
+        legacy = json.dumps({"title": "Old entry"})
+
+        assert decode_value(legacy) == {"title": "Old entry"}
+        assert decode_value(legacy.encode()) == {"title": "Old entry"}
+
+    def test_datetimes_match_isoformat(self):
+        published = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+        assert decode_value(encode_value({"published": published})) == {
+            "published": published.isoformat()
+        }
+
+    def test_corrupt_payload_raises_decode_error(self):
+        with pytest.raises(CacheDecodeError):
+            decode_value(bytes((0x80 | (1 << 5) | cache_codec.COMPRESSION_ZLIB,)) + b"not zlib")
+
+    def test_redis_cache_reads_envelope(self, redis_cache):
+        redis_cache.redis_client.get.return_value = encode_value(self.posts)
+
+        assert redis_cache.get("graphql:posts") == self.posts
+
+
+class TestQueryKeys:
+
+    def make_info(self, parent="QueryType", field="wordpressPosts"):
+        info = MagicMock()
+        info.parent_type.name = parent
+        info.field_name = field
+        return info
+
+    def test_key_ignores_info_identity(self):
+        key1 = build_query_key("wp_posts", self.make_info(), {"limit": 10})
+        key2 = build_query_key("wp_posts", self.make_info(), {"limit": 10})
+
+        assert key1 == key2
+        assert key1.startswith("graphql:wp_posts:")
+
+    def test_key_normalizes_argument_order(self):
+        key1 = build_query_key("articles", self.make_info(), {"limit": 10, "offset": 0})
+        key2 = build_query_key("articles", self.make_info(), {"offset": 0, "limit": 10})
+
+        assert key1 == key2
+
+    def test_key_depends_on_field_and_arguments(self):
+        base = build_query_key("wp_posts", self.make_info(), {"limit": 10})
+
+        assert base != build_query_key("wp_posts", self.make_info(), {"limit": 20})
+        assert base != build_query_key("wp_posts", self.make_info(field="articles"), {"limit": 10})
+
+    def selection_info(self, document):
+        from graphql import parse
+        ast = parse(document)
+        operation = ast.definitions[0]
+        info = self.make_info()
+        info.field_nodes = [operation.selection_set.selections[0]]
+        info.fragments = {
+            definition.name.value: definition for definition in ast.definitions[1:]
+        }
+        return info
+
+    def test_selection_is_part_of_key_when_requested(self):
+        light = self.selection_info('{ wordpressPosts { title date } }')
+        same = self.selection_info(
+            '{ wordpressPosts { ...Teaser } } fragment Teaser on WordPressPostType { date title }'
+        )
+        full = self.selection_info('{ wordpressPosts { title date content } }')
+
+        light_key = build_query_key("wp_posts", light, {}, include_selection=True)
+        assert light_key == build_query_key("wp_posts", same, {}, include_selection=True)
+        assert light_key != build_query_key("wp_posts", full, {}, include_selection=True)
+        assert build_query_key("wp_posts", light, {}) == build_query_key("wp_posts", full, {})
+
+    def test_decorator_applies_argument_defaults(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = None
+
+            @cache_query(ttl=300, key_prefix="test")
+            def test_function(root, info, limit=10):
+                return [limit]
+
+            test_function(None, self.make_info())
+            test_function(None, self.make_info(), limit=10)
+
+            keys = [call[0][0] for call in mock_cache_instance.get.call_args_list]
+            assert keys[0] == keys[1]
+
+
+class TestRedisHealth:
+
+    def test_breaker_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure()
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_breaker_half_opens_after_reset_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+
+        with patch('app.utils.cache.time.monotonic', return_value=time.monotonic() + 11):
+            assert breaker.allow_request() is True
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.allow_request() is False
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_connection_errors_trip_breaker(self, redis_cache):
+        redis_cache.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        redis_cache.redis_client.get.side_effect = redis.ConnectionError("refused")
+
+        assert redis_cache.get("key") is None
+        assert redis_cache.is_available() is False
+
+    def test_open_breaker_skips_redis_for_entity_lists(self, redis_cache):
+        redis_cache.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        redis_cache.breaker.record_failure()
+        entities = EntityCache(redis_cache, redis_cache.policies)
+        local_cache.set(entity_key("article", 1), {"id": 1}, size=1)
+
+        assert entities.assemble("article", [1, 2], loader=lambda ids: [{"id": 2}]) == [{"id": 1}, {"id": 2}]
+        redis_cache.redis_client.mget.assert_not_called()
+        redis_cache.redis_client.pipeline.assert_not_called()
+
+    def test_is_available_does_not_ping(self, redis_cache):
+        assert redis_cache.is_available() is True
+        redis_cache.redis_client.ping.assert_not_called()
+
+    def test_ping_failure_updates_breaker(self, redis_cache):
+        redis_cache.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        redis_cache.redis_client.ping.side_effect = redis.ConnectionError("refused")
+
+        assert redis_cache.is_connected() is False
+        assert redis_cache.is_available() is False
+
+    def test_connection_pool_built_from_config(self):
+        pool = create_connection_pool({
+            'REDIS_HOST': 'redis.internal',
+            'REDIS_PORT': 6380,
+            'REDIS_DB': 1,
+            'REDIS_MAX_CONNECTIONS': 20
+        })
+
+        assert pool.connection_kwargs['host'] == 'redis.internal'
+        assert pool.connection_kwargs['port'] == 6380
+        assert pool.connection_kwargs['db'] == 1
+        assert pool.max_connections == 20
+
+
+class TestLocalCache:
+
+    def test_get_and_set(self):
+        l1 = LocalCache(max_bytes=1000, max_entries=10, ttl=30)
+        l1.set("key", {"id": 1}, size=10)
+
+        assert l1.get("key") == {"id": 1}
+        assert l1.get("missing") is None
+        assert l1.stats()['hits'] == 1
+        assert l1.stats()['misses'] == 1
+
+    def test_evicts_least_recently_used_by_entry_count(self):
+        l1 = LocalCache(max_bytes=1000, max_entries=2, ttl=30)
+        l1.set("a", 1, size=1)
+        l1.set("b", 2, size=1)
+        l1.get("a")
+        l1.set("c", 3, size=1)
+
+        assert l1.get("a") == 1
+        assert l1.get("b") is None
+        assert l1.get("c") == 3
+
+    def test_evicts_by_size(self):
+        l1 = LocalCache(max_bytes=800, max_entries=100, ttl=30)
+        for i in range(9):
+            l1.set(f"key{i}", i, size=100)
+
+        assert l1.stats()['bytes'] <= 800
+        assert l1.get("key0") is None
+        assert l1.get("key8") == 8
+
+    def test_skips_oversized_values(self):
+        l1 = LocalCache(max_bytes=800, max_entries=100, ttl=30)
+
+        assert l1.set("big", "x", size=500) is False
+        assert l1.get("big") is None
+
+    def test_entries_expire(self):
+        l1 = LocalCache(max_bytes=1000, max_entries=10, ttl=30)
+        l1.set("key", "value", size=5, ttl=1)
+
+        with patch('app.utils.cache.time.monotonic', return_value=time.monotonic() + 2):
+            assert l1.get("key") is None
+
+    def test_delete_pattern(self):
+        l1 = LocalCache(max_bytes=1000, max_entries=10, ttl=30)
+        l1.set("graphql:a", 1, size=1)
+        l1.set("graphql:b", 2, size=1)
+        l1.set("other", 3, size=1)
+
+        assert l1.delete_pattern("graphql:*") == 2
+        assert l1.get("other") == 3
+
+
+class TestLocalCacheCoherence:
+
+    def test_get_populates_local_cache(self, redis_cache):
+        redis_cache.redis_client.get.return_value = json.dumps({"id": 1})
+
+        redis_cache.get("key")
+        redis_cache.get("key")
+
+        redis_cache.redis_client.get.assert_called_once_with("key")
+
+    def test_delete_invalidates_and_publishes(self, redis_cache):
+        local_cache.set("key", {"id": 1}, size=10)
+
+        redis_cache.delete("key")
+
+        assert local_cache.get("key") is None
+        channel, payload = redis_cache.redis_client.publish.call_args[0]
+        assert channel == 'cache:invalidate'
+        assert json.loads(payload) == {'op': 'delete', 'keys': ['key'], 'origin': INSTANCE_ID}
+
+    def test_clear_all_publishes(self, redis_cache):
+        redis_cache.clear_all()
+
+        payload = json.loads(redis_cache.redis_client.publish.call_args[0][1])
+        assert payload['op'] == 'clear'
+
+    def test_listener_applies_remote_invalidation(self, redis_cache):
+        listener = CacheInvalidationListener(redis_cache)
+        local_cache.set("graphql:a", 1, size=1)
+        local_cache.set("graphql:b", 2, size=1)
+
+        listener.handle_message({
+            'type': 'message',
+            'data': json.dumps({'op': 'delete', 'keys': ['graphql:a'], 'origin': 'other-replica'})
+        })
+
+        assert local_cache.get("graphql:a") is None
+        assert local_cache.get("graphql:b") == 2
+
+    def test_listener_ignores_own_messages(self, redis_cache):
+        listener = CacheInvalidationListener(redis_cache)
+        local_cache.set("graphql:a", 1, size=1)
+
+        listener.handle_message({
+            'type': 'message',
+            'data': json.dumps({'op': 'clear', 'origin': INSTANCE_ID})
+        })
+
+        assert local_cache.get("graphql:a") == 1
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def slow_fetch():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return {"posts": [1, 2, 3]}
+
+        leader = threading.Thread(target=lambda: results.append(flight.do("wp_posts", slow_fetch)))
+        leader.start()
+        started.wait(timeout=5)
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("wp_posts", slow_fetch)))
+            for _ in range(4)
+        ]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(timeout=5)
+
+        assert len(calls) == 1
+        assert results == [{"posts": [1, 2, 3]}] * 5
+        assert flight.in_flight() == 0
+
+    def test_errors_propagate_to_caller(self):
+        flight = SingleFlight()
+
+        def failing():
+            raise ValueError("upstream down")
+
+        with pytest.raises(ValueError):
+            flight.do("key", failing)
+        assert flight.in_flight() == 0
+
+
+class TestDistributedLock:
+
+    def test_acquire_lock(self, redis_cache):
+        redis_cache.redis_client.set.return_value = True
+
+        token = redis_cache.acquire_lock("graphql:key", 15)
+
+        assert token is not None
+        redis_cache.redis_client.set.assert_called_once_with(
+            "lock:graphql:key", token, nx=True, px=15000
+        )
+
+    def test_acquire_lock_held_elsewhere(self, redis_cache):
+        redis_cache.redis_client.set.return_value = None
+
+        assert redis_cache.acquire_lock("graphql:key", 15) is None
+
+    def test_wait_for_returns_value_written_by_lock_holder(self, redis_cache):
+        redis_cache.redis_client.get.side_effect = [None, json.dumps({"id": 1})]
+        redis_cache.redis_client.exists.return_value = 1
+
+        assert redis_cache.wait_for("graphql:key", timeout=2) == {"id": 1}
+
+
+class TestTagInvalidation:
+
+    def test_set_records_tags(self, redis_cache):
+        pipe = redis_cache.redis_client.pipeline.return_value
+        pipe.execute.return_value = [True, 1, True]
+
+        assert redis_cache.set("graphql:key", {"id": 1}, ttl=300, tags=["articles"]) is True
+        pipe.setex.assert_called_once_with("graphql:key", 300, redis_cache._serialize_value({"id": 1}))
+        pipe.sadd.assert_called_once_with("tag:articles", "graphql:key")
+        pipe.expire.assert_called_once_with("tag:articles", 86400)
+
+    def test_invalidate_tags(self, redis_cache):
+        local_cache.set("graphql:a", 1, size=1)
+        local_cache.set("graphql:b", 2, size=1)
+        redis_cache.redis_client.eval.return_value = ["graphql:a"]
+
+        deleted = redis_cache.invalidate_tags("articles", "article:42")
+
+        assert deleted == 1
+        args = redis_cache.redis_client.eval.call_args[0]
+        assert args[1:] == (2, "tag:articles", "tag:article:42")
+        assert local_cache.get("graphql:a") is None
+        assert local_cache.get("graphql:b") == 2
+        payload = json.loads(redis_cache.redis_client.publish.call_args[0][1])
+        assert payload['keys'] == ["graphql:a"]
+
+    def test_decorator_fills_tag_templates(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = None
+
+            @cache_query(ttl=300, key_prefix="test", tags=("articles", "article:{article_id}", "page:{page}"))
+            def test_function(root, info, article_id, page=1):
+                return {"id": article_id}
+
+            test_function(None, None, article_id=42)
+
+            assert mock_cache_instance.set.call_args[1]['tags'] == ["articles", "article:42", "page:1"]
+
+
+class TestStaleWhileRevalidate:
+
+    def test_jittered_ttl_stays_within_bounds(self):
+        ttls = {_jittered(300, 0.1) for _ in range(200)}
+
+        assert all(270 <= ttl <= 330 for ttl in ttls)
+        assert len(ttls) > 1
+        assert _jittered(300, 0) == 300
+
+    def test_get_with_ttl(self, redis_cache):
+        pipe = redis_cache.redis_client.pipeline.return_value
+        pipe.execute.return_value = [json.dumps({"id": 1}), 120000]
+
+        value, remaining = redis_cache.get_with_ttl("key", stale_ttl=60)
+
+        assert value == {"id": 1}
+        assert remaining == 120.0
+        assert local_cache.get("key") == {"id": 1}
+
+    def test_stale_value_is_served_and_refreshed(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.background_refresher') as mock_refresher:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get_with_ttl.return_value = ({"stale": "data"}, 30)
+            fetch = Mock(return_value={"fresh": "data"})
+
+            @cache_query(ttl=300, key_prefix="test", stale_ttl=60)
+            def test_function(root, info):
+                return fetch()
+
+            result = test_function(None, None)
+
+            assert result == {"stale": "data"}
+            fetch.assert_not_called()
+            mock_refresher.schedule.assert_called_once()
+
+    def test_fresh_value_is_not_refreshed(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.background_refresher') as mock_refresher:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get_with_ttl.return_value = ({"cached": "data"}, 200)
+
+            @cache_query(ttl=300, key_prefix="test", stale_ttl=60)
+            def test_function(root, info):
+                return {"fresh": "data"}
+
+            assert test_function(None, None) == {"cached": "data"}
+            mock_refresher.schedule.assert_not_called()
+
+    def test_miss_stores_with_stale_window(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get_with_ttl.return_value = (None, None)
+
+            @cache_query(ttl=300, key_prefix="test", stale_ttl=60, ttl_jitter=0)
+            def test_function(root, info):
+                return {"fresh": "data"}
+
+            test_function(None, None)
+
+            args, kwargs = mock_cache_instance.set.call_args
+            assert args[2] == 360
+            assert kwargs['local_ttl'] == 300
+
+    def test_refresher_runs_each_key_once(self):
+        refresher = BackgroundRefresher(max_workers=1)
+        cache = MagicMock()
+        cache.acquire_lock.return_value = "token"
+        release = threading.Event()
+        compute = Mock(side_effect=lambda: release.wait(timeout=5))
+
+        assert refresher.schedule(cache, "key", compute) is True
+        assert refresher.schedule(cache, "key", compute) is False
+        release.set()
+        for _ in range(100):
+            if refresher.pending() == 0:
+                break
+            time.sleep(0.01)
+
+        compute.assert_called_once()
+        cache.release_lock.assert_called_once_with("key", "token")
+
+    def test_refresher_skips_when_another_replica_holds_lock(self):
+        refresher = BackgroundRefresher(max_workers=1)
+        cache = MagicMock()
+        cache.acquire_lock.return_value = None
+        compute = Mock()
+
+        refresher.schedule(cache, "key", compute)
+        for _ in range(100):
+            if refresher.pending() == 0:
+                break
+            time.sleep(0.01)
+
+        compute.assert_not_called()
+
+
 class TestCacheQueryDecorator:
     
     def test_cache_hit(self):
-        with patch('app.utils.cache.RedisCache') as MockCache:
-            mock_cache_instance = MagicMock()
-            mock_cache_instance.is_connected.return_value = True
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
             mock_cache_instance.get.return_value = {"cached": "data"}
-            MockCache.return_value = mock_cache_instance
             
             @cache_query(ttl=300, key_prefix="test")
             def test_function(root, info):
@@ -123,12 +687,10 @@ class TestCacheQueryDecorator:
             mock_cache_instance.set.assert_not_called()
     
     def test_cache_miss(self):
-        with patch('app.utils.cache.RedisCache') as MockCache:
-            mock_cache_instance = MagicMock()
-            mock_cache_instance.is_connected.return_value = True
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
             mock_cache_instance.get.return_value = None
             mock_cache_instance.set.return_value = True
-            MockCache.return_value = mock_cache_instance
             
             @cache_query(ttl=300, key_prefix="test")
             def test_function(root, info):
@@ -141,10 +703,8 @@ class TestCacheQueryDecorator:
             mock_cache_instance.set.assert_called_once()
     
     def test_cache_unavailable_executes_function(self):
-        with patch('app.utils.cache.RedisCache') as MockCache:
-            mock_cache_instance = MagicMock()
-            mock_cache_instance.is_connected.return_value = False
-            MockCache.return_value = mock_cache_instance
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = False
             
             @cache_query(ttl=300, key_prefix="test")
             def test_function(root, info):
@@ -156,13 +716,46 @@ class TestCacheQueryDecorator:
             mock_cache_instance.get.assert_not_called()
             mock_cache_instance.set.assert_not_called()
     
+    def test_waits_for_other_replica_instead_of_recomputing(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = None
+            mock_cache_instance.acquire_lock.return_value = None
+            mock_cache_instance.wait_for.return_value = {"from": "other replica"}
+            fetch = Mock(return_value={"fresh": "data"})
+
+            @cache_query(ttl=300, key_prefix="test")
+            def test_function(root, info):
+                return fetch()
+
+            result = test_function(None, None)
+
+            assert result == {"from": "other replica"}
+            fetch.assert_not_called()
+            mock_cache_instance.release_lock.assert_not_called()
+
+    def test_local_hit_skips_redis(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            local_cache.set(
+                build_query_key("test", None, {}, default_field="test_function"),
+                {"cached": "locally"}, size=10
+            )
+
+            @cache_query(ttl=300, key_prefix="test")
+            def test_function(root, info):
+                return {"fresh": "data"}
+
+            result = test_function(None, None)
+
+            assert result == {"cached": "locally"}
+            mock_cache_instance.is_available.assert_not_called()
+            mock_cache_instance.get.assert_not_called()
+
     def test_decorator_with_arguments(self):
-        with patch('app.utils.cache.RedisCache') as MockCache:
-            mock_cache_instance = MagicMock()
-            mock_cache_instance.is_connected.return_value = True
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
             mock_cache_instance.get.return_value = None
             mock_cache_instance.set.return_value = True
-            MockCache.return_value = mock_cache_instance
             
             @cache_query(ttl=300, key_prefix="test")
             def test_function(root, info, post_id, limit=10):
@@ -174,6 +767,592 @@ class TestCacheQueryDecorator:
             mock_cache_instance.set.assert_called_once()
 
 
+class TestCachePolicies:
+
+    settings = {
+        'CACHE_DEFAULT_TTL': 120,
+        'CACHE_ADAPTIVE_MIN_TTL': 30,
+        'CACHE_ADAPTIVE_MAX_TTL': 3600,
+        'CACHE_POLICIES': {
+            'team': {'ttl': 600, 'local': False, 'compression': 'none'},
+            'wp_posts': {'ttl': 300, 'stale_ttl': 60}
+        }
+    }
+
+    def test_policy_lookup_and_default(self):
+        registry = CachePolicyRegistry(self.settings)
+
+        assert registry.get('wp_posts').stale_ttl == 60
+        assert registry.get('team').local is False
+        assert registry.ttl_for('unknown') == 120
+
+    def test_adaptive_ttl_follows_change_rate(self):
+        registry = CachePolicyRegistry({**self.settings, 'CACHE_ADAPTIVE_TTL': True})
+
+        with patch('app.utils.cache_policy.time.monotonic') as clock:
+            clock.return_value = 0
+            registry.reset()
+
+            # Quiet content only ever gets longer TTLs.
+            clock.return_value = 4000
+            assert registry.ttl_for('team') == 2000
+
+            # Content invalidated every ten seconds drops to the floor.
+            for now in (4010, 4020, 4030, 4040, 4050, 4060, 4070):
+                clock.return_value = now
+                registry.record_invalidation(['wp_posts'])
+            assert registry.ttl_for('wp_posts') == 30
+
+    def test_non_local_prefix_skips_l1(self, redis_cache):
+        redis_cache.policies = CachePolicyRegistry(self.settings)
+        redis_cache.redis_client.setex.return_value = True
+
+        redis_cache.set("graphql:team:abc", [{"name": "Ann"}])
+        redis_cache.set("graphql:articles:abc", [{"title": "Hello"}])
+
+        assert local_cache.get("graphql:team:abc") is None
+        assert local_cache.get("graphql:articles:abc") == [{"title": "Hello"}]
+
+    def test_decorator_uses_policy_ttl(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.cache_policies', CachePolicyRegistry(self.settings)):
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get_with_ttl.return_value = (None, None)
+            mock_cache_instance.acquire_lock.return_value = "token"
+
+            @cache_query(key_prefix="wp_posts", ttl_jitter=0)
+            def test_function(root, info):
+                return [{"title": "Hello"}]
+
+            test_function(None, None)
+
+            args, kwargs = mock_cache_instance.set.call_args
+            assert args[2] == 360
+            assert kwargs['local_ttl'] == 300
+
+
+class TestCacheHydration:
+
+    def test_hydrates_payload_into_read_only_record(self):
+        from app.models import Article
+
+        record = hydrator_for(Article)({
+            'id': 3, 'title': "Hello", 'content': "World", 'author': "Ann",
+            'published_date': None, 'created_at': "2024-05-01T12:30:15",
+            'updated_at': "2024-05-02T08:00:00"
+        })
+
+        assert is_cached_instance(record, Article)
+        assert record.title == "Hello"
+        assert record.created_at == datetime(2024, 5, 1, 12, 30, 15)
+        with pytest.raises(AttributeError):
+            record.title = "Changed"
+
+    def test_round_trips_through_to_dict(self):
+        from app.models import TeamMember
+
+        payload = {
+            'id': 1, 'name': "Ann", 'job_title': "Editor", 'bio': None,
+            'created_at': "2024-05-01T12:30:15", 'updated_at': "2024-05-01T12:30:15"
+        }
+        records = Hydrator(TeamMember)([payload])
+
+        assert isinstance(records[0], CachedRecord)
+        assert records[0].to_dict() == payload
+
+    def test_decorator_hydrates_hits(self):
+        from app.models import Product
+
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = [{'id': 1, 'name': "Mug", 'price': 9.5}]
+
+            @cache_query(ttl=300, key_prefix="test", model=Product)
+            def test_function(root, info):
+                return []
+
+            result = test_function(None, None)
+
+        assert is_cached_instance(result[0], Product)
+        assert result[0].price == 9.5
+        assert result[0].sku is None
+
+
+class TestMultiKey:
+
+    def test_get_many_returns_partial_hits(self, redis_cache):
+        local_cache.set("graphql:test:a", {"id": "a"}, size=10)
+        redis_cache.redis_client.mget.return_value = [redis_cache._serialize_value({"id": "b"}), None]
+
+        found = redis_cache.get_many(["graphql:test:a", "graphql:test:b", "graphql:test:c"])
+
+        assert found == {"graphql:test:a": {"id": "a"}, "graphql:test:b": {"id": "b"}}
+        redis_cache.redis_client.mget.assert_called_once_with(["graphql:test:b", "graphql:test:c"])
+        assert local_cache.get("graphql:test:b") == {"id": "b"}
+
+    def test_get_many_survives_redis_errors(self, redis_cache):
+        redis_cache.redis_client.mget.side_effect = redis.ConnectionError("down")
+
+        assert redis_cache.get_many(["graphql:test:a"]) == {}
+
+    def test_set_many_pipelines_with_per_key_tags(self, redis_cache):
+        pipe = redis_cache.redis_client.pipeline.return_value
+
+        stored = redis_cache.set_many(
+            {"graphql:test:1": {"id": 1}, "graphql:test:2": {"id": 2}},
+            ttl=60, tags={"graphql:test:1": ["article:1"], "graphql:test:2": ["article:2"]}
+        )
+
+        assert stored == 2
+        assert pipe.setex.call_count == 2
+        pipe.sadd.assert_any_call("tag:article:2", "graphql:test:2")
+        pipe.execute.assert_called_once()
+        redis_cache.redis_client.setex.assert_not_called()
+        assert local_cache.get("graphql:test:1") == {"id": 1}
+
+    def test_delete_many(self, redis_cache):
+        local_cache.set("graphql:test:1", {"id": 1}, size=10)
+        redis_cache.redis_client.unlink.return_value = 2
+
+        assert redis_cache.delete_many(["graphql:test:1", "graphql:test:2"]) == 2
+        redis_cache.redis_client.unlink.assert_called_once_with("graphql:test:1", "graphql:test:2")
+        assert local_cache.get("graphql:test:1") is None
+
+
+class TestMemoryBudget:
+
+    def test_oversized_value_is_compressed_to_fit(self, redis_cache):
+        redis_cache.max_value_bytes = 4096
+        redis_cache.compression = cache_codec.COMPRESSION_NONE
+        redis_cache.redis_client.setex.return_value = True
+
+        assert redis_cache.set("graphql:test:big", {"content": "a" * 20000}) is True
+
+        stored = redis_cache.redis_client.setex.call_args[0][2]
+        assert len(stored) <= 4096
+        assert decode_value(stored) == {"content": "a" * 20000}
+
+    def test_value_over_budget_is_skipped(self, redis_cache):
+        redis_cache.max_value_bytes = 1024
+        cache_stats.reset()
+
+        assert redis_cache.set("graphql:test:big", {"content": os.urandom(4096).hex()}) is False
+        assert redis_cache.set_raw("graphql:response:big", b"x" * 2048) is False
+
+        redis_cache.redis_client.setex.assert_not_called()
+        assert local_cache.get("graphql:test:big") is None
+        assert cache_stats.snapshot()["test"]["oversized"] == 1
+        cache_stats.reset()
+
+    def test_memory_report_groups_by_prefix(self, redis_cache):
+        redis_cache.redis_client.scan_iter.return_value = iter([
+            b"graphql:wp_posts:a", b"cache:stats:prefixes", b"graphql:wp_posts:b", b"entity:team:c"
+        ])
+        redis_cache.redis_client.pipeline.return_value.execute.return_value = [
+            5000, 12, 70000, 3, 800, redis.ResponseError("no LFU")
+        ]
+        redis_cache.redis_client.dbsize.return_value = 3
+
+        report = redis_cache.memory_report(sample=100, top=1)
+
+        assert report['sampled'] == 3
+        assert report['complete'] is True
+        assert report['pattern'] == ['graphql:*', 'entity:*', 'response:*', 'tag:*']
+        assert list(report['prefixes']) == ["wp_posts", "entity:team"]
+        wp_posts = report['prefixes']["wp_posts"]
+        assert wp_posts['bytes'] == 75000
+        assert wp_posts['biggest'] == [{'key': "graphql:wp_posts:b", 'bytes': 70000}]
+        assert wp_posts['hottest'][0]['key'] == "graphql:wp_posts:a"
+        assert report['prefixes']["entity:team"]['hottest'] == []
+
+
+class TestEntityCache:
+
+    def test_put_many_writes_one_entry_per_entity(self):
+        mock_cache = MagicMock()
+        entities = EntityCache(mock_cache, CachePolicyRegistry({'CACHE_POLICIES': {'entity:article': {'ttl': 900}}}))
+
+        ids = entities.put_many("article", [{"id": 1}, {"id": 2}], tags=("articles",))
+
+        assert ids == [1, 2]
+        mapping, ttl = mock_cache.set_many.call_args[0]
+        assert mapping == {"entity:article:1": {"id": 1}, "entity:article:2": {"id": 2}}
+        assert ttl == 900
+        assert mock_cache.set_many.call_args[1]['tags']["entity:article:2"] == ["article:2", "articles"]
+
+    def test_put_many_refuses_items_without_ids(self):
+        mock_cache = MagicMock()
+        entities = EntityCache(mock_cache, CachePolicyRegistry())
+
+        assert entities.put_many("wp_post", [{"databaseId": 1}, {"title": "x"}], id_field="databaseId") is None
+        mock_cache.set_many.assert_not_called()
+
+    def test_assemble_reloads_only_missing_entities(self):
+        mock_cache = MagicMock()
+        mock_cache.get_many.return_value = {"entity:article:1": {"id": 1}, "entity:article:3": AbsentMarker()}
+        loader = Mock(return_value=[{"id": 3}])
+        entities = EntityCache(mock_cache, CachePolicyRegistry())
+
+        assert entities.assemble("article", [3, 1], loader=loader) == [{"id": 3}, {"id": 1}]
+        loader.assert_called_once_with([3])
+        assert list(mock_cache.set_many.call_args[0][0]) == ["entity:article:3"]
+
+    def test_assemble_without_loader_is_a_miss(self):
+        mock_cache = MagicMock()
+        mock_cache.get_many.return_value = {"entity:wp_post:1": {"databaseId": 1}}
+        entities = EntityCache(mock_cache, CachePolicyRegistry())
+
+        assert entities.assemble("wp_post", [1, 2], id_field="databaseId") is None
+
+    def test_list_resolver_caches_ids_and_entities(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.entity_cache') as mock_entities:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = None
+            mock_cache_instance.acquire_lock.return_value = "token"
+            mock_entities.put_many.return_value = [1, 2]
+
+            @cache_query(key_prefix="test", entity="article")
+            def test_function(root, info):
+                return [{"id": 1}, {"id": 2}]
+
+            assert test_function(None, None) == [{"id": 1}, {"id": 2}]
+            mock_entities.put_many.assert_called_once_with("article", [{"id": 1}, {"id": 2}], 'id')
+            assert mock_cache_instance.set.call_args[0][1] == [1, 2]
+
+    def test_list_hit_with_evicted_entity_recomputes(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.entity_cache') as mock_entities:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = [1, 2]
+            mock_cache_instance.acquire_lock.return_value = "token"
+            mock_entities.assemble.return_value = None
+            mock_entities.put_many.return_value = [1, 2]
+
+            @cache_query(key_prefix="test", entity="wp_post")
+            def test_function(root, info):
+                return [{"id": 1}, {"id": 2}]
+
+            assert test_function(None, None) == [{"id": 1}, {"id": 2}]
+            mock_entities.put_many.assert_called_once()
+
+    def test_single_item_resolver_uses_entity_key(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = {"id": 5, "name": "cached"}
+
+            @cache_query(key_prefix="test", entity="product", entity_id="product_id")
+            def test_function(root, info, product_id):
+                return {"id": product_id}
+
+            assert test_function(None, None, product_id=5) == {"id": 5, "name": "cached"}
+            mock_cache_instance.get.assert_called_once_with(entity_key("product", 5))
+
+
+class TestCacheSnapshot:
+
+    def write_snapshot(self, path, values, pttl=60000):
+        snapshot = CacheSnapshot(lambda limit: list(values), path=str(path))
+        for key in values:
+            snapshot.note_write(key, [f"tag:{key}"])
+        client = MagicMock()
+        client.time.return_value = (int(time.time()), 0)
+        results = []
+        for value in values.values():
+            results.extend([value, pttl])
+        client.pipeline.return_value.execute.return_value = results
+        assert snapshot.flush(client) is True
+        return CacheSnapshot(lambda limit: [], path=str(path))
+
+    def test_round_trip_restores_bytes_ttl_and_tags(self, tmp_path):
+        restored = self.write_snapshot(tmp_path / "snap", {"graphql:a:1": b"one", "graphql:b:2": b"two"})
+
+        value, remaining, tags = restored.take("graphql:b:2")
+        assert value == b"two"
+        assert 55 <= remaining <= 60
+        assert tags == ("tag:graphql:b:2",)
+        assert restored.take("graphql:b:2") is None
+
+    def test_expired_and_invalidated_entries_are_dropped(self, tmp_path):
+        restored = self.write_snapshot(tmp_path / "snap", {"graphql:a:1": b"one", "graphql:b:2": b"two"}, pttl=500)
+        assert restored.take("graphql:a:1") is None
+
+        restored = self.write_snapshot(tmp_path / "snap", {"graphql:a:1": b"one", "graphql:b:2": b"two"})
+        restored.discard_tags(["tag:graphql:a:1"])
+        restored.note_write("graphql:b:2", [])
+        assert restored.take("graphql:a:1") is None
+        assert restored.take("graphql:b:2") is None
+
+    def test_only_keys_with_known_tags_are_saved(self, tmp_path):
+        snapshot = CacheSnapshot(lambda limit: ["graphql:a:1", "graphql:b:2"], path=str(tmp_path / "snap"))
+        snapshot.note_write("graphql:a:1", ())
+        client = MagicMock()
+        client.time.return_value = (int(time.time()), 0)
+        client.pipeline.return_value.execute.return_value = [b"one", 60000]
+
+        snapshot.flush(client)
+
+        client.pipeline.return_value.get.assert_called_once_with("graphql:a:1")
+        assert CacheSnapshot(lambda limit: [], path=str(tmp_path / "snap")).take("graphql:a:1")[0] == b"one"
+
+    def test_missing_or_corrupt_file_is_ignored(self, tmp_path):
+        (tmp_path / "corrupt").write_bytes(b"not a snapshot")
+
+        assert CacheSnapshot(lambda limit: [], path=str(tmp_path / "missing")).take("k") is None
+        assert CacheSnapshot(lambda limit: [], path=str(tmp_path / "corrupt")).take("k") is None
+
+    def test_redis_miss_is_served_from_snapshot_and_written_back(self, redis_cache, tmp_path):
+        payload = redis_cache._serialize_value({"id": 1})
+        redis_cache.snapshot = self.write_snapshot(tmp_path / "snap", {"graphql:test:1": payload})
+        redis_cache.redis_client.get.return_value = None
+        redis_cache.redis_client.eval.return_value = 1
+        pipe = redis_cache.redis_client.pipeline.return_value
+
+        assert redis_cache.get("graphql:test:1") == {"id": 1}
+        assert pipe.setex.call_args[0][0] == "graphql:test:1"
+        assert pipe.setex.call_args[0][2] == payload
+        pipe.sadd.assert_called_once_with("tag:tag:graphql:test:1", "graphql:test:1")
+
+    def test_entry_invalidated_since_snapshot_is_not_restored(self, redis_cache, tmp_path):
+        from app.utils.cache_snapshot import CHECK_CURRENT_SCRIPT
+
+        payload = redis_cache._serialize_value({"id": 1})
+        redis_cache.snapshot = self.write_snapshot(tmp_path / "snap", {"graphql:test:1": payload})
+        redis_cache.redis_client.get.return_value = None
+        redis_cache.redis_client.eval.return_value = 0
+
+        assert redis_cache.get("graphql:test:1") is None
+        args = redis_cache.redis_client.eval.call_args[0]
+        assert args[0] == CHECK_CURRENT_SCRIPT
+        assert args[-2:] == ("key:graphql:test:1", "tag:tag:graphql:test:1")
+        redis_cache.redis_client.pipeline.return_value.setex.assert_not_called()
+
+    def test_discards_survive_reload_until_next_flush(self, tmp_path):
+        restored = self.write_snapshot(tmp_path / "snap", {"graphql:a:1": b"one", "graphql:b:2": b"two"})
+        restored.discard_tags(["tag:graphql:a:1"])
+
+        restored.reload()
+
+        assert restored.take("graphql:a:1") is None
+        assert restored.take("graphql:b:2")[0] == b"two"
+
+    def test_invalidations_are_recorded_with_the_delete(self, redis_cache, tmp_path):
+        from app.utils.cache_snapshot import RECORD_INVALIDATION_SCRIPT
+
+        redis_cache.snapshot = CacheSnapshot(lambda limit: [], path=str(tmp_path / "snap"))
+        pipe = redis_cache.redis_client.pipeline.return_value
+        pipe.execute.return_value = [[b"graphql:a:1"], 1]
+
+        assert redis_cache.invalidate_tags("article:1") == 1
+
+        redis_cache.redis_client.pipeline.assert_called_with()
+        record = pipe.eval.call_args_list[-1][0]
+        assert record[0] == RECORD_INVALIDATION_SCRIPT
+        assert record[-1] == "tag:article:1"
+
+
+
+class TestNegativeCaching:
+
+    def test_absent_marker_round_trips_and_differs_from_empty(self):
+        marker = AbsentMarker('error', "timeout", fallback=[])
+
+        assert decode_value(cache_codec.encode_absent(marker)) == marker
+        assert decode_value(encode_value([])) == []
+        assert decode_value(cache_codec.encode_absent(AbsentMarker())) != []
+
+    def test_none_result_is_cached_as_missing(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = None
+            mock_cache_instance.acquire_lock.return_value = "token"
+
+            @cache_query(key_prefix="test", tags=("post:{post_id}",))
+            def test_function(root, info, post_id):
+                return None
+
+            assert test_function(None, None, post_id=7) is None
+
+            args, kwargs = mock_cache_instance.set.call_args
+            assert args[1] == AbsentMarker('missing')
+            assert args[2] == 30
+            assert kwargs['tags'] == ["post:7"]
+
+    def test_cached_not_found_raises_without_calling_resolver(self):
+        fetch = Mock()
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = AbsentMarker('missing', "Product not found")
+
+            @cache_query(key_prefix="test")
+            def test_function(root, info, product_id):
+                return fetch()
+
+            with pytest.raises(ContentNotFound, match="Product not found"):
+                test_function(None, None, product_id=999)
+            fetch.assert_not_called()
+
+    def test_upstream_error_serves_fallback_and_is_cached_briefly(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.return_value = None
+            mock_cache_instance.acquire_lock.return_value = "token"
+
+            @cache_query(key_prefix="test")
+            def test_function(root, info):
+                raise UpstreamError("WordPress timed out", fallback=[])
+
+            assert test_function(None, None) == []
+
+            args = mock_cache_instance.set.call_args[0]
+            assert args[1] == AbsentMarker('error', "WordPress timed out", [])
+            assert args[2] == 10
+
+    def test_negative_entry_is_not_refreshed_in_background(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.background_refresher') as mock_refresher:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get_with_ttl.return_value = (AbsentMarker('missing'), 5)
+
+            @cache_query(key_prefix="test", stale_ttl=300)
+            def test_function(root, info):
+                return {"fresh": "data"}
+
+            assert test_function(None, None) is None
+            mock_refresher.schedule.assert_not_called()
+
+
+class TestCacheWarmup:
+
+    def test_recorder_flushes_counts_and_trims(self):
+        recorder = WarmupRecorder(tracked=100)
+        recorder.record("articles", "QueryType", "articles", {"limit": 10, "offset": 0})
+        recorder.record("articles", "QueryType", "articles", {"offset": 0, "limit": 10})
+        client = MagicMock()
+        pipe = client.pipeline.return_value
+
+        recorder.flush(client)
+
+        pipe.zincrby.assert_called_once()
+        assert pipe.zincrby.call_args[0][1] == 2
+        pipe.zremrangebyrank.assert_called_once_with(WARMUP_KEY, 0, -101)
+
+    def test_decorator_records_real_calls_only(self):
+        with patch('app.utils.cache.cache') as mock_cache_instance, \
+             patch('app.utils.cache.warmup_recorder') as mock_recorder:
+            mock_cache_instance.is_available.return_value = False
+
+            @cache_query(key_prefix="test")
+            def test_function(root, info, limit=10):
+                return []
+
+            real_info = Mock(field_name="articles", warmup=False)
+            real_info.parent_type.name = "QueryType"
+            test_function(None, real_info, limit=5)
+            test_function(None, WarmupInfo("QueryType", "articles", {}), limit=5)
+
+        mock_recorder.record.assert_called_once_with("test", "QueryType", "articles", {"limit": 5})
+
+    def test_warmup_replays_top_entries(self, app):
+        recorder = Mock()
+        recorder.top.return_value = [
+            {'p': "articles", 't': "QueryType", 'f': "articles", 'a': {"limit": 10}, 'score': 9},
+            {'p': "wp_posts", 't': "QueryType", 'f': "wordpressPosts", 'a': {"limit": 5}, 'score': 4},
+            {'p': "retired", 't': "QueryType", 'f': "gone", 'a': {}, 'score': 1},
+        ]
+        warmer = CacheWarmer(MagicMock(), recorder, max_workers=2, rate=0, throttled_prefixes=["wp_posts"])
+        articles, wp_posts = Mock(), Mock(side_effect=RuntimeError("upstream down"))
+        warmer.register("articles", articles)
+        warmer.register("wp_posts", wp_posts)
+
+        status = warmer.run(app, trigger='startup')
+
+        assert status['total'] == 2
+        assert status['completed'] == 1
+        assert status['failed'] == 1
+        root, info = articles.call_args[0]
+        assert articles.call_args[1] == {"limit": 10}
+        assert info.parent_type.name == "QueryType"
+        assert info.field_name == "articles"
+        assert 'WORDPRESS_GRAPHQL_URL' in info.context
+
+    def test_warmup_key_matches_request_key(self):
+        real_info = Mock(field_name="articles", field_nodes=None)
+        real_info.parent_type.name = "QueryType"
+
+        assert build_query_key("articles", real_info, {"limit": 10}) == \
+            build_query_key("articles", WarmupInfo("QueryType", "articles", {}), {"limit": 10})
+
+
+class TestCacheStats:
+
+    def test_key_prefix(self):
+        assert key_prefix("graphql:wp_posts:abc123") == "wp_posts"
+        assert key_prefix("tag:articles") == "other"
+
+    def test_summary_rates_and_percentiles(self):
+        stats = CacheStats()
+        stats.incr("wp_posts", "hits", 3)
+        stats.incr("wp_posts", "misses")
+        stats.observe_recompute("wp_posts", 0.004)
+        stats.observe_recompute("wp_posts", 0.2)
+
+        summary = stats.snapshot()["wp_posts"]
+
+        assert summary["hit_rate"] == 75.0
+        assert summary["recomputes"] == 2
+        assert summary["recompute_p50_ms"] == 5
+        assert summary["recompute_p95_ms"] == 250
+
+    def test_flush_aggregates_into_redis(self):
+        stats = CacheStats()
+        stats.incr("articles", "hits", 2)
+        client = MagicMock()
+        pipe = client.pipeline.return_value
+
+        assert stats.flush(client) is True
+        pipe.sadd.assert_called_once_with("cache:stats:prefixes", "articles")
+        pipe.hincrby.assert_called_once_with("cache:stats:articles", "hits", 2)
+
+        # Nothing new to send on the next flush.
+        client.reset_mock()
+        stats.flush(client)
+        client.pipeline.assert_not_called()
+
+    def test_failed_flush_keeps_pending_counts(self):
+        stats = CacheStats()
+        stats.incr("articles", "misses")
+        client = MagicMock()
+        client.pipeline.return_value.execute.side_effect = redis.ConnectionError("down")
+
+        assert stats.flush(client) is False
+
+        client.pipeline.return_value.execute.side_effect = None
+        stats.flush(client)
+        client.pipeline.return_value.hincrby.assert_called_with("cache:stats:articles", "misses", 1)
+
+    def test_decorator_records_hits_and_misses(self):
+        cache_stats.reset()
+        with patch('app.utils.cache.cache') as mock_cache_instance:
+            mock_cache_instance.is_available.return_value = True
+            mock_cache_instance.get.side_effect = [None, {"cached": "data"}]
+            mock_cache_instance.acquire_lock.return_value = "token"
+
+            @cache_query(ttl=300, key_prefix="stats_test")
+            def test_function(root, info):
+                return {"fresh": "data"}
+
+            test_function(None, None)
+            local_cache.clear()
+            test_function(None, None)
+
+        summary = cache_stats.snapshot()["stats_test"]
+        assert summary["misses"] == 1
+        assert summary["hits"] == 1
+        assert summary["recomputes"] == 1
+        cache_stats.reset()
+
+
 @pytest.fixture
 def app():
    
@@ -239,4 +1418,79 @@ class TestCacheEndpoints:
                 data = response.get_json()
                 assert data['success'] is True
 
+    def test_list_keys_is_cursor_paginated(self, app):
+
+        app.config['ADMIN_TOKEN'] = 'test-token'
+
+        with app.test_client() as client:
+            with patch('app.routes.cache.cache.scan_keys', return_value=(42, ["graphql:a"])) as mock_scan, \
+                 patch('app.routes.cache.cache.describe_keys', return_value=[
+                     {'key': "graphql:a", 'ttl': 120, 'type': "string", 'memory_bytes': 512}
+                 ]):
+                response = client.get(
+                    '/api/cache/keys?cursor=7&count=50',
+                    headers={'Authorization': 'Bearer test-token'}
+                )
+
+                assert response.status_code == 200
+                data = response.get_json()
+                assert data['cursor'] == 42
+                assert data['complete'] is False
+                assert data['keys'][0]['expires_in'] == '120s'
+                mock_scan.assert_called_once_with(None, cursor=7, count=50)
+
+    def test_invalidate_by_tags(self, app):
+
+        app.config['ADMIN_TOKEN'] = 'test-token'
+
+        with app.test_client() as client:
+            with patch('app.routes.cache.cache.invalidate_tags', return_value=2) as mock_invalidate:
+                response = client.post(
+                    '/api/cache/invalidate',
+                    json={'tags': ['articles', 'article:42']},
+                    headers={'Authorization': 'Bearer test-token'}
+                )
+
+                assert response.status_code == 200
+                assert response.get_json()['deleted_count'] == 2
+                mock_invalidate.assert_called_once_with('articles', 'article:42')
+
+    def test_cache_analytics(self, app):
+
+        app.config['ADMIN_TOKEN'] = 'test-token'
+
+        with app.test_client() as client:
+            with patch('app.routes.cache.cache.is_available', return_value=True), \
+                 patch('app.routes.cache.cache_stats.flush') as mock_flush, \
+                 patch('app.routes.cache.cache_stats.cluster_snapshot', return_value={'articles': {'hits': 5}}):
+                response = client.get(
+                    '/api/cache/analytics',
+                    headers={'Authorization': 'Bearer test-token'}
+                )
+
+                assert response.status_code == 200
+                data = response.get_json()
+                assert data['cluster'] == {'articles': {'hits': 5}}
+                assert 'local' in data
+                mock_flush.assert_called_once()
+
+    def test_warmup_starts_in_background(self, app):
+
+        app.config['ADMIN_TOKEN'] = 'test-token'
+
+        with app.test_client() as client:
+            with patch('app.routes.cache.cache_warmer.start', return_value=True) as mock_start, \
+                 patch('app.routes.cache.cache_warmer.status', return_value={'state': 'running'}):
+                response = client.post(
+                    '/api/cache/warmup',
+                    json={'limit': 50},
+                    headers={'Authorization': 'Bearer test-token'}
+                )
+                status = client.get(
+                    '/api/cache/warmup/status',
+                    headers={'Authorization': 'Bearer test-token'}
+                )
 
+                assert response.status_code == 202
+                assert mock_start.call_args[1]['limit'] == 50
+                assert status.get_json()['state'] == 'running'
@@ -1,5 +1,8 @@
 import pytest
+import requests
+from unittest.mock import patch, MagicMock
 from app import create_app
+from app.wordpress_client import WordPressGraphQLClient, wordpress_client, shared_session
 
 @pytest.fixture
 def app():
@@ -36,4 +39,637 @@ def test_query_single_product_not_found(app):
         data = response.get_json()
       
         assert 'errors' in data
-        assert 'not found' in data['errors'][0]['message'].lower()
\ No newline at end of file
+        assert 'not found' in data['errors'][0]['message'].lower()
+
+def test_update_article_invalidates_tags(app):
+    with app.test_client() as client:
+        headers = {'Authorization': 'Bearer test-token'}
+        with patch('app.graphql.resolvers.cache.invalidate_tags') as mock_invalidate:
+            client.post('/graphql', json={
+                'query': 'mutation { createArticle(title: "Hello", content: "World") { success article { id } } }'
+            }, headers=headers)
+            response = client.post('/graphql', json={
+                'query': 'mutation { updateArticle(articleId: 1, title: "Updated") { success } }'
+            }, headers=headers)
+
+        assert response.get_json()['data']['updateArticle']['success'] is True
+        mock_invalidate.assert_called_with('article:1', 'articles:content')
+
+
+def test_identical_queries_share_cache_key(app):
+    upstream = MagicMock()
+    upstream.json.return_value = {'data': {'posts': {'nodes': [{'title': 'Hello'}]}}}
+
+    with app.test_client() as client, \
+         patch('app.utils.cache.cache') as mock_cache, \
+         patch('app.wordpress_client.requests.Session.post', return_value=upstream):
+        mock_cache.is_available.return_value = True
+        mock_cache.get_with_ttl.return_value = (None, None)
+        headers = {'Authorization': 'Bearer test-token'}
+
+        client.post('/graphql', json={'query': '{ wordpressPosts(limit: 5) { title } }'}, headers=headers)
+        client.post('/graphql', json={
+            'query': 'query Posts($limit: Int) {\n  wordpressPosts(limit: $limit) { title __typename }\n}',
+            'variables': {'limit': 5}
+        }, headers=headers)
+        client.post('/graphql', json={'query': '{ wordpressPosts(limit: 6) { title } }'}, headers=headers)
+        client.post('/graphql', json={'query': '{ wordpressPosts(limit: 5) { title date } }'}, headers=headers)
+
+        keys = [call[0][0] for call in mock_cache.get_with_ttl.call_args_list]
+        assert len(keys) == 4
+        assert keys[0] == keys[1]
+        assert keys[0] != keys[2]
+        assert keys[0] != keys[3]
+
+
+def test_wordpress_posts_query_only_selected_fields(app):
+    upstream = _upstream(200, {'data': {'posts': {'nodes': [{'databaseId': 1, 'title': 'Hello', 'date': 'today'}]}}})
+
+    with app.test_client() as client, \
+         patch('app.utils.cache.cache') as mock_cache, \
+         patch('app.wordpress_client.requests.Session.post', return_value=upstream) as mock_post:
+        mock_cache.is_available.return_value = False
+        headers = {'Authorization': 'Bearer test-token'}
+
+        light = client.post('/graphql', json={'query': '{ wordpressPosts { title date } }'}, headers=headers)
+        light_query = mock_post.call_args[1]['json']['query']
+        client.post('/graphql', json={
+            'query': '{ wordpressPosts { id databaseId title content excerpt date authorName } }'
+        }, headers=headers)
+        full_query = mock_post.call_args[1]['json']['query']
+
+    assert light.get_json()['data']['wordpressPosts'] == [{'title': 'Hello', 'date': 'today'}]
+    assert 'databaseId' in light_query and 'title' in light_query
+    assert 'content' not in light_query and 'author' not in light_query
+    assert 'content' in full_query and 'author' in full_query
+
+
+def test_response_cache_stores_anonymous_query(app):
+    app.config['GRAPHQL_RESPONSE_CACHE'] = True
+
+    with app.test_client() as client, \
+         patch('app.utils.response_cache.cache') as mock_cache:
+        mock_cache.is_available.return_value = True
+        mock_cache.get_raw.return_value = None
+        headers = {'Authorization': 'Bearer test-token'}
+
+        response = client.post('/graphql', json={'query': '{ article(articleId: 7) { title } articles { title } }'}, headers=headers)
+
+        assert response.headers['X-Cache'] == 'MISS'
+        key, body = mock_cache.set_raw.call_args[0]
+        assert key.startswith('graphql:response:')
+        assert body == response.get_data()
+        assert mock_cache.set_raw.call_args[1]['tags'] == ('article:7', 'articles', 'articles:content')
+
+
+def test_response_cache_hit_skips_execution(app):
+    app.config['GRAPHQL_RESPONSE_CACHE'] = True
+
+    with app.test_client() as client, \
+         patch('app.utils.response_cache.cache') as mock_cache, \
+         patch('app.graphql.resolvers.Article') as mock_article:
+        mock_cache.is_available.return_value = True
+        mock_cache.get_raw.return_value = b'{"data":{"articles":[{"title":"Cached"}]}}'
+        headers = {'Authorization': 'Bearer test-token'}
+
+        response = client.post('/graphql', json={'query': '{ articles { title } }'}, headers=headers)
+
+        assert response.headers['X-Cache'] == 'HIT'
+        assert response.get_json()['data']['articles'][0]['title'] == 'Cached'
+        mock_article.query.assert_not_called()
+
+
+def test_response_cache_ignores_mutations(app):
+    app.config['GRAPHQL_RESPONSE_CACHE'] = True
+
+    with app.test_client() as client, \
+         patch('app.utils.response_cache.cache') as mock_cache:
+        headers = {'Authorization': 'Bearer test-token'}
+
+        response = client.post('/graphql', json={
+            'query': 'mutation { createArticle(title: "Hello", content: "World") { success } }'
+        }, headers=headers)
+
+        assert 'X-Cache' not in response.headers
+        mock_cache.get_raw.assert_not_called()
+        mock_cache.set_raw.assert_not_called()
+
+
+def test_response_cache_key_normalizes_document(app):
+    from app.utils.response_cache import build_plan
+
+    def plan_for(payload):
+        with app.test_request_context('/graphql', method='POST', json=payload,
+                                      headers={'Authorization': 'Bearer test-token'}):
+            return build_plan()
+
+    first = plan_for({'query': 'query Posts($limit: Int) { wordpressPosts(limit: $limit) { title } }',
+                      'variables': {'limit': 5}})
+    reformatted = plan_for({'query': 'query Posts($limit: Int) {\n  wordpressPosts(limit: $limit) {\n    title\n  }\n}',
+                            'variables': {'limit': 5}})
+    other_variables = plan_for({'query': 'query Posts($limit: Int) { wordpressPosts(limit: $limit) { title } }',
+                                'variables': {'limit': 6}})
+
+    assert first.key == reformatted.key
+    assert first.key != other_variables.key
+    assert first.tags == ('wp_posts', 'wp_posts:content')
+
+
+def test_cache_hit_matches_miss_response(app):
+    from app.models import Article
+    from app.utils.cache import entity_cache
+
+    query = '{ articles { id title author publishedDate createdAt updatedAt } }'
+    headers = {'Authorization': 'Bearer test-token'}
+
+    with app.test_client() as client:
+        client.post('/graphql', json={
+            'query': 'mutation { createArticle(title: "Hello", content: "World", author: "Ann") { success } }'
+        }, headers=headers)
+        miss = client.post('/graphql', json={'query': query}, headers=headers).get_json()
+
+        with app.app_context():
+            payload = {f"entity:article:{article.id}": article.to_dict() for article in Article.query.all()}
+
+        with patch('app.utils.cache.cache') as mock_cache, \
+             patch.object(entity_cache, 'cache', mock_cache):
+            mock_cache.is_available.return_value = True
+            mock_cache.get.return_value = [int(key.rsplit(':', 1)[1]) for key in payload]
+            mock_cache.get_many.return_value = payload
+            hit = client.post('/graphql', json={'query': query}, headers=headers).get_json()
+
+    assert 'errors' not in hit
+    assert hit == miss
+
+
+def _upstream(status_code, body=None):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = body or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return response
+
+
+def test_wordpress_client_remembers_fallback_endpoint():
+    session = MagicMock()
+    session.post.side_effect = [_upstream(404), _upstream(200, {'data': {}}), _upstream(200, {'data': {}})]
+    client = WordPressGraphQLClient('http://wp', session=session)
+
+    client.request('{ posts { nodes { id } } }')
+    client.request('{ posts { nodes { id } } }')
+
+    urls = [call[0][0] for call in session.post.call_args_list]
+    assert urls == ['http://wp/graphql', 'http://wp/?graphql', 'http://wp/?graphql']
+
+
+def test_wordpress_client_retries_queries_with_backoff():
+    session = MagicMock()
+    session.post.side_effect = [requests.ConnectionError('reset'), _upstream(503), _upstream(200, {'data': {'ok': 1}})]
+    client = WordPressGraphQLClient.for_endpoint('http://wp/graphql', session=session)
+
+    with patch('app.wordpress_client.time.sleep') as mock_sleep:
+        assert client.request('{ ok }') == {'data': {'ok': 1}}
+
+    assert [call[0][0] for call in mock_sleep.call_args_list] == [0.2, 0.4]
+
+
+def test_wordpress_client_never_retries_mutations():
+    session = MagicMock()
+    session.post.return_value = _upstream(503)
+    client = WordPressGraphQLClient.for_endpoint('http://wp/index.php?graphql', session=session)
+
+    with pytest.raises(requests.HTTPError):
+        client.request('mutation { touch }', idempotent=False)
+    assert session.post.call_count == 1
+    assert session.post.call_args[0][0] == 'http://wp/index.php?graphql'
+
+
+def test_wordpress_clients_share_one_session():
+    assert wordpress_client('http://wp-a/graphql') is wordpress_client('http://wp-a/graphql')
+    assert shared_session() is shared_session()
+
+
+def test_wordpress_post_fields_are_batched_into_one_upstream_query(app):
+    upstream = _upstream(200, {'data': {'posts': {'nodes': [
+        {'databaseId': 1, 'title': 'One'}, {'databaseId': 3, 'title': 'Three'}
+    ]}}})
+    query = '''query Posts($third: String!) {
+        first: wordpressPost(postId: "1") { title }
+        second: wordpressPost(postId: "2") { title }
+        third: wordpressPost(postId: $third) { title }
+    }'''
+
+    def cached_entity(key, stale_ttl=0):
+        # Post 2 is cached; its field never reaches the loader.
+        return ({'databaseId': 2, 'title': 'Two'}, 600) if key == 'entity:wp_post:2' else (None, None)
+
+    with app.test_client() as client, \
+         patch('app.utils.cache.cache') as mock_cache, \
+         patch('app.graphql.loaders.cache') as loader_cache, \
+         patch('app.graphql.loaders.entity_cache') as loader_entities, \
+         patch('app.wordpress_client.requests.Session.post', return_value=upstream) as mock_post:
+        mock_cache.is_available.return_value = True
+        mock_cache.get_with_ttl.side_effect = cached_entity
+        mock_cache.acquire_lock.return_value = 'token'
+        loader_cache.is_available.return_value = True
+        loader_entities.get_many.return_value = {'2': {'databaseId': 2, 'title': 'Two'}}
+        response = client.post('/graphql', json={'query': query, 'variables': {'third': '3'}},
+                               headers={'Authorization': 'Bearer test-token'})
+
+    assert response.get_json()['data'] == {
+        'first': {'title': 'One'}, 'second': {'title': 'Two'}, 'third': {'title': 'Three'}
+    }
+    loader_entities.get_many.assert_called_once_with('wp_post', ['2', '3'])
+    mock_post.assert_called_once()
+    assert mock_post.call_args[1]['json']['variables'] == {'ids': ['1', '3'], 'first': 2}
+    stored = loader_entities.put_many.call_args[0][1]
+    assert [post['databaseId'] for post in stored] == [1, 3]
+
+
+def test_stale_wordpress_post_is_refetched_on_refresh(app):
+    stale = {'databaseId': 7, 'title': 'v1'}
+    upstream = _upstream(200, {'data': {'posts': {'nodes': [{'databaseId': 7, 'title': 'v2'}]}}})
+
+    with app.test_client() as client, \
+         patch('app.utils.cache.cache') as mock_cache, \
+         patch('app.utils.cache.background_refresher') as refresher, \
+         patch('app.graphql.loaders.cache') as loader_cache, \
+         patch('app.graphql.loaders.entity_cache') as loader_entities, \
+         patch('app.wordpress_client.requests.Session.post', return_value=upstream) as mock_post:
+        mock_cache.is_available.return_value = True
+        mock_cache.get_with_ttl.return_value = (stale, 100)
+        loader_cache.is_available.return_value = True
+        # The stale entity is the decorator's own entry, still in Redis.
+        loader_entities.get_many.return_value = {'7': stale}
+        response = client.post('/graphql', json={'query': '{ wordpressPost(postId: "7") { title } }'},
+                               headers={'Authorization': 'Bearer test-token'})
+        assert response.get_json()['data'] == {'wordpressPost': {'title': 'v1'}}
+
+        refresh = refresher.schedule.call_args[0][2]
+        with app.app_context():
+            assert refresh()['title'] == 'v2'
+
+    assert mock_post.call_args[1]['json']['variables'] == {'ids': ['7'], 'first': 1}
+    loader_entities.get_many.assert_not_called()
+    assert mock_cache.set.call_args[0][1]['title'] == 'v2'
+
+
+def _page(ids, cursor=None, has_next=False):
+    return _upstream(200, {'data': {'posts': {
+        'pageInfo': {'hasNextPage': has_next, 'endCursor': cursor},
+        'nodes': [{'databaseId': post_id} for post_id in ids]
+    }}})
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_wordpress_pager_follows_cursors(prefetch):
+    session = MagicMock()
+    session.post.side_effect = [_page([1, 2], 'c1', True), _page([3, 4], 'c2', True), _page([5], None, False)]
+    client = WordPressGraphQLClient.for_endpoint('http://wp/graphql', session=session)
+
+    posts = [post['databaseId'] for post in client.paginate(client.POSTS_QUERY, 'posts', page_size=2, prefetch=prefetch)]
+
+    assert posts == [1, 2, 3, 4, 5]
+    variables = [call[1]['json']['variables'] for call in session.post.call_args_list]
+    assert variables == [{'first': 2, 'after': None}, {'first': 2, 'after': 'c1'}, {'first': 2, 'after': 'c2'}]
+
+
+def test_wordpress_pager_stops_at_limit():
+    session = MagicMock()
+    session.post.side_effect = [_page([1, 2], 'c1', True), _page([3], 'c2', True)]
+    client = WordPressGraphQLClient.for_endpoint('http://wp/graphql', session=session)
+
+    assert [post['databaseId'] for post in client.iter_posts(limit=3, page_size=2, prefetch=False)] == [1, 2, 3]
+    assert session.post.call_args[1]['json']['variables'] == {'first': 1, 'after': 'c1'}
+    assert session.post.call_count == 2
+
+
+def test_wordpress_pager_raises_on_graphql_errors():
+    session = MagicMock()
+    session.post.return_value = _upstream(200, {'data': None, 'errors': [{'message': 'boom'}]})
+    client = WordPressGraphQLClient.for_endpoint('http://wp/graphql', session=session)
+
+    with pytest.raises(requests.RequestException, match='boom'):
+        list(client.iter_posts())
+    assert client.get_posts(first=5) == []
+
+
+def _wp_node(post_id, modified, title='Post'):
+    return {'id': f'cG9zdDo{post_id}', 'databaseId': post_id, 'title': title,
+            'date': '2024-01-01T10:00:00', 'modified': modified, 'author': {'node': {'name': 'Ann'}}}
+
+
+def test_mirror_reconcile_upserts_and_deletes(app):
+    from app import db
+    from app.models import WordPressPost
+    from app.wordpress_sync import MIRRORS, WordPressMirror
+
+    client = MagicMock()
+    mirror = WordPressMirror(batch_size=2)
+    with app.app_context(), patch('app.wordpress_sync.cache') as mock_cache:
+        mock_cache.is_available.return_value = True
+        client.paginate.return_value = iter([_wp_node(1, '2024-02-01T00:00:00'), _wp_node(2, '2024-01-15T00:00:00'),
+                                             _wp_node(3, '2024-01-10T00:00:00')])
+        assert mirror.mirror(MIRRORS['posts'], client, full=True) == {'inserted': 3, 'updated': 0, 'deleted': 0}
+
+        client.paginate.return_value = iter([_wp_node(1, '2024-03-01T00:00:00', 'Edited'),
+                                             _wp_node(2, '2024-01-15T00:00:00')])
+        mock_cache.invalidate_tags.reset_mock()
+        assert mirror.mirror(MIRRORS['posts'], client, full=True) == {'inserted': 0, 'updated': 1, 'deleted': 1}
+
+        assert db.session.get(WordPressPost, 1).title == 'Edited'
+        assert db.session.get(WordPressPost, 3) is None
+        mock_cache.invalidate_tags.assert_any_call('wp_post:1', 'wp_post:3')
+        mock_cache.invalidate_tags.assert_any_call('wp_posts', 'wp_posts:content')
+
+
+def test_mirror_reconcile_keeps_rows_when_upstream_is_empty(app):
+    from app.models import WordPressPost
+    from app.wordpress_sync import MIRRORS, WordPressMirror
+
+    client = MagicMock()
+    mirror = WordPressMirror()
+    with app.app_context(), patch('app.wordpress_sync.cache') as mock_cache:
+        mock_cache.is_available.return_value = True
+        client.paginate.return_value = iter([_wp_node(1, '2024-02-01T00:00:00'), _wp_node(2, '2024-01-15T00:00:00'),
+                                             _wp_node(3, '2024-01-10T00:00:00')])
+        mirror.mirror(MIRRORS['posts'], client, full=True)
+        mock_cache.invalidate_tags.reset_mock()
+
+        client.paginate.return_value = iter([])
+        assert mirror.mirror(MIRRORS['posts'], client, full=True)['delete_aborted'] == 3
+
+        client.paginate.return_value = iter([_wp_node(1, '2024-02-01T00:00:00')])
+        assert mirror.mirror(MIRRORS['posts'], client, full=True)['delete_aborted'] == 2
+
+        assert sorted(post.id for post in WordPressPost.query.all()) == [1, 2, 3]
+        mock_cache.invalidate_tags.assert_not_called()
+
+
+def test_mirror_delta_stops_at_newest_mirrored_row(app):
+    from app.models import WordPressPost
+    from app.wordpress_sync import MIRRORS, WordPressMirror
+
+    client = MagicMock()
+    mirror = WordPressMirror()
+    with app.app_context(), patch('app.wordpress_sync.cache') as mock_cache:
+        mock_cache.is_available.return_value = False
+        client.paginate.return_value = iter([_wp_node(1, '2024-02-01T00:00:00')])
+        mirror.mirror(MIRRORS['posts'], client, full=True)
+
+        fetched = []
+        def nodes():
+            for node in [_wp_node(4, '2024-03-01T00:00:00'), _wp_node(1, '2024-02-01T00:00:00'),
+                         _wp_node(2, '2024-01-01T00:00:00'), _wp_node(3, '2023-12-01T00:00:00')]:
+                fetched.append(node['databaseId'])
+                yield node
+        client.paginate.return_value = nodes()
+
+        assert mirror.mirror(MIRRORS['posts'], client) == {'inserted': 1, 'updated': 0, 'deleted': 0}
+        assert fetched == [4, 1, 2]
+        assert sorted(post.id for post in WordPressPost.query.all()) == [1, 4]
+
+
+def test_wordpress_posts_read_from_mirror(app):
+    from app import db
+    from app.models import WordPressPost
+    from datetime import datetime
+
+    app.config['WORDPRESS_READ_FROM_MIRROR'] = True
+    with app.app_context():
+        db.session.add(WordPressPost(id=1, title='Older', date=datetime(2024, 1, 1)))
+        db.session.add(WordPressPost(id=2, title='Newer', date=datetime(2024, 2, 1), author_name='Ann'))
+        db.session.commit()
+
+    with app.test_client() as client, \
+         patch('app.utils.cache.cache') as mock_cache, \
+         patch('app.wordpress_client.requests.Session.post') as mock_post:
+        mock_cache.is_available.return_value = False
+        response = client.post('/graphql', json={'query': '{ wordpressPosts(limit: 1) { title authorName } }'},
+                               headers={'Authorization': 'Bearer test-token'})
+
+    assert response.get_json()['data']['wordpressPosts'] == [{'title': 'Newer', 'authorName': 'Ann'}]
+    mock_post.assert_not_called()
+
+
+def _signed_webhook(client, payload, secret='hook-secret', timestamp=None):
+    import json
+    import time
+    from app.routes.webhooks import sign_payload
+
+    body = json.dumps(payload).encode()
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    return client.post('/api/webhooks/wordpress', data=body, content_type='application/json', headers={
+        'X-Webhook-Timestamp': timestamp,
+        'X-Webhook-Signature': 'sha256=' + sign_payload(secret, timestamp, body)
+    })
+
+
+def test_wordpress_webhook_requires_configured_secret(app):
+    app.config['WORDPRESS_WEBHOOK_SECRET'] = ''
+    with app.test_client() as client:
+        response = _signed_webhook(client, {'action': 'update', 'post_id': 5})
+    assert response.status_code == 503
+
+
+def test_wordpress_webhook_rejects_bad_or_stale_signatures(app):
+    app.config['WORDPRESS_WEBHOOK_SECRET'] = 'hook-secret'
+    with app.test_client() as client, patch('app.routes.webhooks.cache') as mock_cache:
+        forged = _signed_webhook(client, {'action': 'update', 'post_id': 5}, secret='wrong')
+        replayed = _signed_webhook(client, {'action': 'update', 'post_id': 5}, timestamp=1)
+    assert forged.status_code == 401
+    assert replayed.status_code == 401
+    mock_cache.invalidate_tags.assert_not_called()
+
+
+def test_wordpress_webhook_update_refreshes_post_and_lists(app):
+    app.config['WORDPRESS_WEBHOOK_SECRET'] = 'hook-secret'
+    with app.test_client() as client, \
+         patch('app.routes.webhooks.cache') as mock_cache, \
+         patch('app.routes.webhooks.cache_warmer') as mock_warmer:
+        mock_cache.is_available.return_value = True
+        mock_cache.invalidate_tags.return_value = 2
+        mock_warmer.enqueue.return_value = True
+        mock_warmer.snapshot.return_value = [{'p': 'wp_posts', 't': 'Query', 'f': 'wordpressPosts', 'a': {}},
+                                             {'p': 'articles', 't': 'Query', 'f': 'articles', 'a': {}}]
+        response = _signed_webhook(client, {'action': 'update', 'post_id': 5})
+
+    assert response.status_code == 202
+    mock_cache.invalidate_tags.assert_called_once_with('wp_post:5', 'wp_posts:content')
+    entries = mock_warmer.enqueue.call_args[0][1]
+    assert [entry['p'] for entry in entries] == ['wp_post', 'wp_posts']
+    assert entries[0]['a'] == {'post_id': '5'}
+
+
+def test_wordpress_webhook_delete_updates_mirror_and_lists(app):
+    from app import db
+    from app.models import WordPressPost
+
+    app.config['WORDPRESS_WEBHOOK_SECRET'] = 'hook-secret'
+    app.config['WORDPRESS_MIRROR_SYNC'] = True
+    with app.app_context():
+        db.session.add(WordPressPost(id=5, title='Gone'))
+        db.session.commit()
+
+    with app.test_client() as client, \
+         patch('app.routes.webhooks.cache') as mock_cache, \
+         patch('app.routes.webhooks.cache_warmer') as mock_warmer, \
+         patch('app.wordpress_sync.cache') as mirror_cache, \
+         patch('app.wordpress_client.requests.Session.post') as mock_post:
+        mock_cache.is_available.return_value = True
+        mock_cache.invalidate_tags.return_value = 2
+        mock_warmer.enqueue.return_value = True
+        mirror_cache.is_available.return_value = False
+        mock_warmer.snapshot.return_value = [{'p': 'wp_post_summaries', 't': 'Query', 'f': 'wordpressPosts', 'a': {}}]
+        response = _signed_webhook(client, {'action': 'trash', 'post_id': 5})
+
+    assert response.status_code == 202
+    assert response.get_json()['mirror']['deleted'] == 1
+    mock_cache.invalidate_tags.assert_called_once_with('wp_post:5', 'wp_posts:content', 'wp_posts')
+    assert [entry['p'] for entry in mock_warmer.enqueue.call_args[0][1]] == ['wp_post_summaries']
+    mock_post.assert_not_called()
+    with app.app_context():
+        assert db.session.get(WordPressPost, 5) is None
+
+
+def _http_response(status_code, body=None, headers=None):
+    import json
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode() if body is not None else b''
+    response.headers.update(headers or {})
+    return response
+
+
+def _persisted_client(session):
+    client = WordPressGraphQLClient.for_endpoint('http://wp/graphql', session=session)
+    client.persisted_queries = True
+    return client
+
+
+def test_wordpress_client_registers_unknown_persisted_query():
+    from app.wordpress_client import persisted_query_id
+
+    session = MagicMock()
+    session.get.side_effect = [_http_response(200, {'errors': [{'message': 'PersistedQueryNotFound'}]}),
+                               _http_response(200, {'data': {'ok': 2}})]
+    session.post.return_value = _http_response(200, {'data': {'ok': 1}})
+    client = _persisted_client(session)
+    query = 'query Ok($id: ID) { ok(id: $id) }'
+
+    assert client.request(query, {'id': 3}) == {'data': {'ok': 1}}
+    assert client.request(query, {'id': 3}) == {'data': {'ok': 2}}
+
+    params = session.get.call_args.kwargs['params']
+    assert params == {'queryId': persisted_query_id(query), 'variables': '{"id":3}'}
+    assert session.post.call_args.kwargs['json'] == {'query': query, 'queryId': persisted_query_id(query),
+                                                     'variables': {'id': 3}}
+    assert session.get.call_count == 2 and session.post.call_count == 1
+
+
+def test_wordpress_client_revalidates_with_etag():
+    session = MagicMock()
+    session.get.side_effect = [_http_response(200, {'data': {'ok': 1}}, {'ETag': '"v1"'}),
+                               _http_response(304, headers={'ETag': '"v1"'})]
+    client = _persisted_client(session)
+
+    assert client.request('{ ok }') == {'data': {'ok': 1}}
+    assert client.request('{ ok }') == {'data': {'ok': 1}}
+    assert session.get.call_args_list[0].kwargs['headers'] == {}
+    assert session.get.call_args_list[1].kwargs['headers'] == {'If-None-Match': '"v1"'}
+
+
+def test_wordpress_client_posts_when_encoded_url_is_too_long():
+    session = MagicMock()
+    session.post.return_value = _http_response(200, {'data': {'posts': {'nodes': []}}})
+    client = _persisted_client(session)
+    # ~1000 bytes of JSON, but well over 2000 once percent-encoded.
+    ids = [str(n) for n in range(200)]
+
+    client.request('query Q($ids: [ID]) { posts(where: {in: $ids}) { nodes { id } } }', {'ids': ids})
+
+    session.get.assert_not_called()
+    assert session.post.call_args.kwargs['json']['variables'] == {'ids': ids}
+
+
+def test_wordpress_client_bounds_stored_bodies():
+    session = MagicMock()
+    client = _persisted_client(session)
+    client.revalidate_bytes = 100
+    client.revalidate_body_bytes = 60
+    session.get.side_effect = [_http_response(200, {'data': {'n': 'x' * 25}}, {'ETag': f'"{n}"'}) for n in range(3)] + \
+        [_http_response(200, {'data': {'n': 'x' * 80}}, {'ETag': '"big"'})]
+
+    for n in range(4):
+        client.request('query Q($n: Int) { n(n: $n) }', {'n': n})
+
+    assert len(client._validators) == 2
+    assert client._validator_bytes == sum(len(entry[2]) for entry in client._validators.values()) <= 100
+
+
+def test_wordpress_client_posts_mutations_even_when_persisted():
+    session = MagicMock()
+    session.post.return_value = _http_response(200, {'data': {'touch': True}})
+    client = _persisted_client(session)
+
+    assert client.request('mutation { touch }', idempotent=False) == {'data': {'touch': True}}
+    session.get.assert_not_called()
+
+
+def test_wordpress_webhook_update_keeps_mirror_id_lists(app):
+    from app import db
+    from app.models import WordPressPost
+
+    app.config['WORDPRESS_WEBHOOK_SECRET'] = 'hook-secret'
+    app.config['WORDPRESS_MIRROR_SYNC'] = True
+    with app.app_context():
+        db.session.add(WordPressPost(id=5, title='Old'))
+        db.session.commit()
+
+    upstream = _upstream(200, {'data': {'node': _wp_node(5, '2024-03-01T00:00:00', 'New')}})
+    with app.test_client() as client, \
+         patch('app.routes.webhooks.cache') as mock_cache, \
+         patch('app.wordpress_sync.cache') as mirror_cache, \
+         patch('app.wordpress_client.requests.Session.post', return_value=upstream):
+        mock_cache.is_available.return_value = False
+        mock_cache.invalidate_tags.return_value = 1
+        mirror_cache.is_available.return_value = True
+        response = _signed_webhook(client, {'action': 'update', 'post_id': 5, 'refresh': False})
+
+    assert response.get_json()['mirror']['updated'] == 1
+    mirror_cache.invalidate_tags.assert_called_once_with('wp_post:5')
+    mock_cache.invalidate_tags.assert_called_once_with('wp_post:5', 'wp_posts:content')
+    with app.app_context():
+        assert db.session.get(WordPressPost, 5).title == 'New'
+
+
+def test_back_to_back_webhooks_both_refresh(app):
+    import threading
+    from app.utils.cache_warmup import CacheWarmer
+
+    recorder = MagicMock()
+    recorder.top.return_value = []
+    warmer = CacheWarmer(MagicMock(), recorder, max_workers=1, rate=0)
+    release = threading.Event()
+    refreshed = []
+
+    def resolve_post(root, info, post_id):
+        refreshed.append(post_id)
+        release.wait(5)
+    warmer.register('wp_post', resolve_post)
+
+    app.config['WORDPRESS_WEBHOOK_SECRET'] = 'hook-secret'
+    with app.test_client() as client, \
+         patch('app.routes.webhooks.cache') as mock_cache, \
+         patch('app.routes.webhooks.cache_warmer', warmer):
+        mock_cache.is_available.return_value = True
+        mock_cache.invalidate_tags.return_value = 1
+        first = _signed_webhook(client, {'action': 'update', 'post_id': 5})
+        second = _signed_webhook(client, {'action': 'update', 'post_id': 6})
+        release.set()
+        warmer._thread.join(5)
+
+    assert first.get_json()['refresh_started'] and second.get_json()['refresh_started']
+    assert refreshed == ['5', '6']
+    assert warmer.status()['total'] == 2
+